@@ -0,0 +1,128 @@
+# elevator_batch.py
+
+import sys
+import json
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from schindler import create_lift, input_error, index_requests, run_lift, parse_options, MALFORMED_INPUT
+from elevator_policies import get_policy
+from elevator_metrics import metrics_snapshot
+
+
+def error_result(message, violations=None):
+    result = {"time": None, "latency": None, "metrics": None, "error": message}
+    if violations is not None:
+        result["violations"] = [v._asdict() for v in violations]
+    return result
+
+
+def run_scenario(scenario):
+    """Run one scenario (a dict of lift() keyword arguments, plus an optional "policy" name) to completion without printing or exiting.
+
+    The per-step passenger count checks are off unless the scenario sets "check_invariants".
+    A scenario that can't be read (a missing key, a list that isn't one) comes back as an error
+    like any invalid input, so one bad row doesn't stop a batch. Errors from the simulation itself propagate.
+    """
+    try:
+        lift = create_lift(
+            scenario["current_floor"],
+            scenario["onboard_passengers"],
+            scenario["direction"],
+            scenario.get("passengers_drop_off", scenario["onboard_passengers"]),
+            scenario["drop_off_floors"],
+            scenario["offboard_passengers"],
+            scenario["pick_up_floors"],
+            scenario["pick_up_destinations"],
+            scenario.get("building"),
+        )
+        error = input_error(lift)
+    except MALFORMED_INPUT as e:
+        return error_result(f"Malformed scenario: {type(e).__name__}: {e}")
+
+    if error is None:
+        try:
+            policy = get_policy(scenario.get("policy", "greedy"))
+        except ValueError as e:
+            error = str(e)
+    if error is not None:
+        return error_result(error)
+
+    lift = index_requests(lift)
+
+    # only the final event is needed, it carries the totals
+    final = deque(run_lift(lift, policy, scenario.get("check_invariants", False)), maxlen=1)[0]
+    time = {"total_time": final.time,
+            "onboard_waiting_time": final.onboard_waiting_time,
+            "offboard_waiting_time": final.offboard_waiting_time,
+            "initial_passenger_time": final.initial_passenger_time}
+    return {"time": time, "latency": final.latency, "metrics": metrics_snapshot(lift.metrics), "error": None}
+
+
+def iter_batch(scenarios, max_workers=None, chunksize=256, validate=False, lockstep=False):
+    """Yield one result per scenario, in order. max_workers=0 runs in this process.
+
+    With validate=True scenarios are checked a block at a time with elevator_validation first, and
+    invalid ones come back with every violation found instead of only the first error.
+    lockstep=True runs greedy scenarios through elevator_lockstep in this process, always validating;
+    only the time totals are kept, latency and metrics are None.
+    """
+    if lockstep:
+        from elevator_lockstep import iter_lockstep      # numpy again
+        yield from iter_lockstep(scenarios)
+        return
+
+    if validate:
+        yield from iter_validated(scenarios, max_workers, chunksize)
+        return
+
+    if max_workers == 0:
+        for scenario in scenarios:
+            yield run_scenario(scenario)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        # chunks keep the pickling overhead per scenario small
+        yield from pool.map(run_scenario, scenarios, chunksize=chunksize)
+
+
+def iter_validated(scenarios, max_workers=None, chunksize=256, block=16384):
+    from elevator_validation import validate_batch     # numpy is only needed when validating
+
+    scenarios = iter(scenarios)
+    while True:
+        chunk = list(islice(scenarios, block))
+        if not chunk:
+            return
+        violations = validate_batch(chunk)
+        valid = [scenario for scenario, found in zip(chunk, violations) if not found]
+        results = iter_batch(valid, max_workers, chunksize)
+        for found in violations:
+            if found:
+                yield error_result(found[0].message, found)
+            else:
+                yield next(results)
+        results.close()     # shuts this block's pool down
+
+
+def run_batch(scenarios, max_workers=None, chunksize=256, validate=False, lockstep=False):
+    return list(iter_batch(scenarios, max_workers, chunksize, validate, lockstep))
+
+
+def main():
+    # python elevator_batch.py scenarios.jsonl [validate=1] [lockstep=1]  ->  one JSON result per line
+    if len(sys.argv) < 2:
+        print("Usage: python elevator_batch.py <scenarios.jsonl> [validate=1] [lockstep=1]")
+        sys.exit(1)
+    options = parse_options(sys.argv[2:])
+    validate = options.get("validate") == "1"
+    lockstep = options.get("lockstep") == "1"
+
+    with open(sys.argv[1]) as f:
+        scenarios = (json.loads(line) for line in f if line.strip())
+        for result in iter_batch(scenarios, validate=validate, lockstep=lockstep):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# elevator_benchmark.py
+
+import sys
+import csv
+import json
+import random
+import tracemalloc
+from time import perf_counter
+from schindler import (create_building, create_lift, index_requests, find_next_move, lift_update,
+                       update_time, lift, parse_options)
+
+
+def make_scenario(rng, num_floors, requests, capacity):
+    """Random valid lift() arguments: a part-full car and `requests` hall calls."""
+    onboard = rng.randint(0, capacity)
+    return {"current_floor": rng.randrange(num_floors),
+            "onboard_passengers": onboard,
+            "direction": rng.randint(0, 1),
+            "passengers_drop_off": onboard,
+            "drop_off_floors": [rng.randrange(num_floors) for _ in range(onboard)],
+            "offboard_passengers": requests,
+            "pick_up_floors": [rng.randrange(num_floors) for _ in range(requests)],
+            "pick_up_destinations": [rng.randrange(num_floors) for _ in range(requests)],
+            "building": create_building(num_floors, capacity)}
+
+
+def fresh_lift(scenario):
+    # lists are copied so the scenario can be replayed
+    return index_requests(create_lift(scenario["current_floor"], scenario["onboard_passengers"], scenario["direction"],
+                                      scenario["passengers_drop_off"], list(scenario["drop_off_floors"]),
+                                      scenario["offboard_passengers"], list(scenario["pick_up_floors"]),
+                                      list(scenario["pick_up_destinations"]), scenario["building"]))
+
+
+def time_phases(scenario):
+    # run the main loop by hand, timing find_next_move and lift_update separately
+    state = fresh_lift(scenario)
+    time = {"total_time": 0, "onboard_waiting_time": 0, "offboard_waiting_time": 0, "initial_passenger_time": 0}
+    decide = update = 0.0
+    decisions = updates = 0
+
+    while True:
+        start = perf_counter()
+        next_move = find_next_move(state)
+        decide += perf_counter() - start
+        decisions += 1
+        if next_move is None:
+            break
+
+        update_time(state, time, next_move)
+        start = perf_counter()
+        lift_update(state, next_move)
+        update += perf_counter() - start
+        updates += 1
+
+    return {"find_next_move": (decisions, decide), "lift_update": (updates, update)}
+
+
+def time_end_to_end(scenario):
+    args = dict(scenario, drop_off_floors=list(scenario["drop_off_floors"]),
+                pick_up_floors=list(scenario["pick_up_floors"]),
+                pick_up_destinations=list(scenario["pick_up_destinations"]))
+    start = perf_counter()
+    record = lift(**args, return_record=True, print_output=False)
+    seconds = perf_counter() - start
+    # one decision per move, plus the last one that finds nothing left to do
+    decisions = sum(1 for line in record if line.startswith("Moving")) + 1
+    return decisions, seconds
+
+
+def peak_memory(scenario):
+    args = dict(scenario, drop_off_floors=list(scenario["drop_off_floors"]),
+                pick_up_floors=list(scenario["pick_up_floors"]),
+                pick_up_destinations=list(scenario["pick_up_destinations"]))
+    tracemalloc.start()
+    lift(**args, return_record=True, print_output=False)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(floor_counts, request_counts, capacities, repeat=3, seed=0):
+    """One row per (floors, requests, capacity, phase). Times are the best of `repeat` runs."""
+    rows = []
+    for num_floors in floor_counts:
+        for requests in request_counts:
+            for capacity in capacities:
+                scenario = make_scenario(random.Random(seed), num_floors, requests, capacity)
+
+                best = {}
+                for _ in range(repeat):
+                    phases = time_phases(scenario)
+                    phases["lift"] = time_end_to_end(scenario)
+                    for phase, (calls, seconds) in phases.items():
+                        if phase not in best or seconds < best[phase][1]:
+                            best[phase] = (calls, seconds)
+
+                memory = peak_memory(scenario)
+                for phase, (calls, seconds) in best.items():
+                    rows.append({"floors": num_floors,
+                                 "requests": requests,
+                                 "capacity": capacity,
+                                 "phase": phase,
+                                 "calls": calls,
+                                 "wall_time": seconds,
+                                 "calls_per_second": calls / seconds if seconds else 0.0,
+                                 "peak_memory": memory if phase == "lift" else None})
+    return rows
+
+
+def write_results(rows, path):
+    # .csv gets a spreadsheet, anything else JSON
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+def main():
+    # python elevator_benchmark.py [results.json|results.csv] [floors=4,20,100] [requests=10,100,1000] [capacity=5] [repeat=3] [seed=0]
+    args = sys.argv[1:]
+    path = None
+    if args and "=" not in args[0]:
+        path = args.pop(0)
+    options = parse_options(args)
+
+    def int_list(key, default):
+        return [int(v) for v in options.get(key, default).split(",")]
+
+    rows = run_benchmarks(int_list("floors", "4,20,100"), int_list("requests", "10,100,1000"),
+                          int_list("capacity", "5"), int(options.get("repeat", 3)), int(options.get("seed", 0)))
+
+    for row in rows:
+        print(f"{row['floors']:>5} floors {row['requests']:>6} requests cap {row['capacity']:>3}  "
+              f"{row['phase']:<15} {row['calls']:>7} calls {row['wall_time'] * 1000:9.3f} ms "
+              f"{row['calls_per_second']:>12.0f}/s" + (f"  peak {row['peak_memory'] / 1024:.1f} KiB" if row["peak_memory"] else ""))
+    if path:
+        write_results(rows, path)
+
+
+if __name__ == "__main__":
+    main()
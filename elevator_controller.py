@@ -0,0 +1,292 @@
+# elevator_controller.py
+
+# Live controller: the same request indexes and greedy decisions as lift(), but calls arrive
+# while the car is running instead of all up front. Calls come in through hall_call/car_call
+# (or newline-delimited JSON over TCP or a Unix socket), the car is told where to go next, and
+# everything that happens is pushed to subscribers.
+#
+# A car is any coroutine function car(controller, floor) that returns once the car has reached
+# `floor`. simulated_car sleeps for the travel time; external_car waits for an "arrived" message
+# from whatever is driving the real (or another simulated) car over the socket.
+
+import sys
+import json
+import asyncio
+from time import perf_counter
+from schindler import (create_building, create_lift, index_requests, add_passenger, add_rider, Passenger,
+                       alight_passengers, board_passengers, find_next_move, is_floor, parse_options)
+from elevator_metrics import record_move, metrics_snapshot
+
+SUBSCRIBER_QUEUE = 1000     # events kept per slow subscriber before the oldest are dropped
+
+
+def create_controller(building=None, start_floor=0, choose_move=find_next_move):
+    """Controller state for one car. Must be created inside the running event loop."""
+    if building is None:
+        building = create_building()
+    lift = index_requests(create_lift(start_floor, 0, 1, 0, [], 0, [], [], building))
+
+    loop = asyncio.get_running_loop()
+    controller = {"lift": lift,
+                  "choose_move": choose_move,
+                  "start": loop.time(),
+                  "wake": asyncio.Event(),                  # set whenever there may be new work
+                  "target": None,                           # floor the car has been sent to
+                  "departed": 0.0,                          # when it was sent
+                  "arrival": None,                          # future an external car resolves with its floor
+                  "subscribers": set(),
+                  "decisions": 0,
+                  "decision_time": 0.0,
+                  "max_decision_time": 0.0}
+    return controller
+
+
+def now(controller):
+    # seconds since the controller started, the clock passengers are stamped with
+    return asyncio.get_running_loop().time() - controller["start"]
+
+
+def subscribe(controller):
+    queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+    controller["subscribers"].add(queue)
+    return queue
+
+
+def unsubscribe(controller, queue):
+    controller["subscribers"].discard(queue)
+
+
+def publish(controller, event):
+    event["time"] = now(controller)
+    for queue in controller["subscribers"]:
+        if queue.full():
+            # a subscriber that can't keep up loses its oldest events, never blocks the car
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+def check_floor(lift, floor, name):
+    top_floor = lift.building["top_floor"]
+    if not is_floor(floor, top_floor):
+        raise ValueError(f"{name} {floor!r} out of range. Floors are 0 to {top_floor}")
+
+
+def hall_call(controller, origin, destination):
+    """Someone on `origin` wants to go to `destination`. Returns the passenger id."""
+    lift = controller["lift"]
+    check_floor(lift, origin, "Pick-up floor")
+    check_floor(lift, destination, "Pick-up destination")
+    if origin == destination:
+        raise ValueError(f"Pick-up floor and destination are both {origin}")
+
+    passenger = Passenger(None, origin, destination, now(controller))
+    add_passenger(lift, passenger)
+    publish(controller, {"type": "hall_call", "id": passenger.id, "origin": origin, "destination": destination})
+    controller["wake"].set()
+    return passenger.id
+
+
+def car_call(controller, destination):
+    """A button pressed inside the car: one more rider for `destination`. Returns the passenger id."""
+    lift = controller["lift"]
+    check_floor(lift, destination, "Drop-off floor")
+    if lift.onboard_passengers >= lift.building["capacity"]:
+        raise ValueError(f"Onboard passengers {lift.onboard_passengers} already at capacity")
+
+    t = now(controller)
+    passenger = Passenger(lift.next_passenger_id, lift.current_floor, destination, t, t)
+    lift.next_passenger_id += 1
+    add_rider(lift, passenger)
+    lift.onboard_passengers += 1
+    publish(controller, {"type": "car_call", "id": passenger.id, "destination": destination})
+    controller["wake"].set()
+    return passenger.id
+
+
+def decide(controller):
+    # the next floor to send the car to, timing every decision
+    lift = controller["lift"]
+    floor = lift.current_floor
+
+    start = perf_counter()
+    # choose_move only looks past the current floor, so serve anyone on this floor first
+    if lift.drop_off_counts[floor] or (lift.pick_up_counts[floor] and lift.onboard_passengers < lift.building["capacity"]):
+        next_move = floor
+    else:
+        next_move = controller["choose_move"](lift)
+    elapsed = perf_counter() - start
+
+    controller["decisions"] += 1
+    controller["decision_time"] += elapsed
+    if elapsed > controller["max_decision_time"]:
+        controller["max_decision_time"] = elapsed
+    return next_move
+
+
+def arrive(controller, floor):
+    # the car is at `floor` with its doors open: everyone for this floor gets off, then people
+    # board in the order they called while there is room, the rest wait for the next visit
+    lift = controller["lift"]
+    t = now(controller)
+    record_move(lift.metrics, lift.current_floor, floor, t - controller["departed"], lift.onboard_passengers, t)
+    lift.clock = t
+    lift.current_floor = floor
+
+    departures = alight_passengers(lift, floor)
+    lift.onboard_passengers -= departures
+    boarders = board_passengers(lift, floor, lift.building["capacity"] - lift.onboard_passengers)
+    lift.onboard_passengers += boarders
+    lift.offboard_passengers -= boarders
+    controller["target"] = None
+    publish(controller, {"type": "arrived", "floor": floor, "dropped_off": departures, "picked_up": boarders,
+                         "onboard": lift.onboard_passengers})
+
+
+async def run_controller(controller, car):
+    """Send the car from stop to stop for as long as the task runs, sleeping while there is nothing to do."""
+    lift = controller["lift"]
+    wake = controller["wake"]
+    while True:
+        next_move = decide(controller)
+        if next_move is None:
+            publish(controller, {"type": "idle", "floor": lift.current_floor})
+            wake.clear()
+            await wake.wait()
+            continue
+
+        controller["target"] = next_move
+        controller["departed"] = now(controller)
+        publish(controller, {"type": "command", "action": "goto", "floor": next_move, "direction": lift.direction})
+        if next_move != lift.current_floor:
+            await car(controller, next_move)
+        arrive(controller, next_move)
+
+
+def simulated_car(seconds_per_floor=1.0, door_time=0.0, speedup=1.0):
+    """A car that takes the building's motion-model time (or seconds_per_floor) to reach each stop.
+    speedup > 1 runs it faster than real time."""
+    async def car(controller, floor):
+        lift = controller["lift"]
+        motion = lift.building.get("motion")
+        if motion is None:
+            seconds = abs(floor - lift.current_floor) * seconds_per_floor + door_time
+        else:
+            seconds = (motion["table"][lift.current_floor * motion["num_floors"] + floor]
+                       + motion["door_open"] + motion["door_close"])
+        await asyncio.sleep(seconds / speedup)
+    return car
+
+
+async def external_car(controller, floor):
+    # wait for the car's driver to report {"type": "arrived", "floor": floor} over the socket
+    controller["arrival"] = asyncio.get_running_loop().create_future()
+    while await controller["arrival"] != floor:
+        controller["arrival"] = asyncio.get_running_loop().create_future()
+    controller["arrival"] = None
+
+
+def status(controller):
+    lift = controller["lift"]
+    decisions = controller["decisions"]
+    return {"floor": lift.current_floor,
+            "direction": lift.direction,
+            "target": controller["target"],
+            "onboard": lift.onboard_passengers,
+            "waiting": lift.offboard_passengers,
+            "decisions": decisions,
+            "mean_decision_us": controller["decision_time"] / decisions * 1e6 if decisions else 0.0,
+            "max_decision_us": controller["max_decision_time"] * 1e6,
+            "metrics": metrics_snapshot(lift.metrics)}
+
+
+def handle_message(controller, message):
+    # one request from a client, returns the reply
+    kind = message.get("type")
+    if kind == "hall_call":
+        return {"type": "ack", "id": hall_call(controller, message["origin"], message["destination"])}
+    if kind == "car_call":
+        return {"type": "ack", "id": car_call(controller, message["destination"])}
+    if kind == "status":
+        return {"type": "status", **status(controller)}
+    if kind == "arrived":
+        arrival = controller["arrival"]
+        if arrival is not None and not arrival.done():
+            arrival.set_result(message["floor"])
+        return {"type": "ack"}
+    raise ValueError(f"Unknown message type {kind}")
+
+
+async def serve_client(controller, reader, writer):
+    """Newline-delimited JSON: every request gets one reply line. {"type": "subscribe"} turns the
+    connection into an event stream."""
+    lock = asyncio.Lock()
+
+    async def send(message):
+        async with lock:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+    queue = None
+    pump = None
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+                if message.get("type") == "subscribe":
+                    if queue is None:
+                        queue = subscribe(controller)
+                        pump = asyncio.create_task(forward_events(queue, send))
+                    reply = {"type": "ack"}
+                else:
+                    reply = handle_message(controller, message)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                reply = {"type": "error", "message": str(e)}
+            await send(reply)
+    except ConnectionError:
+        pass
+    finally:
+        if queue is not None:
+            unsubscribe(controller, queue)
+            pump.cancel()
+        writer.close()
+
+
+async def forward_events(queue, send):
+    while True:
+        await send(await queue.get())
+
+
+async def start_server(controller, host="127.0.0.1", port=8765, path=None):
+    """Serve the JSON protocol on TCP host:port, or on the Unix socket `path` if given."""
+    def client(reader, writer):
+        return serve_client(controller, reader, writer)
+
+    if path is not None:
+        return await asyncio.start_unix_server(client, path)
+    return await asyncio.start_server(client, host, port)
+
+
+async def serve(building, car="simulated", host="127.0.0.1", port=8765, path=None, speedup=1.0):
+    controller = create_controller(building)
+    driver = external_car if car == "external" else simulated_car(speedup=speedup)
+    server = await start_server(controller, host, port, path)
+    print(f"Listening on {path or f'{host}:{port}'} with a {car} car")
+    async with server:
+        await asyncio.gather(server.serve_forever(), run_controller(controller, driver))
+
+
+def main():
+    # python elevator_controller.py [host=127.0.0.1] [port=8765] [path=/tmp/lift.sock] [floors=4] [capacity=5] [car=simulated|external] [speedup=1]
+    options = parse_options(sys.argv[1:])
+    building = create_building(int(options.get("floors", 4)), int(options.get("capacity", 5)))
+    try:
+        asyncio.run(serve(building, options.get("car", "simulated"), options.get("host", "127.0.0.1"),
+                          int(options.get("port", 8765)), options.get("path"), float(options.get("speedup", 1))))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# elevator_energy.py
+
+# Energy use for a traction car, used by the main loop when a building has an "energy" entry:
+#   create_building(num_floors, capacity, energy=create_energy(num_floors, capacity))
+# Without one nothing is measured, as before.
+#
+# A trip is costed from the physics of a counterweighted car:
+#   travel       lifting (or lowering) the out of balance mass: car + load - counterweight.
+#                The counterweight balances the empty car plus part of a full load, so a full
+#                car going up and an empty car going down both take energy from the motor,
+#                while a heavy car going down (or a light one going up) drives it, and a
+#                regenerative drive feeds some of that back
+#   friction     guides, ropes and sheave, in proportion to the moving mass and the distance
+#   start/stop   getting the masses up to speed, lost again in braking apart from what is
+#                regenerated, plus a fixed cost for brake release and controller overhead
+#   standby      lights, fans and controller, drawn for every second of the run
+# Every trip is worked out once into a flat table by (signed distance, load), so a move in the
+# main loop costs one lookup: table[(distance + top_floor) * loads + load]. Figures are joules.
+
+import sys
+from array import array
+from math import sqrt
+
+GRAVITY = 9.81
+JOULES_PER_KWH = 3.6e6
+
+
+def trip_energy(energy, distance, load):
+    """Joules for one trip of `distance` floors (negative is down) carrying `load` people, start to stop."""
+    if distance == 0:
+        return 0.0
+    height = abs(distance) * energy["floor_height"]
+    passengers = load * energy["passenger_mass"]
+    efficiency, regen = energy["efficiency"], energy["regen"]
+
+    # potential energy the motor has to supply, negative when the car drives the motor instead
+    imbalance = energy["car_mass"] + passengers - energy["counterweight"]
+    potential = imbalance * GRAVITY * height * (1 if distance > 0 else -1)
+    travel = potential / efficiency if potential > 0 else potential * regen
+
+    moving_mass = energy["car_mass"] + passengers + energy["counterweight"]
+    friction = energy["friction"] * moving_mass * GRAVITY * height / efficiency
+
+    # peak speed of a trapezoidal run, short hops never reach max_speed
+    speed = min(energy["max_speed"], sqrt(energy["acceleration"] * height))
+    kinetic = moving_mass * speed * speed / 2
+    start_stop = kinetic / efficiency - kinetic * regen + energy["start_stop"]
+    return travel + friction + start_stop
+
+
+def create_energy(num_floors, capacity, floor_height=3.5, car_mass=1200.0, passenger_mass=75.0, balance=0.5,
+                  efficiency=0.75, regen=0.5, friction=0.02, start_stop=3000.0, standby=200.0,
+                  acceleration=1.0, max_speed=2.5):
+    """Energy settings for one car, with the (distance, load) trip table filled in.
+
+    Masses are kg, and the counterweight is the car plus `balance` of a full load. efficiency is
+    the drive and machine efficiency when motoring, regen the share of energy recovered when the
+    car drives the motor (0 for a drive that burns it off in a resistor). friction is the running
+    resistance as a share of the moving weight, start_stop the fixed joules per trip and standby
+    the watts drawn all the time. acceleration and max_speed should match the motion model.
+    """
+    if not 0 < efficiency <= 1:
+        raise ValueError(f"Efficiency must be between 0 and 1, got {efficiency}")
+    if not 0 <= regen <= 1:
+        raise ValueError(f"Regeneration must be between 0 and 1, got {regen}")
+
+    energy = {"num_floors": num_floors,
+              "top_floor": num_floors - 1,
+              "capacity": capacity,
+              "loads": capacity + 1,
+              "floor_height": floor_height,
+              "car_mass": car_mass,
+              "passenger_mass": passenger_mass,
+              "counterweight": car_mass + balance * capacity * passenger_mass,
+              "efficiency": efficiency,
+              "regen": regen,
+              "friction": friction,
+              "start_stop": start_stop,
+              "standby": standby,
+              "acceleration": acceleration,
+              "max_speed": max_speed}
+
+    # trips only depend on the distance and the load, up to a full car
+    energy["table"] = array("d", [trip_energy(energy, distance, load)
+                                  for distance in range(-(num_floors - 1), num_floors)
+                                  for load in range(capacity + 1)])
+    return energy
+
+
+def move_energy(energy, origin, destination, load, time_taken=0):
+    """Joules for a move and the standby draw while it takes `time_taken` seconds (doors and boarding included)."""
+    standby = energy["standby"] * time_taken
+    if origin == destination:
+        return standby
+    if load > energy["capacity"]:
+        # lift() boards everyone waiting, so a car can be over its rated load; off the table
+        return trip_energy(energy, destination - origin, load) + standby
+    return energy["table"][(destination - origin + energy["top_floor"]) * energy["loads"] + load] + standby
+
+
+# default models for buildings without one, so the energy-aware policy works anywhere
+DEFAULTS = {}
+
+
+def energy_model(building):
+    energy = building.get("energy")
+    if energy is None:
+        key = (building["num_floors"], building["capacity"])
+        if key not in DEFAULTS:
+            DEFAULTS[key] = create_energy(*key)
+        energy = DEFAULTS[key]
+    return energy
+
+
+def energy_report(metrics):
+    """kWh for the run so far, in total and per delivered passenger, from the lift's metrics."""
+    kwh = metrics["energy"] / JOULES_PER_KWH
+    delivered = metrics["delivered"]
+    return {"energy_kwh": kwh, "energy_kwh_per_passenger": kwh / delivered if delivered else 0.0}
+
+
+def main():
+    # python elevator_energy.py [floors=20] [capacity=8] [calls=12] [count=200] [profile=lunch] [seed=0] [weight=10]
+    #     the same traffic under each policy: energy used against waiting time
+    from schindler import create_building, parse_options
+    from elevator_traffic import traffic_scenarios
+    from elevator_batch import run_scenario
+    from elevator_policies import energy_weighted
+
+    options = parse_options(sys.argv[1:])
+    num_floors, capacity = int(options.get("floors", 20)), int(options.get("capacity", 8))
+    building = create_building(num_floors, capacity, energy=create_energy(num_floors, capacity))
+    scenarios = list(traffic_scenarios(options.get("profile", "lunch"), num_floors, int(options.get("calls", 12)),
+                                       int(options.get("count", 200)), capacity, seed=int(options.get("seed", 0))))
+
+    policies = {"greedy": "greedy", "look": "look", "etd": "etd",
+                "energy": energy_weighted(float(options.get("weight", 10)))}
+    print(f"{'policy':>8} {'kWh/run':>9} {'Wh/person':>10} {'mean wait':>10} {'mean ride':>10}")
+    for name, policy in policies.items():
+        results = [run_scenario(dict(s, building=building, policy=policy)) for s in scenarios]
+        metrics = [r["metrics"] for r in results]
+        kwh = sum(m["energy_kwh"] for m in metrics) / len(metrics)
+        per_person = sum(m["energy_kwh_per_passenger"] for m in metrics) / len(metrics)
+        wait = sum(m["mean_wait"] for m in metrics) / len(metrics)
+        ride = sum(m["mean_ride"] for m in metrics) / len(metrics)
+        print(f"{name:>8} {kwh:>9.4f} {per_person * 1000:>10.2f} {wait:>10.2f} {ride:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,237 +1,215 @@
 # elevator_frontend.py
 
 import tkinter as tk
-import os
-from schindler import lift
-from elevator_parser import parse_record
+from time import perf_counter
+from schindler import lift_events
+from elevator_parser import parse_events
+from elevator_timeline import LIFT_WIDTH, create_layout, build_timeline, position_at, draw_static_building
 
 # Load passenger icon
 PERSON_IMG = None
 
-# Floor coordinate mapping
-FLOOR_Y = {3: 50, 2: 150, 1: 250, 0: 350}
+FRAME_MS = 16         # one redraw every 16 ms, ~60 fps
 
-LIFT_WIDTH = 80
-LIFT_HEIGHT = 60
-
-PASSENGER_SIZE = 30   # size of the PNG icon
-
-from PIL import Image, ImageTk
-import os
+from PIL import ImageTk
+from elevator_render import person_sprite
 
 def load_images(canvas):
     global PERSON_IMG
 
-    # Get the directory of THIS script (elevator_frontend.py)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Build full path to person.png inside same directory
-    img_path = os.path.join(script_dir, "person.png")
-
-    # Load and resize
-    img = Image.open(img_path)
-    img = img.resize((24, 48), Image.LANCZOS)
-
-    PERSON_IMG = ImageTk.PhotoImage(img)
+    # person.png is loaded and resized once per process, shared with the headless renderer
+    PERSON_IMG = ImageTk.PhotoImage(person_sprite())
     canvas.person_img = PERSON_IMG  # prevent GC
 
-def draw_static_building(canvas):
-    for y in FLOOR_Y.values():
-        canvas.create_line(50, y + LIFT_HEIGHT, 250, y + LIFT_HEIGHT, width=3)
-    canvas.create_rectangle(100, 20, 200, 420, outline="black", width=3)
-
-
-def draw_lift(canvas, floor):
-    y = FLOOR_Y[floor]
-    return canvas.create_rectangle(
-        110, y,
-        110 + LIFT_WIDTH, y + LIFT_HEIGHT,
-        fill="lightgreen"
-    )
-
-
-def draw_waiting_passengers(canvas, events):
-    """Creates icons for each floor that will later be picked up."""
-    waiting = {0: [], 1: [], 2: [], 3: []}
-
-    for ev in events:
-        if ev[0] == "PICKUP":
-            _, floor, count = ev
-
-            # Start from however many are already drawn for this floor
-            start_index = len(waiting[floor])
-
-            for i in range(count):
-                idx = start_index + i
-                x = 260 - idx * 35      # queue horizontally toward the shaft
-                y = FLOOR_Y[floor] + 15
-                icon = canvas.create_image(x, y, image=PERSON_IMG)
-                waiting[floor].append(icon)
-
-    return waiting
-
 
+# ---- Frame clock player ----------------------------------------------------
+# One after() timer redraws everything at FRAME_MS from the precomputed timeline,
+# so playback speed, pause and seek are just changes to the playback time.
+
+def create_player(canvas, timeline, layout):
+    lift_height = layout["lift_height"]
+
+    cars = []
+    for track in timeline["cars"]:
+        x, y = track["points"][0]
+        item = canvas.create_rectangle(x, y, x + LIFT_WIDTH, y + lift_height, fill="lightgreen")
+        cars.append((item, track))
+
+    icons = []
+    for icon in timeline["icons"]:
+        x, y = icon["track"]["points"][0]
+        item = canvas.create_image(x, y, image=PERSON_IMG)
+        icons.append((item, icon))
+
+    player = {"canvas": canvas,
+              "timeline": timeline,
+              "lift_height": lift_height,
+              "cars": cars,
+              "icons": icons,
+              "t": 0.0,
+              "speed": 1.0,
+              "paused": False,
+              "last_tick": None,
+              "drawn": {},          # item -> last coords/state sent to Tk, so unchanged items are skipped
+              "finished": False,
+              "on_frame": None}     # called with the playback time after each frame (e.g. to move a slider)
+    return player
+
+
+def render(player, t):
+    """Put every car and icon where the timeline says it is at time t."""
+    canvas = player["canvas"]
+    drawn = player["drawn"]
+    lift_height = player["lift_height"]
+
+    for item, track in player["cars"]:
+        x, y = position_at(track, t)
+        coords = (x, y, x + LIFT_WIDTH, y + lift_height)
+        if drawn.get(item) != coords:
+            canvas.coords(item, *coords)
+            drawn[item] = coords
+
+    for item, icon in player["icons"]:
+        visible = icon["appear"] <= t and (icon["vanish"] is None or t < icon["vanish"])
+        state = "normal" if visible else "hidden"
+        if drawn.get((item, "state")) != state:
+            canvas.itemconfigure(item, state=state)
+            drawn[(item, "state")] = state
+        if visible:
+            coords = position_at(icon["track"], t)
+            if drawn.get(item) != coords:
+                canvas.coords(item, *coords)
+                drawn[item] = coords
+
+
+def tick(player):
+    now = perf_counter()
+    duration = player["timeline"]["duration"]
+    if not player["paused"] and player["last_tick"] is not None:
+        player["t"] = min(duration, player["t"] + (now - player["last_tick"]) * player["speed"])
+    player["last_tick"] = now
+
+    render(player, player["t"])
+    if player["on_frame"]:
+        player["on_frame"](player["t"])
+
+    if player["t"] >= duration and not player["finished"]:
+        player["finished"] = True
+        print("Simulation finished.")
 
-def lift_passenger_slots(floor_y, num):
-    """Return horizontal x positions for N passengers inside lift (max 5)."""
-    base_x = 110 + 10
-    spacing = (LIFT_WIDTH - 20) // max(1, num)
-    xs = [base_x + i * spacing for i in range(num)]
-    y = floor_y + LIFT_HEIGHT // 2
-    return [(x, y) for x in xs]
-
-
-def animate_move(canvas, lift_car, start_floor, end_floor, lift_passengers, callback):
-    start_y = FLOOR_Y[start_floor]
-    end_y = FLOOR_Y[end_floor]
-
-    total_steps = 30
-    dy = (end_y - start_y) / total_steps
-    step = 0
-
-    def tick():
-        nonlocal step
-        if step < total_steps:
-            # Move the elevator car
-            canvas.move(lift_car, 0, dy)
-
-            # Move passengers IN the elevator
-            for icon in lift_passengers:
-                canvas.move(icon, 0, dy)
-
-            step += 1
-            canvas.after(20, tick)
-        else:
-            # Snap into final position
-            canvas.coords(lift_car, 110, end_y, 190, end_y + LIFT_HEIGHT)
-
-            # Snap passengers to correct y positions too
-            coords = canvas.coords(lift_car)
-            fy = coords[1]  # top y of lift
-            y_center = fy + LIFT_HEIGHT // 2
-
-            for icon in lift_passengers:
-                x, _ = canvas.coords(icon)
-                canvas.coords(icon, x, y_center)
-
-            callback()
+    player["canvas"].after(FRAME_MS, tick, player)
 
-    tick()
 
+def set_speed(player, speed):
+    player["speed"] = max(1.0, min(100.0, float(speed)))
 
 
-def animate_icon(canvas, icon, x_target, y_target, callback=None):
-    """Generic smooth mover for PNG passengers."""
-    x0, y0 = canvas.coords(icon)
-    steps = 20
-    dx = (x_target - x0) / steps
-    dy = (y_target - y0) / steps
-    step = 0
+def toggle_pause(player):
+    player["paused"] = not player["paused"]
 
-    def tick():
-        nonlocal step
-        if step < steps:
-            canvas.move(icon, dx, dy)
-            step += 1
-            canvas.after(15, tick)
-        else:
-            canvas.coords(icon, x_target, y_target)
-            if callback:
-                callback()
 
-    tick()
+def seek(player, t):
+    player["t"] = max(0.0, min(player["timeline"]["duration"], float(t)))
+    player["finished"] = player["t"] >= player["timeline"]["duration"]
 
 
-def run_events(canvas, lift_car, events, waiting_passengers, lift_passengers, idx=0):
-    if idx >= len(events):
-        return
+def add_controls(root, player):
+    """Pause button, 1x-100x speed slider and a seek bar. Space pauses, arrow keys jump a second."""
+    bar = tk.Frame(root)
+    bar.pack(fill="x")
 
-    ev = events[idx]
-    etype = ev[0]
+    pause = tk.Button(bar, text="Pause", width=6)
+    def on_pause():
+        toggle_pause(player)
+        pause.config(text="Play" if player["paused"] else "Pause")
+    pause.config(command=on_pause)
+    pause.pack(side="left")
 
-    # ---- MOVE EVENT ----
-    if etype == "MOVE":
-        target_floor = ev[1]
+    speed = tk.Scale(bar, from_=1, to=100, orient="horizontal", label="Speed x",
+                     command=lambda v: set_speed(player, v))
+    speed.pack(side="left")
 
-        # detect current floor by lift Y
-        y_current = canvas.coords(lift_car)[1]
-        current_floor = min(FLOOR_Y.keys(), key=lambda f: abs(FLOOR_Y[f] - y_current))
+    position = tk.DoubleVar(value=0.0)
+    dragging = {"active": False}
+    seek_bar = tk.Scale(bar, from_=0, to=player["timeline"]["duration"], resolution=0.01, orient="horizontal",
+                        label="Time", variable=position, showvalue=False, length=200)
+    seek_bar.bind("<ButtonPress-1>", lambda e: dragging.update(active=True))
+    seek_bar.bind("<ButtonRelease-1>", lambda e: (dragging.update(active=False), seek(player, position.get())))
+    seek_bar.bind("<B1-Motion>", lambda e: seek(player, position.get()))
+    seek_bar.pack(side="left", fill="x", expand=True)
 
-        animate_move(
-            canvas,
-            lift_car,
-            current_floor,
-            target_floor,
-            lift_passengers,
-            callback=lambda: run_events(canvas, lift_car, events, waiting_passengers, lift_passengers, idx+1)
-        )
+    # follow playback unless the user is holding the slider
+    def on_frame(t):
+        if not dragging["active"]:
+            position.set(t)
+    player["on_frame"] = on_frame
 
-        return
+    root.bind("<space>", lambda e: on_pause())
+    root.bind("<Left>", lambda e: seek(player, player["t"] - 1))
+    root.bind("<Right>", lambda e: seek(player, player["t"] + 1))
 
-    # ---- PICKUP EVENT ----
-    if etype == "PICKUP":
-        floor, count = ev[1], ev[2]
 
-        def continue_after_pickups():
-            run_events(canvas, lift_car, events, waiting_passengers, lift_passengers, idx+1)
+def replay(car_events, layout=None, start_floors=None, title="Elevator Simulation", start=None):
+    """Open a window replaying one parsed event list per car. Playback time 0 is the events' time `start`."""
+    if layout is None:
+        layout = create_layout(num_cars=len(car_events))
+    timeline = build_timeline(car_events, layout, start_floors, start)
 
-        if count == 0:
-            continue_after_pickups()
-            return
-
-        # Animate each pickup sequentially
-        def animate_one_pickup(n_remaining):
-            if n_remaining == 0:
-                canvas.after(200, continue_after_pickups)
-                return
+    root = tk.Tk()
+    root.title(title)
 
-            if waiting_passengers[floor]:
-                icon = waiting_passengers[floor].pop(0)
+    canvas = tk.Canvas(root, width=layout["width"], height=layout["height"], bg="lightgrey")
+    canvas.pack()
 
-                lift_coords = canvas.coords(lift_car)
-                lift_y = lift_coords[1]
+    load_images(canvas)
+    draw_static_building(canvas, layout)
 
-                target_positions = lift_passenger_slots(lift_y, len(lift_passengers) + 1)
-                x_target, y_target = target_positions[-1]
+    player = create_player(canvas, timeline, layout)
+    add_controls(root, player)
+    tick(player)
 
-                def after_move():
-                    lift_passengers.append(icon)
-                    animate_one_pickup(n_remaining - 1)
+    root.mainloop()
 
-                animate_icon(canvas, icon, x_target, y_target, callback=after_move)
-            else:
-                animate_one_pickup(n_remaining - 1)
 
-        animate_one_pickup(count)
+def log_replay(path, start=None, end=None):
+    """(car_events, layout, start_floors) for the part of a binary run log (see elevator_log) between
+    start and end seconds, or None if nothing happens there. Each car in the log gets its own shaft,
+    starting from wherever it was at `start`."""
+    from elevator_log import open_log, time_slice, parse_log, floor_at
+    log = open_log(path)
+    records = time_slice(log, start, end)
+    cars = sorted(set(records["car"].tolist()))
+    if not cars:
+        return None
+
+    car_events = [parse_log(log, start, end, car) for car in cars]
+    start_floors = [floor_at(log, start, car) if start is not None else 0 for car in cars]
+    # tall enough for the floors this part of the log visits, without reading the rest of the mmap
+    num_floors = max(4, int(records["floor"].max()) + 1, max(start_floors) + 1)
+    return car_events, create_layout(num_floors, len(cars)), start_floors
+
+
+def replay_log(path, start=None, end=None):
+    """Replay a binary run log, or the part of it between start and end seconds. Playback runs on
+    the log's time column from `start`, so the cars keep their real positions relative to each other."""
+    replay_args = log_replay(path, start, end)
+    if replay_args is None:
+        print("No events in that part of the log")
         return
+    replay(*replay_args, title=f"Elevator Simulation - {path}", start=start)
 
 
-    # ---- DROPOFF EVENT ----
-    if etype == "DROPOFF":
-        floor, count = ev[1], ev[2]
-
-        for _ in range(count):
-            if lift_passengers:
-                icon = lift_passengers.pop()
-
-                x_exit = 250
-                y_exit = FLOOR_Y[floor] + 15
-
-                animate_icon(canvas, icon, x_exit, y_exit, callback=lambda: canvas.delete(icon))
-
-        canvas.after(300, lambda: run_events(canvas, lift_car, events, waiting_passengers, lift_passengers, idx+1))
-        return
-
-    # ---- FINISHED ----
-    if etype == "FINISHED":
-        print("Simulation finished.")
-        canvas.after(500, canvas.winfo_toplevel().destroy)
+def main():
+    # python elevator_frontend.py [run.log [start=T] [end=T]]
+    import sys
+    if len(sys.argv) > 1:
+        from schindler import parse_options
+        options = parse_options(sys.argv[2:])
+        replay_log(sys.argv[1], float(options["start"]) if "start" in options else None,
+                   float(options["end"]) if "end" in options else None)
         return
 
-
-
-def main():
-    record = lift(
+    stream = lift_events(
             current_floor=0,
             onboard_passengers=1,
             direction=1,
@@ -240,29 +218,12 @@ def main():
             offboard_passengers=3,        # three people waiting
             pick_up_floors=[1, 1, 2],     # two wait at floor 1, one at floor 2
             pick_up_destinations=[3, 0, 1],  # their destinations
-            return_record=True
         )
 
 
-    events = parse_record(record)
-
-    root = tk.Tk()
-    root.title("Elevator Simulation")
-
-    canvas = tk.Canvas(root, width=300, height=450, bg="lightgrey")
-    canvas.pack()
+    events = parse_events(stream)
 
-    load_images(canvas)
-    draw_static_building(canvas)
-
-    lift_car = draw_lift(canvas, 0)
-
-    waiting = draw_waiting_passengers(canvas, events)
-    passengers = []
-
-    run_events(canvas, lift_car, events, waiting, passengers)
-
-    root.mainloop()
+    replay([events])
 
 
 if __name__ == "__main__":
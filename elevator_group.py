@@ -0,0 +1,167 @@
+# elevator_group.py
+
+import numpy as np
+from schindler import (create_building, create_lift, index_requests, add_passenger, Passenger,
+                       find_next_move, lift_update, DropOffEvent, PickUpEvent)
+
+
+def create_group(num_cars, building=None, start_floors=None):
+    """A bank of cars sharing one clock. Position, direction and load live in arrays across cars."""
+    if building is None:
+        building = create_building()
+    if start_floors is None:
+        start_floors = [0] * num_cars
+
+    cars = []
+    for floor in start_floors:
+        car = create_lift(floor, 0, 1, 0, [], 0, [], [], building)
+        cars.append(index_requests(car))
+
+    group = {"building": building,
+             "cars": cars,                                   # per-car request indexes, same LiftState lift() uses
+             "position": np.array(start_floors, dtype=np.int64),
+             "direction": np.ones(num_cars, dtype=np.int64),
+             "load": np.zeros(num_cars, dtype=np.int64),
+             "target": np.full(num_cars, -1, dtype=np.int64),   # -1 means decide again at the next tick
+             "reach": np.array(start_floors, dtype=np.int64),   # furthest stop ahead before the car turns
+             "busy": np.zeros(num_cars, dtype=bool),
+             "waiting": 0,
+             "time": {"total_time": 0, "onboard_waiting_time": 0, "offboard_waiting_time": 0}
+             }
+    return group
+
+
+def update_reach(group, c):
+    # the last stop the car will make before reversing, or its position if it has nothing to do
+    car = group["cars"][c]
+    stops = car.drop_off_index + car.pick_up_index
+    group["busy"][c] = bool(stops)
+    if not stops:
+        group["reach"][c] = group["position"][c]
+    elif group["direction"][c] == 1:
+        group["reach"][c] = max(max(stops), group["position"][c])
+    else:
+        group["reach"][c] = min(min(stops), group["position"][c])
+
+
+def call_costs(group, floors):
+    """Cost for every car to reach every floor in floors, as a (cars, floors) array.
+
+    Uses the same rules as find_next_move: a call ahead of the car in its direction is picked up
+    on the way if lift_has_space would allow it, otherwise the car finishes its sweep and comes back.
+    """
+    pos = group["position"][:, None]
+    reach = group["reach"][:, None]
+    up = (group["direction"] == 1)[:, None]
+    has_space = (group["load"] < group["building"]["capacity"])[:, None]
+    idle = ~group["busy"][:, None]
+    floors = np.asarray(floors, dtype=np.int64)[None, :]
+
+    ahead = np.where(up, floors > pos, floors < pos)
+    direct = np.abs(floors - pos)
+    detour = np.abs(reach - pos) + np.abs(reach - floors)
+
+    costs = np.where(idle | (ahead & has_space), direct, detour)
+    # a full car has to drop someone off before it can take the call
+    costs += np.where(has_space, 0, group["building"]["num_floors"])
+    return costs
+
+
+def assign_call(group, origin, destination):
+    """Give a hall call to the cheapest car, returning the car's index, or None for a call to the
+    floor it was made from, which nobody needs a lift for (as in elevator_simulation)."""
+    # a rider for the floor the car is standing on would never be let off, find_next_move looks past it
+    if origin == destination:
+        return None
+    c = int(np.argmin(call_costs(group, [origin])[:, 0]))
+    car = group["cars"][c]
+
+    add_passenger(car, Passenger(None, origin, destination, group["time"]["total_time"]))
+    group["waiting"] += 1
+
+    # the new call may be on the way, so let the car decide again
+    group["target"][c] = -1
+    update_reach(group, c)
+    return c
+
+
+def serve_floor(group, c, floor, events):
+    # drop off and pick up at the car's floor, keeping the arrays in step with the car state
+    car = group["cars"][c]
+    departures = car.drop_off_counts[floor]
+    offboarders = car.pick_up_counts[floor]
+    car.onboard_passengers = int(group["load"][c])
+    car.clock = group["time"]["total_time"]
+    lift_update(car, floor)
+
+    group["load"][c] = car.onboard_passengers
+    group["waiting"] -= offboarders
+    group["target"][c] = -1
+    update_reach(group, c)
+
+    clock = group["time"]["total_time"]
+    if departures:
+        events.append((int(c), DropOffEvent(floor, departures, clock)))
+    if offboarders:
+        events.append((int(c), PickUpEvent(floor, offboarders, clock)))
+
+
+def step_group(group):
+    """Advance every car one floor on the shared clock. Returns (car, event) pairs for stops made."""
+    events = []
+    cars = group["cars"]
+    position, direction, target = group["position"], group["direction"], group["target"]
+
+    # cars without a target pick their next stop with the single car greedy rules
+    for c in np.flatnonzero(target < 0):
+        car = cars[c]
+        floor = int(position[c])
+        # find_next_move only looks past the current floor, so serve a stopped car's own floor first
+        if car.drop_off_counts[floor] or car.pick_up_counts[floor]:
+            serve_floor(group, c, floor, events)
+        car.current_floor = floor
+        car.direction = int(direction[c])
+        next_move = find_next_move(car)
+        direction[c] = car.direction
+        if next_move is not None:
+            target[c] = next_move
+
+    moving = target >= 0
+    if not moving.any():
+        return events
+
+    position += np.sign(target - position) * moving
+
+    time = group["time"]
+    time["total_time"] += 1
+    time["onboard_waiting_time"] += int(group["load"].sum())
+    time["offboard_waiting_time"] += group["waiting"]
+
+    for c in np.flatnonzero(moving & (position == target)):
+        serve_floor(group, c, int(target[c]), events)
+    return events
+
+
+def run_group(group, pick_up_floors, pick_up_destinations):
+    """Assign every hall call, then run the bank until all cars are idle. Returns the time totals.
+    Calls whose destination is their own floor are dropped."""
+    for origin, destination in zip(pick_up_floors, pick_up_destinations):
+        assign_call(group, origin, destination)
+
+    while group["busy"].any():
+        clock = group["time"]["total_time"]
+        step_group(group)
+        # nothing moved, whatever is left can't be reached by the greedy rules
+        if group["time"]["total_time"] == clock:
+            break
+    return group["time"]
+
+
+def main():
+    group = create_group(4, create_building(num_floors=20, capacity=8), start_floors=[0, 0, 10, 19])
+    time = run_group(group, [0, 0, 5, 12, 19, 3, 15], [10, 19, 0, 2, 0, 18, 1])
+    print(time)
+
+
+if __name__ == "__main__":
+    main()
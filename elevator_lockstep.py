@@ -0,0 +1,425 @@
+# elevator_lockstep.py
+
+# lift() for thousands of small scenarios at once. Each scenario is one row of NumPy arrays:
+# floor, direction, load, per-floor drop-off counts, waiting passengers by (origin, destination),
+# and bit masks of the floors with requests. Every step makes one greedy decision for every row
+# with masked array operations, the same rules as find_next_move, and moves those cars to their
+# next stop. A row whose car has nowhere left to go is finished for good; finished rows are
+# dropped from the arrays once they are half of them, so the tail of long scenarios runs on
+# small arrays.
+#
+# The time totals match run_scenario exactly, motion model included (same floating point
+# operations in the same order). Only greedy is vectorised; scenarios with another "policy", or
+# buildings too tall for a 64 bit floor mask, are run by elevator_batch.run_scenario instead.
+#
+# main()'s benchmark (10 floors, 20 calls) runs at a median of about 100k scenarios/s end to end,
+# 75-115k between runs on a noisy machine. Stepping is about a quarter of that; reading the
+# scenario dicts into columns and validating them is most of the rest.
+
+import gc
+import sys
+from contextlib import contextmanager
+import numpy as np
+from schindler import create_building, parse_options
+from elevator_validation import scenario_columns, validate_columns, readable_columns
+
+MAX_FLOORS = 62             # floor masks are int64, and floor + 1 must still shift
+TABLE_FLOORS = 16           # masks this wide find their stops in a lookup table rather than by bit arithmetic
+WAITING_BUDGET = 1 << 25    # cells of the (rows, floors, floors) waiting array per block
+
+ONE = np.int64(1)
+TIME_KEYS = ("total_time", "onboard_waiting_time", "offboard_waiting_time", "initial_passenger_time")
+
+
+def lockstep_policy(scenario):
+    return scenario.get("policy", "greedy") in ("greedy", "cached")
+
+
+def building_arrays(buildings):
+    """Travel table and stop costs for each distinct building, flattened so rows can index them.
+    A building without a motion model gets a table of floor distances and free stops, which is
+    exactly the one second per floor update_time uses."""
+    tables, base = [], 0
+    columns = {"base": [], "num_floors": [], "capacity": [], "door_open": [], "door_close": [], "boarding": [], "motion": []}
+    for building in buildings:
+        n = building["num_floors"]
+        motion = building.get("motion")
+        if motion is None:
+            floors = np.arange(n)
+            tables.append(np.abs(floors[:, None] - floors[None, :]).ravel().astype(np.float64))
+            door_open = door_close = boarding = 0.0
+        else:
+            tables.append(np.frombuffer(motion["table"], dtype=np.float64))
+            door_open, door_close, boarding = motion["door_open"], motion["door_close"], motion["boarding"]
+        for key, value in (("base", base), ("num_floors", n), ("capacity", building["capacity"]),
+                           ("door_open", door_open), ("door_close", door_close), ("boarding", boarding),
+                           ("motion", motion is not None)):
+            columns[key].append(value)
+        base += n * n
+    arrays = {key: np.array(values) for key, values in columns.items()}
+    arrays["table"] = np.concatenate(tables)
+    return arrays
+
+
+def distinct_buildings(scenarios):
+    # each scenario's building as an index into the list of distinct ones, default building included
+    default = create_building()
+    buildings, index, seen = [], [], {}
+    for scenario in scenarios:
+        building = scenario.get("building") or default
+        if id(building) not in seen:
+            seen[id(building)] = len(buildings)
+            buildings.append(building)
+        index.append(seen[id(building)])
+    return buildings, np.array(index, dtype=np.int64)
+
+
+def select_rows(columns, keep):
+    """scenario_columns for only the scenarios where keep is True."""
+    renumber = np.cumsum(keep) - 1
+    selected = {}
+    for key, column in columns.items():
+        if isinstance(column, tuple):
+            values, owner, index, lengths = column
+            mask = keep[owner]
+            selected[key] = (values[mask], renumber[owner[mask]], index[mask], lengths[keep])
+        else:
+            selected[key] = column[keep]
+    return selected
+
+
+def load_block(columns, info, b):
+    """Array state for valid scenarios' columns (from scenario_columns), one row each. b is each
+    row's building in info (from building_arrays)."""
+    k = len(b)
+    width = int(info["num_floors"][np.unique(b)].max()) if k else 1
+
+    drop_floors, drop_owner, _, _ = columns["drop_off_floors"]
+    origins, pick_owner, _, _ = columns["pick_up_floors"]
+    destinations = columns["pick_up_destinations"][0]
+
+    drop = np.bincount(drop_owner * width + drop_floors, minlength=k * width).reshape(k, width).astype(np.int32)
+    waiting = np.bincount((pick_owner * width + origins) * width + destinations,
+                          minlength=k * width * width).reshape(k, width, width).astype(np.int32)
+    pick = np.bincount(pick_owner * width + origins, minlength=k * width).reshape(k, width).astype(np.int32)
+
+    # destinations waiting at each (row, origin): OR the bits of the occupied cells, which come sorted by group
+    cells = np.flatnonzero(waiting)
+    group = cells // width
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if len(cells) else cells
+    destination_mask = np.zeros(k * width, dtype=np.int64)
+    destination_mask[group[starts]] = np.bitwise_or.reduceat(ONE << (cells % width), starts) if len(cells) else 0
+
+    state = {"row": np.arange(k),
+             "floor": columns["current_floor"].copy(),
+             "direction": columns["direction"].copy(),
+             "onboard": columns["onboard_passengers"].copy(),
+             "offboard": columns["pick_up_floors"][3].copy(),  # index_requests recounts from the list
+             "initial": columns["drop_off_floors"][3].copy(),
+             "drop": drop,
+             "initial_counts": drop.copy(),                   # everyone on board at the start is an initial passenger
+             "pick": pick,
+             "waiting": waiting,                              # waiting[row, origin, destination], as called
+             "drop_mask": floor_mask(drop),
+             "pick_mask": floor_mask(pick),
+             "destination_mask": destination_mask.reshape(k, width)}
+    for key in ("base", "num_floors", "capacity", "door_open", "door_close", "boarding"):
+        state[key] = info[key][b]
+    for key in TIME_KEYS:
+        state[key] = np.zeros(k)
+    return state
+
+
+def floor_mask(counts):
+    # bit f set where counts[:, f] is non-zero
+    bits = ONE << np.arange(counts.shape[1], dtype=np.int64)
+    return ((counts > 0) * bits).sum(axis=1)
+
+
+def bit_tables(bits):
+    # lowest and highest set bit of every mask of `bits` floors, so small buildings look them up
+    masks = np.arange(1 << bits, dtype=np.int64)
+    return lowest_bit(masks).astype(np.int8), highest_bit(masks).astype(np.int8)
+
+
+def lowest_bit(x):
+    # index of the lowest set bit, -1 for 0. x & -x is a power of two, exact as a float
+    bit = np.frexp((x & -x).astype(np.float64))[1] - 1
+    return np.where(x > 0, bit, -1)
+
+
+def highest_bit(x):
+    # index of the highest set bit, -1 for 0. float(x) can round up to the next power of two,
+    # in which case frexp's exponent is one too high and x >> bit is 0
+    safe = np.maximum(x, 1)
+    bit = np.frexp(safe.astype(np.float64))[1] - 1
+    bit -= (safe >> bit) == 0
+    return np.where(x > 0, bit, -1)
+
+
+LOWEST_BIT, HIGHEST_BIT = bit_tables(TABLE_FLOORS)
+
+
+def nearest_requests(mask, above, below):
+    """Vectorised nearest_request both ways: the closest floor with a request strictly above and
+    strictly below each row's floor, -1 where there isn't one. above and below are the masks of
+    the floors past the current floor each way."""
+    if len(LOWEST_BIT) > mask.max():
+        return LOWEST_BIT[mask & above], HIGHEST_BIT[mask & below]
+    return lowest_bit(mask & above), highest_bit(mask & below)
+
+
+def ahead(up_floor, down_floor, direction):
+    # the one in the direction of travel, 1 up and 0 down; nearest_request finds nothing for any other direction
+    return np.where(direction == 1, up_floor, np.where(direction == 0, down_floor, -1))
+
+
+def next_moves(state):
+    """find_next_move for every row at once, turning rows with nothing ahead. -1 means finished."""
+    floor, direction = state["floor"], state["direction"]
+    below = (ONE << floor) - 1
+    above = ~(below | (ONE << floor))
+    drop_up, drop_down = nearest_requests(state["drop_mask"], above, below)
+    pick_up_up, pick_up_down = nearest_requests(state["pick_mask"], above, below)
+    drop_off = ahead(drop_up, drop_down, direction)
+    pick_up = ahead(pick_up_up, pick_up_down, direction)
+
+    # nothing either way ahead: turn round and look again
+    turn = (drop_off < 0) & (pick_up < 0)
+    if turn.any():
+        direction[turn] = 1 - direction[turn]
+        drop_off = np.where(turn, ahead(drop_up, drop_down, direction), drop_off)
+        pick_up = np.where(turn, ahead(pick_up_up, pick_up_down, direction), pick_up)
+
+    # pick up on the way to the drop off if there is space, same test as pick_up_on_way
+    on_way = np.where(direction == 1, pick_up <= drop_off, drop_off <= pick_up)
+    detour = (pick_up >= 0) & on_way & (state["onboard"] < state["capacity"])
+    return np.where(drop_off >= 0, np.where(detour, pick_up, drop_off), pick_up)
+
+
+def row_cells(rows, width):
+    # flat indexes of every cell in the given rows of a (k, width) array
+    return (rows[:, None] * width + np.arange(width)).ravel()
+
+
+def step(state, table, motion=True):
+    """One decision and move for every row, as update_time then lift_update. Returns which rows moved.
+    motion=False skips the stop costs, which are all zero when no row has a motion model."""
+    next_move = next_moves(state)
+    moving = next_move >= 0
+    everyone = bool(moving.all())
+    if everyone:
+        # every row moves: whole array operations instead of gathers and scatters
+        rows, r, n = np.arange(len(moving)), slice(None), next_move
+    else:
+        rows = np.flatnonzero(moving)
+        if not len(rows):
+            return moving
+        r, n = rows, next_move[rows]
+    width = state["drop"].shape[1]
+    cell = rows * width + n                     # (row, n) in the flattened per-floor arrays
+    drop, pick = state["drop"].reshape(-1), state["pick"].reshape(-1)
+    departures, boarders = drop[cell], pick[cell]
+
+    # update_time: one table lookup, the doors, and everyone getting off and on
+    time_taken = table[state["base"][r] + state["floor"][r] * state["num_floors"][r] + n]
+    if motion:
+        time_taken += state["door_open"][r]
+        time_taken += state["door_close"][r]
+        time_taken += state["boarding"][r] * (departures + boarders)
+    state["total_time"][r] += time_taken
+    state["onboard_waiting_time"][r] += time_taken * state["onboard"][r]
+    state["offboard_waiting_time"][r] += time_taken * state["offboard"][r]
+    state["initial_passenger_time"][r] += time_taken * state["initial"][r]
+
+    # process_drop_offs: everyone riding to n gets off
+    cleared = ~(ONE << n)
+    state["onboard"][r] -= departures
+    drop[cell] = 0
+    state["drop_mask"][r] &= cleared
+    initial_counts = state["initial_counts"].reshape(-1)
+    state["initial"][r] -= initial_counts[cell]
+    initial_counts[cell] = 0
+
+    # process_pick_ups: everyone waiting at n boards, their destinations become drop offs
+    b = np.flatnonzero(boarders)
+    if len(b):
+        rb, cb = rows[b], cell[b]
+        # a floor's waiting row is left as it is once everyone has boarded, pick is what says they have
+        waiting = state["waiting"].reshape(len(drop), width)
+        if everyone and len(b) * 2 > len(rows):
+            riders = np.take(waiting, cell, axis=0)
+            riders[boarders == 0] = 0
+            state["drop"] += riders
+        else:
+            drop[row_cells(rb, width)] += np.take(waiting, cb, axis=0).ravel()
+        pick[cb] = 0
+        destination_mask = state["destination_mask"].reshape(-1)
+        state["pick_mask"][rb] &= cleared[b]
+        state["drop_mask"][rb] |= destination_mask[cb]
+        destination_mask[cb] = 0
+        state["onboard"][rb] += boarders[b]
+        state["offboard"][rb] -= boarders[b]
+
+    state["floor"][r] = n
+    return moving
+
+
+def run_block(state, table, motion=True):
+    """Step until every row is finished. Returns the time totals by row, in load order."""
+    k = len(state["row"])
+    totals = {key: np.zeros(k) for key in TIME_KEYS}
+    while len(state["row"]):
+        moving = step(state, table, motion)
+        # rows that didn't move never will, retire them once they are half the arrays
+        if np.count_nonzero(moving) * 2 <= len(moving):
+            done = state["row"][~moving]
+            for key in TIME_KEYS:
+                totals[key][done] = state[key][~moving]
+            state = {key: value[moving] for key, value in state.items()}
+    return totals
+
+
+def simulate_columns(columns, buildings, building_index):
+    """Time totals for valid, greedy scenarios' columns, as arrays in row order, plus which rows
+    have a motion model (see time_dicts)."""
+    info = building_arrays(buildings)
+    width = int(info["num_floors"][np.unique(building_index)].max()) if len(building_index) else 1
+    if width > MAX_FLOORS:
+        raise ValueError(f"The lockstep engine handles at most {MAX_FLOORS} floors")
+
+    # blocks small enough for the waiting array, the rest of the state is a few arrays of k
+    rows = max(1, WAITING_BUDGET // (width * width))
+    k = len(building_index)
+    totals = {key: np.zeros(k) for key in TIME_KEYS}
+    for i in range(0, k, rows):
+        keep = np.zeros(k, dtype=bool)
+        keep[i:i + rows] = True
+        block = columns if rows >= k else select_rows(columns, keep)
+        for key, values in run_block(load_block(block, info, building_index[keep]), info["table"], bool(info["motion"].any())).items():
+            totals[key][keep] = values
+    return totals, info["motion"][building_index]
+
+
+def simulate(scenarios):
+    """Time totals for a list of valid, greedy scenarios of at most MAX_FLOORS floors, as arrays in input order.
+    Skips validation: the fastest way in when the scenarios are known to be good."""
+    buildings, building_index = distinct_buildings(scenarios)
+    return simulate_columns(scenario_columns(scenarios), buildings, building_index)
+
+
+def time_dicts(totals, has_motion):
+    """run_scenario's time dict for every row. The scalar engine's totals start as ints and only
+    become floats once a motion model move is added, so rows without one, or that never moved, get ints."""
+    def rows(totals):
+        return [{"total_time": a, "onboard_waiting_time": b, "offboard_waiting_time": c, "initial_passenger_time": d}
+                for a, b, c, d in zip(*(totals[key].tolist() for key in TIME_KEYS))]
+
+    floats = has_motion & (totals["total_time"] > 0)
+    if floats.all():
+        return rows(totals)
+    ints = rows({key: values.astype(np.int64) for key, values in totals.items()})
+    if not floats.any():
+        return ints
+    return [time if motion else whole for time, whole, motion in zip(rows(totals), ints, floats.tolist())]
+
+
+@contextmanager
+def collector_paused():
+    # a chunk allocates a dict or list per scenario and nothing that can form a cycle, and every
+    # cyclic collection those allocations set off walks the whole batch of scenario dicts (a sixth
+    # of main()'s benchmark). Never held across a yield, so callers keep their collector
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def chunk_times(chunk, columns):
+    """Each scenario's violations and, for the valid greedy ones the arrays can run, its time dict (None otherwise)."""
+    violations = validate_columns(columns)
+    buildings, building_index = distinct_buildings(chunk)
+
+    floors_ok = np.array([b["num_floors"] <= MAX_FLOORS for b in buildings])[building_index]
+    vector = np.fromiter((not found and lockstep_policy(scenario) for scenario, found in zip(chunk, violations)),
+                         dtype=bool, count=len(chunk)) & floors_ok
+    times = [None] * len(chunk)
+    if vector.any():
+        selected = columns if vector.all() else select_rows(columns, vector)
+        totals, has_motion = simulate_columns(selected, buildings, building_index[vector])
+        if vector.all():
+            times = time_dicts(totals, has_motion)
+        else:
+            for i, time in zip(np.flatnonzero(vector).tolist(), time_dicts(totals, has_motion)):
+                times[i] = time
+    return violations, times
+
+
+def iter_lockstep(scenarios, block=65536):
+    """Yield one result per scenario, in order, in the same form as elevator_batch.run_scenario.
+
+    latency and metrics are None: the arrays only keep the time totals. Invalid scenarios come
+    back with every violation, as with elevator_batch's validate=True.
+    """
+    from itertools import islice
+    from elevator_batch import run_scenario, error_result
+
+    scenarios = iter(scenarios)
+    while True:
+        chunk = list(islice(scenarios, block))
+        if not chunk:
+            return
+        with collector_paused():
+            columns, readable, unreadable = readable_columns(chunk)
+        if unreadable:
+            # rare: the readable ones go through again on their own, the rest are errors in place
+            results = iter_lockstep([chunk[k] for k in readable], block)
+            for k in range(len(chunk)):
+                yield error_result(unreadable[k].message, [unreadable[k]]) if k in unreadable else next(results)
+            continue
+        with collector_paused():
+            violations, times = chunk_times(chunk, columns)
+            results = [{"time": time, "latency": None, "metrics": None, "error": None} if time is not None else None
+                       for time in times]
+
+        for scenario, found, result in zip(chunk, violations, results):
+            if result is not None:
+                yield result
+            elif found:
+                yield error_result(found[0].message, found)
+            else:
+                yield run_scenario(scenario)
+
+
+def run_lockstep(scenarios, block=65536):
+    return list(iter_lockstep(scenarios, block))
+
+
+def main():
+    # python elevator_lockstep.py [count=100000] [calls=20] [floors=10] [capacity=8] [profile=lunch] [seed=0] [check=1000]
+    from time import perf_counter
+    from elevator_traffic import traffic_scenarios
+    from elevator_batch import run_scenario
+
+    options = parse_options(sys.argv[1:])
+    count = int(options.get("count", 100000))
+    scenarios = list(traffic_scenarios(options.get("profile", "lunch"), int(options.get("floors", 10)),
+                                       int(options.get("calls", 20)), count, int(options.get("capacity", 8)),
+                                       seed=int(options.get("seed", 0))))
+
+    start = perf_counter()
+    results = run_lockstep(scenarios)
+    elapsed = perf_counter() - start
+    print(f"{count} scenarios in {elapsed:.3f}s, {count / elapsed:,.0f} per second")
+
+    # spot check against the scalar engine
+    check = min(count, int(options.get("check", 1000)))
+    mismatches = sum(run_scenario(s)["time"] != r["time"] for s, r in zip(scenarios[:check], results[:check]))
+    print(f"{check - mismatches}/{check} match run_scenario")
+
+
+if __name__ == "__main__":
+    main()
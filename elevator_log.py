@@ -0,0 +1,211 @@
+# elevator_log.py
+
+# Binary run logs: one fixed-width record per event in a NumPy structured dtype, after a short
+# header. Writers buffer records in an array and append them to the file in bulk; readers
+# memory-map the file, so opening a log of millions of events reads nothing until it is used.
+# Records are written in time order, which makes the time column its own index: jumping to
+# time T is a binary search that only touches a handful of pages.
+
+import sys
+import numpy as np
+
+MAGIC = b"LIFTLOG1"
+
+EVENT_DTYPE = np.dtype([("time", "<f8"),
+                        ("floor", "<i4"),
+                        ("count", "<i4"),       # passengers for PICKUP/DROPOFF, onboard for LOAD/FINISHED
+                        ("car", "<u2"),
+                        ("kind", "u1"),
+                        ("pad", "u1")])         # keeps records 20 bytes
+
+MOVE, DROPOFF, PICKUP, LOAD, FINISHED = range(5)
+KIND_NAMES = ("MOVE", "DROPOFF", "PICKUP", "LOAD", "FINISHED")
+KINDS = {name: kind for kind, name in enumerate(KIND_NAMES)}
+
+
+def create_log_writer(path, buffer_size=65536):
+    f = open(path, "wb")
+    f.write(MAGIC)
+    writer = {"file": f,
+              "buffer": np.zeros(buffer_size, dtype=EVENT_DTYPE),
+              "used": 0,
+              "written": 0}
+    return writer
+
+
+def flush_log(writer):
+    used = writer["used"]
+    if used:
+        writer["buffer"][:used].tofile(writer["file"])
+        writer["written"] += used
+        writer["used"] = 0
+
+
+def log_event(writer, kind, time, floor, count=0, car=0):
+    buffer = writer["buffer"]
+    i = writer["used"]
+    buffer[i] = (time, floor, count, car, kind, 0)
+    writer["used"] = i + 1
+    if i + 1 == len(buffer):
+        flush_log(writer)
+
+
+def close_log(writer):
+    """Flush and close. Returns the number of events written."""
+    flush_log(writer)
+    writer["file"].close()
+    return writer["written"]
+
+
+def write_events(events, path, car=0):
+    """Write a lift_events() stream (typed events) to a binary log. Returns the number of events."""
+    writer = create_log_writer(path)
+    try:
+        for event in events:
+            kind = KINDS[event.kind]
+            if kind in (DROPOFF, PICKUP):
+                log_event(writer, kind, event.time, event.floor, event.count, car)
+            elif kind in (LOAD, FINISHED):
+                log_event(writer, kind, event.time, event.floor, event.onboard, car)
+            else:
+                log_event(writer, kind, event.time, event.floor, 0, car)
+    finally:
+        count = close_log(writer)
+    return count
+
+
+def open_log(path):
+    """Memory-map a log as a read-only structured array with fields time, floor, count, car and kind."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a lift log")
+        f.seek(0, 2)
+        size = f.tell() - len(MAGIC)
+    if size % EVENT_DTYPE.itemsize:
+        raise ValueError(f"{path} is truncated: {size} bytes of records is not a whole number of events")
+    if size == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=len(MAGIC))
+
+
+def seek_time(log, t):
+    # index of the first event at or after time t, by binary search on the time column
+    return int(np.searchsorted(log["time"], t, side="left"))
+
+
+def time_slice(log, start=None, end=None):
+    """The events with start <= time < end, without reading the rest of the log."""
+    i = 0 if start is None else seek_time(log, start)
+    j = len(log) if end is None else seek_time(log, end)
+    return log[i:j]
+
+
+def floor_at(log, t, car=0, chunk=4096):
+    """Where `car` was at time t: the floor of its last move before t (0 if it hadn't moved).
+    Reads backwards from t a chunk at a time rather than from the start of the log."""
+    j = seek_time(log, t)
+    while j > 0:
+        i = max(0, j - chunk)
+        records = log[i:j]
+        moves = np.flatnonzero((records["kind"] == MOVE) & (records["car"] == car))
+        if len(moves):
+            return int(records["floor"][moves[-1]])
+        j = i
+    return 0
+
+
+def parse_log(log, start=None, end=None, car=None):
+    """The same tuples as elevator_parser.parse_events for part of a log, ready for the frontend."""
+    events = []
+    records = time_slice(log, start, end)
+    if car is not None:
+        records = records[records["car"] == car]
+    for time, kind, floor, count in zip(records["time"].tolist(), records["kind"].tolist(),
+                                        records["floor"].tolist(), records["count"].tolist()):
+        if kind == MOVE:
+            events.append(("MOVE", floor, time))
+        elif kind == PICKUP:
+            events.append(("PICKUP", floor, count, time))
+        elif kind == DROPOFF:
+            events.append(("DROPOFF", floor, count, time))
+        elif kind == FINISHED:
+            events.append(("FINISHED", None, time))
+    return events
+
+
+def log_to_text(log):
+    """lift() style lines for a log. Moves get their time taken from the previous move of the same car;
+    the final line has the floor and load but not the waiting totals, which the log doesn't keep."""
+    last_time = {}
+    for time, floor, count, car, kind in zip(log["time"].tolist(), log["floor"].tolist(), log["count"].tolist(),
+                                             log["car"].tolist(), log["kind"].tolist()):
+        if kind == MOVE:
+            taken = time - last_time.get(car, 0)
+            last_time[car] = time
+            yield f"Moving to floor {floor} (Time taken {text_number(taken)} second, Total time: {text_number(time)})."
+        elif kind == DROPOFF:
+            yield f"Dropping off {count} passenger(s) on floor {floor}."
+        elif kind == PICKUP:
+            yield f"Picking up {count} passenger(s) on floor {floor}"
+        elif kind == LOAD:
+            yield f"Passengers in the lift: {count}"
+        elif kind == FINISHED:
+            yield f"\n\nFinal state: Lift at floor {floor}. Passengers in lift: {count}. "
+
+
+def text_number(value):
+    # whole seconds print as ints, like the original output
+    return int(value) if value == int(value) else f"{value:.2f}"
+
+
+def text_to_log(lines, path, car=0):
+    """Convert a lift() output record (or a text file's lines) to a binary log. Returns the number of events."""
+    writer = create_log_writer(path)
+    time = 0.0
+    floor = 0
+    try:
+        for line in lines:
+            line = line.strip()
+            parts = line.split()
+            if line.startswith("Moving to floor"):
+                floor = int(parts[3])
+                time = float(line.rsplit("Total time:", 1)[1].strip(" ).\n"))
+                log_event(writer, MOVE, time, floor, 0, car)
+            elif line.startswith("Dropping off"):
+                log_event(writer, DROPOFF, time, int(parts[-1].rstrip(".")), int(parts[2]), car)
+            elif line.startswith("Picking up"):
+                log_event(writer, PICKUP, time, int(parts[-1]), int(parts[2]), car)
+            elif line.startswith("Passengers in the lift:"):
+                log_event(writer, LOAD, time, floor, int(parts[-1]), car)
+            elif line.startswith("Final state"):
+                # "Final state: Lift at floor 3. Passengers in lift: 0."
+                floor = int(parts[5].rstrip("."))
+                log_event(writer, FINISHED, time, floor, int(parts[9].rstrip(".")), car)
+    finally:
+        count = close_log(writer)
+    return count
+
+
+def main():
+    # python elevator_log.py <run.log> [start=T] [end=T]    print part of a log as text
+    # python elevator_log.py <record.txt> <run.log>          convert lift() text output to a log
+    from schindler import parse_options
+    if len(sys.argv) < 2:
+        print("Usage: python elevator_log.py <run.log> [start=T] [end=T]  |  python elevator_log.py <record.txt> <run.log>")
+        sys.exit(1)
+
+    if len(sys.argv) == 3 and "=" not in sys.argv[2]:
+        with open(sys.argv[1]) as f:
+            print(f"Wrote {text_to_log(f, sys.argv[2])} events to {sys.argv[2]}")
+        return
+
+    options = parse_options(sys.argv[2:])
+    log = open_log(sys.argv[1])
+    start = float(options["start"]) if "start" in options else None
+    end = float(options["end"]) if "end" in options else None
+    for line in log_to_text(time_slice(log, start, end)):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# elevator_metrics.py
+
+# Running statistics for one car. Every update is O(1): sums and counters are bumped as
+# passengers arrive, board and alight and as the car moves, so the numbers can be read at
+# any point in a run without walking the passenger lists. Wait and ride times are kept as
+# histograms (time -> count), which is what the percentiles are read from. With a resolution the
+# times are rounded to it first, so the histograms stay small however long the run.
+#
+# The lift's own LiftState keeps one of these in lift.metrics, filled in by add_passenger,
+# board_passengers, alight_passengers and run_lift.
+
+import json
+from array import array
+from collections import Counter
+from elevator_energy import energy_report
+
+
+def create_metrics(num_floors, capacity, resolution=None):
+    metrics = {"num_floors": num_floors,
+               "capacity": capacity,
+               "resolution": resolution,                        # histogram bucket in seconds, None keeps exact times
+               "clock": 0,                                      # latest time seen
+               "arrivals": 0,                                   # hall calls registered
+               "initial_riders": 0,                             # already in the car at the start
+               "boarded": 0,
+               "delivered": 0,
+               "wait_total": 0,                                 # arrival to boarding, boarded passengers
+               "ride_total": 0,                                 # boarding to alighting, delivered passengers
+               "waits": Counter(),
+               "rides": Counter(),
+               "arrivals_by_floor": array("i", [0]) * num_floors,
+               "deliveries_by_floor": array("i", [0]) * num_floors,
+               "moves": 0,
+               "floors_travelled": 0,
+               "reversals": 0,
+               "last_direction": None,
+               "moving_time": 0,
+               "load_time": 0,                                  # time x passengers on board while moving
+               "energy": 0.0,                                   # joules, with a building energy model (elevator_energy)
+               }
+    return metrics
+
+
+def bucket(value, resolution):
+    # the nearest multiple of resolution, rounded again so 0.1 * 3 is one key
+    if resolution is None:
+        return value
+    return round(round(value / resolution) * resolution, 6)
+
+
+def record_arrival(metrics, passenger):
+    metrics["arrivals"] += 1
+    metrics["arrivals_by_floor"][passenger.origin] += 1
+
+
+def record_rider(metrics, passenger):
+    # someone who was already in the car when the run started
+    metrics["initial_riders"] += 1
+
+
+def record_board(metrics, passenger):
+    wait = passenger.board_time - passenger.arrival_time
+    metrics["boarded"] += 1
+    metrics["wait_total"] += wait
+    metrics["waits"][bucket(wait, metrics["resolution"])] += 1
+    if passenger.board_time > metrics["clock"]:
+        metrics["clock"] = passenger.board_time
+
+
+def record_alight(metrics, passenger):
+    ride = passenger.alight_time - passenger.board_time
+    metrics["delivered"] += 1
+    metrics["ride_total"] += ride
+    metrics["rides"][bucket(ride, metrics["resolution"])] += 1
+    metrics["deliveries_by_floor"][passenger.destination] += 1
+    if passenger.alight_time > metrics["clock"]:
+        metrics["clock"] = passenger.alight_time
+
+
+def record_move(metrics, from_floor, to_floor, time_taken, onboard, clock, energy=0.0):
+    """A move between floors. A reversal is a move the opposite way to the previous one."""
+    # a stop at the same floor still draws standby power while the doors cycle
+    metrics["energy"] += energy
+    if to_floor == from_floor:
+        return
+    direction = 1 if to_floor > from_floor else 0
+    if metrics["last_direction"] is not None and direction != metrics["last_direction"]:
+        metrics["reversals"] += 1
+    metrics["last_direction"] = direction
+    metrics["moves"] += 1
+    metrics["floors_travelled"] += abs(to_floor - from_floor)
+    metrics["moving_time"] += time_taken
+    metrics["load_time"] += time_taken * onboard
+    if clock > metrics["clock"]:
+        metrics["clock"] = clock
+
+
+def histogram_percentile(histogram, count, q):
+    # nearest rank percentile from a value -> count histogram, same ranks as schindler.percentile
+    if not count:
+        return 0
+    rank = max(1, -(-count * q // 100))
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    return value
+
+
+def metrics_snapshot(metrics):
+    """The current figures as a plain dict, safe to call mid-run and to dump as JSON."""
+    clock = metrics["clock"]
+    boarded, delivered = metrics["boarded"], metrics["delivered"]
+    snapshot = {"clock": clock,
+                "arrivals": metrics["arrivals"],
+                "initial_riders": metrics["initial_riders"],
+                "boarded": boarded,
+                "delivered": delivered,
+                "waiting": metrics["arrivals"] - boarded,
+                "riding": metrics["initial_riders"] + boarded - delivered,
+                "throughput_per_minute": delivered * 60 / clock if clock else 0.0,
+                "mean_wait": metrics["wait_total"] / boarded if boarded else 0.0,
+                "mean_ride": metrics["ride_total"] / delivered if delivered else 0.0,
+                # share of the time the car was moving, and how full it was on average while it did
+                "busy": metrics["moving_time"] / clock if clock else 0.0,
+                "utilization": metrics["load_time"] / (metrics["moving_time"] * metrics["capacity"]) if metrics["moving_time"] else 0.0,
+                "moves": metrics["moves"],
+                "floors_travelled": metrics["floors_travelled"],
+                "reversals": metrics["reversals"],
+                "arrivals_by_floor": list(metrics["arrivals_by_floor"]),
+                "deliveries_by_floor": list(metrics["deliveries_by_floor"])}
+    snapshot.update(energy_report(metrics))
+    for q in (50, 95, 99):
+        snapshot[f"wait_p{q}"] = histogram_percentile(metrics["waits"], boarded, q)
+        snapshot[f"ride_p{q}"] = histogram_percentile(metrics["rides"], delivered, q)
+    return snapshot
+
+
+def save_metrics(metrics, path):
+    with open(path, "w") as f:
+        json.dump(metrics_snapshot(metrics), f, indent=2)
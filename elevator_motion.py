@@ -0,0 +1,95 @@
+# elevator_motion.py
+
+# Physical timing for a car, used by update_time when a building has a "motion" entry:
+#   create_building(num_floors, capacity, motion=create_motion(num_floors, floor_height=3.5))
+# Without one a move takes one second per floor and stops are free, as in the coursework.
+#
+# All floor to floor travel times are worked out once into a flat F x F table, so a move in
+# the main loop costs one lookup: table[origin * num_floors + destination].
+
+from array import array
+from math import sqrt
+
+
+def travel_time(distance, acceleration, max_speed, jerk=None):
+    """Seconds to travel `distance` metres from standstill to standstill.
+
+    Without jerk this is the trapezoidal profile: accelerate, cruise at max_speed, brake.
+    With jerk the acceleration itself ramps up and down (an S-curve), which is how real
+    drives limit passenger discomfort.
+    """
+    if distance <= 0:
+        return 0.0
+    a, v = acceleration, max_speed
+
+    if jerk is None:
+        # reaches max speed: d = v^2/a spent speeding up and slowing down
+        if distance >= v * v / a:
+            return distance / v + v / a
+        return 2 * sqrt(distance / a)
+
+    ramp = a / jerk                         # time to build up to full acceleration
+    if v < a * ramp:
+        # max speed comes before full acceleration, each half of a speed change takes sqrt(v/jerk)
+        if distance >= 2 * v * sqrt(v / jerk):
+            return distance / v + 2 * sqrt(v / jerk)
+    else:
+        # reaches full acceleration and max speed
+        if distance >= v * (v / a + ramp):
+            return distance / v + v / a + ramp
+        # full acceleration but not max speed: peak speed p from d = p * (p/a + ramp)
+        peak = a * (-ramp + sqrt(ramp * ramp + 4 * distance / a)) / 2
+        if peak >= a * ramp:
+            return 2 * (peak / a + ramp)
+    # short hop, acceleration never reaches its limit: d = 2 * jerk * t^3 over a quarter t of the trip
+    quarter = (distance / (2 * jerk)) ** (1 / 3)
+    return 4 * quarter
+
+
+def create_motion(num_floors, floor_height=3.5, acceleration=1.0, max_speed=2.5, jerk=None,
+                  door_open=2.0, door_close=2.0, boarding=1.0):
+    """Kinematics and dwell settings for one car, with the travel time table filled in.
+
+    floor_height is the storey height in metres, or a list of the num_floors - 1 heights
+    between each floor and the next. Speeds are m/s, acceleration m/s^2, jerk m/s^3.
+    A stop costs door_open + door_close plus boarding seconds per person getting on or off.
+    """
+    if isinstance(floor_height, (int, float)):
+        floor_height = [floor_height] * (num_floors - 1)
+    if len(floor_height) != num_floors - 1:
+        raise ValueError(f"Need {num_floors - 1} floor heights for {num_floors} floors, got {len(floor_height)}")
+
+    # height of each floor above the ground floor
+    levels = [0.0]
+    for height in floor_height:
+        levels.append(levels[-1] + height)
+
+    # travel time only depends on the distance, so equal storeys share one calculation
+    cache = {}
+    table = array("d", [0.0]) * (num_floors * num_floors)
+    for origin in range(num_floors):
+        for destination in range(num_floors):
+            distance = round(abs(levels[destination] - levels[origin]), 9)
+            if distance not in cache:
+                cache[distance] = round(travel_time(distance, acceleration, max_speed, jerk), 3)
+            table[origin * num_floors + destination] = cache[distance]
+
+    motion = {"num_floors": num_floors,
+              "levels": levels,
+              "acceleration": acceleration,
+              "max_speed": max_speed,
+              "jerk": jerk,
+              "door_open": door_open,
+              "door_close": door_close,
+              "boarding": boarding,
+              "table": table}
+    return motion
+
+
+def move_time(motion, origin, destination):
+    return motion["table"][origin * motion["num_floors"] + destination]
+
+
+def stop_time(motion, people):
+    # doors open, `people` get off or on one at a time, doors close
+    return motion["door_open"] + motion["door_close"] + motion["boarding"] * people
@@ -1,8 +1,11 @@
-from schindler import lift
+from schindler import lift, lift_events
 
 
 def parse_record(record):
+    # every tuple ends with the time it happened: the move's "Total time",
+    # and the time of the move before for everything at that stop
     events = []
+    time = 0
 
     for line in record:
         line = line.strip()
@@ -11,7 +14,9 @@ def parse_record(record):
         if line.startswith("Moving to floor"):
             parts = line.split()
             floor = int(parts[3])
-            events.append(("MOVE", floor))
+            # Example: "Moving to floor 2 (Time taken 2 second, Total time: 5)."
+            time = float(line.rsplit("Total time:", 1)[1].strip(" )."))
+            events.append(("MOVE", floor, time))
 
         # Pickup -----------------------------------------
         elif line.startswith("Picking up"):
@@ -19,7 +24,7 @@ def parse_record(record):
             parts = line.split()
             count = int(parts[2])  # "1"
             floor = int(parts[-1])  # "1"
-            events.append(("PICKUP", floor, count))
+            events.append(("PICKUP", floor, count, time))
 
         # Dropoff ----------------------------------------
         elif line.startswith("Dropping off"):
@@ -28,15 +33,40 @@ def parse_record(record):
             count = int(parts[2])
             # last part is "2." → strip the dot
             floor = int(parts[-1].rstrip("."))
-            events.append(("DROPOFF", floor, count))
+            events.append(("DROPOFF", floor, count, time))
 
         # Final state -------------------------------------
         elif line.startswith("Final state"):
-            events.append(("FINISHED", None))
+            events.append(("FINISHED", None, time))
 
     return events
 
 
+def parse_events(stream):
+    # Same tuples as parse_record, read straight off the
+    # lift_events() stream with no text in between
+    events = []
+
+    for ev in stream:
+        if ev.kind == "MOVE":
+            events.append(("MOVE", ev.floor, ev.time))
+        elif ev.kind == "PICKUP":
+            events.append(("PICKUP", ev.floor, ev.count, ev.time))
+        elif ev.kind == "DROPOFF":
+            events.append(("DROPOFF", ev.floor, ev.count, ev.time))
+        elif ev.kind == "FINISHED":
+            events.append(("FINISHED", None, ev.time))
+
+    return events
+
+
+def parse_log_file(path, start=None, end=None, car=None):
+    # Same tuples again, from a binary run log (see elevator_log),
+    # only reading the part of the file between start and end
+    from elevator_log import open_log, parse_log
+    return parse_log(open_log(path), start, end, car)
+
+
 def main():
     record = lift(
         current_floor=0,
@@ -59,6 +89,20 @@ def main():
     for e in parsed:
         print(e)
 
+    stream = lift_events(
+        current_floor=0,
+        onboard_passengers=1,
+        direction=1,
+        passengers_drop_off=1,
+        drop_off_floors=[2],
+        offboard_passengers=1,
+        pick_up_floors=[1],
+        pick_up_destinations=[3]
+    )
+    print("=== EVENTS WITHOUT TEXT ===")
+    for e in parse_events(stream):
+        print(e)
+
 if __name__ == "__main__":
     main()
 
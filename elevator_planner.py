@@ -0,0 +1,192 @@
+# elevator_planner.py
+
+from time import perf_counter
+from schindler import find_next_move
+
+
+# The search works on a compact, hashable state rather than the LiftState:
+#   (floor, direction, riders, waiting)
+# riders is a sorted tuple of onboard destinations, waiting a sorted tuple of (origin, destination).
+# The cost of a plan is the same passenger time update_time adds up: every move costs its
+# travel time for each passenger still in or waiting for the lift.
+
+
+class PlannerTimeout(Exception):
+    pass
+
+
+def lift_state(lift):
+    riders = tuple(sorted(p.destination for riding in lift.riding for p in riding))
+    waiting = tuple(sorted((p.origin, p.destination) for queue in lift.waiting for p in queue))
+    return (lift.current_floor, lift.direction, riders, waiting)
+
+
+def nearest(floors, floor, direction):
+    # closest floor strictly past `floor` in the direction of travel, as in nearest_request
+    if direction == 1:
+        ahead = [f for f in floors if f > floor]
+        return min(ahead) if ahead else None
+    ahead = [f for f in floors if f < floor]
+    return max(ahead) if ahead else None
+
+
+def greedy_stop(state, capacity):
+    """find_next_move on a compact state. Returns (stop, direction) or (None, direction)."""
+    floor, direction, riders, waiting = state
+    drops = set(riders)
+    picks = {origin for origin, _ in waiting}
+
+    next_drop_off = nearest(drops, floor, direction)
+    next_pick_up = nearest(picks, floor, direction)
+    if next_drop_off is None and next_pick_up is None:
+        direction = 1 - direction
+        next_drop_off = nearest(drops, floor, direction)
+        next_pick_up = nearest(picks, floor, direction)
+
+    if next_drop_off is not None:
+        on_way = (floor < next_pick_up <= next_drop_off if direction == 1 else next_drop_off <= next_pick_up < floor) \
+            if next_pick_up is not None else False
+        if on_way and len(riders) < capacity:
+            return next_pick_up, direction
+        return next_drop_off, direction
+    return next_pick_up, direction
+
+
+def apply_stop(state, stop):
+    """Move to `stop`, drop off then pick up as lift_update does. Returns (cost, new_state)."""
+    floor, _, riders, waiting = state
+    cost = abs(stop - floor) * (len(riders) + len(waiting))
+    boarding = [destination for origin, destination in waiting if origin == stop]
+    riders = tuple(sorted([d for d in riders if d != stop] + boarding))
+    waiting = tuple(w for w in waiting if w[0] != stop)
+    return cost, (stop, 1 if stop > floor else 0, riders, waiting)
+
+
+def lower_bound(state):
+    # nobody can get where they are going faster than riding straight there
+    floor, _, riders, waiting = state
+    bound = sum(abs(d - floor) for d in riders)
+    for origin, destination in waiting:
+        bound += abs(origin - floor) + abs(destination - origin)
+    return bound
+
+
+def create_planner(depth=3, time_budget=0.005, capacity=None, max_states=200000):
+    """Settings and memo tables for plan_next_move. capacity defaults to the lift's building."""
+    planner = {"depth": depth,
+               "time_budget": time_budget,      # seconds per decision, None for no limit
+               "capacity": capacity,
+               "max_states": max_states,
+               "rollouts": {},                  # state -> cost of finishing greedily
+               "values": {},                    # (state, depth) -> (cost, first stop)
+               "fallbacks": 0}                  # decisions that ran out of time and went greedy
+    return planner
+
+
+def rollout_cost(planner, state, capacity):
+    # cost of finishing from `state` with the greedy rules; this is the bound the search must beat
+    cost = planner["rollouts"].get(state)
+    if cost is not None:
+        return cost
+
+    cost = 0
+    path = []
+    current = state
+    while True:
+        path.append((current, cost))
+        stop = greedy_stop(current, capacity)[0]
+        if stop is None:
+            break
+        step, current = apply_stop(current, stop)
+        cost += step
+
+    # every state on the path gets its own remaining cost remembered
+    rollouts = planner["rollouts"]
+    for visited, spent in path:
+        rollouts[visited] = cost - spent
+    return cost
+
+
+def search(planner, state, depth, capacity, deadline):
+    """Best (cost, first stop) over plans that branch for `depth` stops and then go greedy."""
+    key = (state, depth)
+    found = planner["values"].get(key)
+    if found is not None:
+        return found
+    if deadline is not None and perf_counter() > deadline:
+        raise PlannerTimeout
+
+    # start from the greedy choice so its cost is the bound every other branch has to beat
+    greedy = greedy_stop(state, capacity)[0]
+    if greedy is None:
+        return (0, None)
+    best_cost = rollout_cost(planner, state, capacity)
+    best_stop = greedy
+
+    if depth > 0:
+        floor, _, riders, waiting = state
+        stops = set(riders) | {origin for origin, _ in waiting}
+        stops.discard(floor)
+        for stop in sorted(stops, key=lambda f: abs(f - floor)):
+            cost, child = apply_stop(state, stop)
+            if cost + lower_bound(child) >= best_cost:
+                continue
+            child_cost = cost + search(planner, child, depth - 1, capacity, deadline)[0]
+            if child_cost < best_cost:
+                best_cost, best_stop = child_cost, stop
+
+    values = planner["values"]
+    if len(values) >= planner["max_states"]:
+        values.clear()
+        planner["rollouts"].clear()
+    values[key] = (best_cost, best_stop)
+    return best_cost, best_stop
+
+
+def plan_next_move(lift, planner):
+    """Drop-in for find_next_move: deepens the search until the time budget runs out."""
+    capacity = planner["capacity"] or lift.building["capacity"]
+    budget = planner["time_budget"]
+    deadline = perf_counter() + budget if budget is not None else None
+    state = lift_state(lift)
+
+    stop = None
+    try:
+        for depth in range(planner["depth"] + 1):
+            stop = search(planner, state, depth, capacity, deadline)[1]
+    except PlannerTimeout:
+        pass
+
+    if stop is None:
+        # out of time before even the shallowest search finished, or nothing left to do
+        if deadline is not None and perf_counter() > deadline:
+            planner["fallbacks"] += 1
+        return find_next_move(lift)
+
+    lift.direction = 1 if stop > lift.current_floor else 0
+    return stop
+
+
+def planner_move(depth=3, time_budget=0.005, capacity=None):
+    """A choose_move for lift()/lift_events() that uses the planner, e.g. lift(..., choose_move=planner_move())."""
+    planner = create_planner(depth, time_budget, capacity)
+
+    def choose_move(lift):
+        return plan_next_move(lift, planner)
+
+    choose_move.planner = planner
+    return choose_move
+
+
+def main():
+    from schindler import lift
+    # two people below the car going up one floor: worth fetching before carrying on up
+    args = dict(current_floor=1, onboard_passengers=1, direction=1, passengers_drop_off=1,
+                drop_off_floors=[3], offboard_passengers=3, pick_up_floors=[0, 0, 2],
+                pick_up_destinations=[1, 1, 3], return_record=True, print_output=False)
+    print("greedy: ", lift(**args)[-1])
+    print("planner:", lift(**args, choose_move=planner_move(depth=4, time_budget=0.05))[-1])
+
+
+if __name__ == "__main__":
+    main()
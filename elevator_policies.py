@@ -0,0 +1,261 @@
+# elevator_policies.py
+
+# A dispatch policy is any function policy(lift) -> next floor (or None when there is nothing
+# left to do). Like find_next_move it may change lift.direction, and it only ever reads the
+# LiftState built by schindler.index_requests. The main loop is handed the function once, so
+# choosing a policy costs nothing per step.
+
+from collections import OrderedDict
+from schindler import find_next_move, nearest_request, lift_has_space, DEFAULT_PARAMS
+from elevator_energy import energy_model, move_energy, JOULES_PER_KWH
+
+
+def nearest_stop(lift, direction, pick_ups=True):
+    # closest drop off or (optionally) pick up floor past the car in `direction`
+    floor = lift.current_floor
+    drop_off = nearest_request(lift.drop_off_index, floor, direction)
+    pick_up = nearest_request(lift.pick_up_index, floor, direction) if pick_ups else None
+    if drop_off is None:
+        return pick_up
+    if pick_up is None:
+        return drop_off
+    return min(drop_off, pick_up) if direction == 1 else max(drop_off, pick_up)
+
+
+def has_requests(lift):
+    return bool(lift.drop_off_index or lift.pick_up_index)
+
+
+def greedy(lift):
+    """The original direction-based greedy rules, see find_next_move."""
+    return find_next_move(lift)
+
+
+def look(lift):
+    """LOOK: stop at every request in the direction of travel, full or not, and reverse after the last one."""
+    next_move = nearest_stop(lift, lift.direction)
+    if next_move is None:
+        lift.direction = 1 - lift.direction
+        next_move = nearest_stop(lift, lift.direction)
+    return next_move
+
+
+def scan(lift):
+    """SCAN: like LOOK, but always runs to the end of the shaft before reversing."""
+    if not has_requests(lift):
+        return None
+
+    next_move = nearest_stop(lift, lift.direction)
+    if next_move is not None:
+        return next_move
+
+    terminal = lift.building["top_floor"] if lift.direction == 1 else 0
+    if lift.current_floor != terminal:
+        return terminal
+    lift.direction = 1 - lift.direction
+    return nearest_stop(lift, lift.direction)
+
+
+def waiting_in_direction(lift, floor, direction):
+    # does anyone queueing on this floor want to travel this way?
+    if direction == 1:
+        return any(p.destination > floor for p in lift.waiting[floor])
+    return any(p.destination < floor for p in lift.waiting[floor])
+
+
+def collective(lift):
+    """Full collective control: on the way, stop for drop offs and for calls going the same way as the car,
+    skipping calls when full. Calls the other way are answered from the far end of the sweep."""
+    floor = lift.current_floor
+    has_space = lift.onboard_passengers < lift.building["capacity"]
+
+    for _ in range(2):
+        direction = lift.direction
+        drop_off = nearest_request(lift.drop_off_index, floor, direction)
+
+        # nearest call ahead going our way, checked floor by floor outwards from the car
+        same_way = None
+        opposite = None
+        if has_space:
+            index = lift.pick_up_index
+            ahead = [f for f in index if f > floor] if direction == 1 else [f for f in reversed(index) if f < floor]
+            for f in ahead:
+                if waiting_in_direction(lift, f, direction):
+                    same_way = f
+                    break
+            # the furthest call ahead is where the car turns round for the calls going the other way
+            if ahead:
+                opposite = ahead[-1]
+
+        stops = [f for f in (drop_off, same_way) if f is not None]
+        if stops:
+            return min(stops) if direction == 1 else max(stops)
+        if opposite is not None:
+            return opposite
+        lift.direction = 1 - direction
+    return None
+
+
+def candidate_stops(lift):
+    # every floor with a drop off, and with a pick up if there is room, apart from where the car is
+    candidates = set(lift.drop_off_index)
+    if lift.onboard_passengers < lift.building["capacity"]:
+        candidates.update(lift.pick_up_index)
+    candidates.discard(lift.current_floor)
+    return candidates
+
+
+def estimated_time(lift, stop):
+    # passenger floors (seconds, one per floor) spent getting to the stop plus the straight-line
+    # time everyone still needs afterwards. The ride from origin to destination is the same
+    # whichever stop comes next, so it is left out
+    drop_off_counts, pick_up_counts = lift.drop_off_counts, lift.pick_up_counts
+    remaining = sum(drop_off_counts[f] * abs(f - stop) for f in lift.drop_off_index)
+    remaining += sum(pick_up_counts[f] * abs(f - stop) for f in lift.pick_up_index)
+    return abs(stop - lift.current_floor) * (lift.onboard_passengers + lift.offboard_passengers) + remaining
+
+
+def etd(lift):
+    """Estimated time to destination: pick the stop that minimises the time passengers have already
+    spent getting there plus the straight-line time everyone still needs afterwards."""
+    floor = lift.current_floor
+    candidates = candidate_stops(lift)
+    if not candidates:
+        return None
+
+    next_move = min(candidates, key=lambda stop: (estimated_time(lift, stop), abs(stop - floor)))
+    lift.direction = 1 if next_move > floor else 0
+    return next_move
+
+
+def energy_weighted(weight=10.0):
+    """ETD with the energy of the next trip added to the cost: estimated passenger seconds plus
+    `weight` per watt hour the trip would use with the car's current load. weight=0 is plain etd;
+    raising it trades waiting time for fewer, better loaded trips (e.g. riding a heavy car down
+    and an empty one up, which is when a counterweighted car uses least). Buildings without an
+    energy model are costed with elevator_energy's defaults."""
+    weight_per_joule = weight * 1000 / JOULES_PER_KWH
+
+    def choose_move(lift):
+        floor = lift.current_floor
+        candidates = candidate_stops(lift)
+        if not candidates:
+            return None
+
+        energy = energy_model(lift.building)
+        load = lift.onboard_passengers
+
+        def cost(stop):
+            joules = move_energy(energy, floor, stop, load)
+            return (estimated_time(lift, stop) + weight_per_joule * joules, abs(stop - floor))
+
+        next_move = min(candidates, key=cost)
+        lift.direction = 1 if next_move > floor else 0
+        return next_move
+
+    return choose_move
+
+
+def tuned(params):
+    """The greedy rules with some of schindler.DEFAULT_PARAMS changed, e.g. tuned({"detour": 1})."""
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters {', '.join(sorted(unknown))}. Choose from {', '.join(DEFAULT_PARAMS)}")
+    params = dict(DEFAULT_PARAMS, **params)
+
+    def choose_move(lift):
+        return find_next_move(lift, params)
+
+    choose_move.params = params
+    return choose_move
+
+
+def parse_params(text):
+    # "detour=1,fill_limit=0.8" -> {"detour": 1, "fill_limit": 0.8}, "none" for None
+    params = {}
+    for item in filter(None, text.split(",")):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Parameter {item} should look like key=value")
+        params[key] = None if value == "none" else float(value) if "." in value else int(value)
+    return params
+
+
+def params_spec(params):
+    """The policy name for a parameter set, for batch scenarios and workers: "tuned:detour=1,fill_limit=0.8"."""
+    return "tuned:" + ",".join(f"{key}={'none' if value is None else value}" for key, value in sorted(params.items()))
+
+
+def request_key(lift):
+    # everything greedy, LOOK and SCAN look at: the floors with requests as bitmasks, whether there is room,
+    # and the building's size, as the cache is shared by every scenario in the process and SCAN runs to the top floor
+    building = lift.building
+    return (lift.current_floor, lift.direction, lift.drop_off_mask, lift.pick_up_mask, lift_has_space(lift),
+            building["top_floor"], building["capacity"])
+
+
+def cached(policy=greedy, maxsize=65536):
+    """Wrap a policy with a bounded LRU cache of its decisions, keyed by request_key.
+
+    Only for policies that decide from request_key alone (greedy, look, scan); collective and etd
+    also look at who is waiting. choose_move.stats counts hits and misses.
+    """
+    cache = OrderedDict()
+    stats = {"hits": 0, "misses": 0, "size": 0, "maxsize": maxsize}
+
+    def choose_move(lift):
+        key = request_key(lift)
+        found = cache.get(key)
+        if found is not None:
+            cache.move_to_end(key)
+            stats["hits"] += 1
+            lift.direction = found[1]
+            return found[0]
+
+        stats["misses"] += 1
+        next_move = policy(lift)
+        # the direction is part of the decision, the policy may have turned the car round
+        cache[key] = (next_move, lift.direction)
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+        stats["size"] = len(cache)
+        return next_move
+
+    choose_move.stats = stats
+    return choose_move
+
+
+POLICIES = {"greedy": greedy,
+            "look": look,
+            "scan": scan,
+            "collective": collective,
+            "etd": etd,
+            "energy": energy_weighted()}
+
+
+# one cache per wrapped policy per process, so every scenario in a batch worker shares it
+CACHED = {}
+
+
+def get_policy(name):
+    """Look a policy up by name once, before the run starts. "planner" builds a fresh lookahead planner,
+    "cached" (or "cached:look", "cached:scan") the greedy (or named) policy behind this process's decision cache,
+    and "tuned:detour=1,fill_limit=0.8" the greedy rules with those parameters (see params_spec)."""
+    if callable(name):
+        return name
+    if name == "planner":
+        from elevator_planner import planner_move
+        return planner_move()
+    if name.startswith("tuned:"):
+        return tuned(parse_params(name.partition(":")[2]))
+    if name.startswith("cached"):
+        base = name.partition(":")[2] or "greedy"
+        if base not in ("greedy", "look", "scan"):
+            raise ValueError(f"Only greedy, look and scan can be cached, not {base}")
+        if base not in CACHED:
+            CACHED[base] = cached(POLICIES[base])
+        return CACHED[base]
+    try:
+        return POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown policy {name}. Choose from {', '.join(list(POLICIES) + ['planner', 'cached', 'tuned:...'])}") from None
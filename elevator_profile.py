@@ -0,0 +1,162 @@
+# elevator_profile.py
+
+# Opt-in instrumentation for the lift() loop. Nothing in schindler.py knows about it: while
+# instrument() is active the phase functions are swapped for timed wrappers in every loaded
+# module that refers to them, and put back afterwards, so an uninstrumented run pays nothing.
+#
+#   with instrument() as profile:
+#       lift(...)
+#   print(format_report(profile))
+#
+# or from the shell, around any script:
+#   python elevator_profile.py [cprofile=run.prof] [report=phases.json] schindler.py 0 1 1 1 "3" 3 "1,1,2" "3,0,1"
+
+import os
+import sys
+import json
+import runpy
+import builtins
+import cProfile
+from functools import wraps
+from contextlib import contextmanager
+from time import perf_counter_ns
+import schindler
+
+# the loop's phases, in the order they run; lift_update's time includes the two process_ phases
+PHASES = ("input_error", "index_requests", "choose_move", "update_time", "lift_update",
+          "process_drop_offs", "process_pick_ups", "format_event", "print")
+
+
+def create_profile():
+    return {name: {"calls": 0, "time": 0, "blocks": 0} for name in PHASES}
+
+
+def timed(stats, func):
+    # calls, wall time (ns) and net allocated memory blocks, added to stats on every call
+    getallocatedblocks = sys.getallocatedblocks
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        blocks = getallocatedblocks()
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats["time"] += perf_counter_ns() - start
+            stats["calls"] += 1
+            stats["blocks"] += getallocatedblocks() - blocks
+    return wrapper
+
+
+def replace_everywhere(original, replacement):
+    # every loaded repo module that imported `original` by name gets `replacement` instead
+    patched = []
+    for module in list(sys.modules.values()):
+        name = getattr(module, "__name__", "")
+        if not (name == "schindler" or name.startswith("elevator_") or name == "__main__"):
+            continue
+        for attr, value in list(vars(module).items()):
+            if value is original:
+                setattr(module, attr, replacement)
+                patched.append((module, attr))
+    return patched
+
+
+@contextmanager
+def instrument(profile=None):
+    """Time every phase of lift(), lift_events() and batch runs in this process while active.
+
+    choose_move is timed by wrapping whatever policy run_lift is handed, print by shadowing the
+    builtin inside schindler. Batch runs need max_workers=0 to be measured, pool workers are
+    separate processes.
+    """
+    if profile is None:
+        profile = create_profile()
+
+    patched = []
+    for name in PHASES[:2] + PHASES[3:-1]:
+        original = getattr(schindler, name)
+        patched += [(module, attr, original) for module, attr in replace_everywhere(original, timed(profile[name], original))]
+
+    run_lift = schindler.run_lift
+
+    @wraps(run_lift)
+    def profiled_run_lift(lift, choose_move=schindler.find_next_move, check_invariants=True):
+        return run_lift(lift, timed(profile["choose_move"], choose_move), check_invariants)
+    patched += [(module, attr, run_lift) for module, attr in replace_everywhere(run_lift, profiled_run_lift)]
+
+    schindler.print = timed(profile["print"], builtins.print)
+    try:
+        yield profile
+    finally:
+        del schindler.print
+        for module, attr, original in patched:
+            setattr(module, attr, original)
+
+
+def format_report(profile):
+    total = sum(stats["time"] for name, stats in profile.items() if name not in ("process_drop_offs", "process_pick_ups"))
+    lines = [f"{'phase':<18} {'calls':>9} {'total ms':>10} {'us/call':>9} {'share':>6} {'blocks':>9}"]
+    for name, stats in sorted(profile.items(), key=lambda item: -item[1]["time"]):
+        if not stats["calls"]:
+            continue
+        ms = stats["time"] / 1e6
+        per_call = stats["time"] / stats["calls"] / 1e3
+        share = stats["time"] / total * 100 if total else 0.0
+        lines.append(f"{name:<18} {stats['calls']:>9} {ms:>10.3f} {per_call:>9.2f} {share:>5.1f}% {stats['blocks']:>9}")
+    lines.append("(lift_update includes process_drop_offs and process_pick_ups; blocks are net allocated memory blocks)")
+    return "\n".join(lines)
+
+
+def write_report(profile, path):
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+
+def export_cprofile(path, func, *args, **kwargs):
+    """Run func under cProfile and dump the stats to path, for snakeviz, flameprof or pstats."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+
+
+def main():
+    # python elevator_profile.py [cprofile=run.prof] [report=phases.json] <script.py> [script args...]
+    args = sys.argv[1:]
+    options = {}
+    while args and "=" in args[0] and not args[0].endswith(".py"):
+        key, _, value = args.pop(0).partition("=")
+        options[key] = value
+    if not args:
+        print("Usage: python elevator_profile.py [cprofile=run.prof] [report=phases.json] <script.py> [script args...]")
+        sys.exit(1)
+
+    script = args[0]
+    sys.argv = args
+
+    def run():
+        try:
+            if os.path.basename(script) == "schindler.py":
+                # run_path would define a second, uninstrumented copy of schindler's functions
+                schindler.main()
+            else:
+                runpy.run_path(script, run_name="__main__")
+        except SystemExit:
+            # lift() exits when it is done, the report still wants printing
+            pass
+
+    with instrument() as profile:
+        if "cprofile" in options:
+            export_cprofile(options["cprofile"], run)
+        else:
+            run()
+
+    print(format_report(profile), file=sys.stderr)
+    if "report" in options:
+        write_report(profile, options["report"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# elevator_render.py
+
+# Headless replay: draws the same picture as elevator_frontend straight to PNG frames,
+# an animated GIF or (with ffmpeg installed) an MP4, without a display.
+
+import os
+import sys
+import math
+import shutil
+import tempfile
+import subprocess
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw
+from schindler import lift_events
+from elevator_parser import parse_events
+from elevator_timeline import LIFT_WIDTH, create_layout, build_timeline, position_at, draw_static_building
+
+SPRITE_SIZE = (24, 48)
+
+
+@lru_cache(maxsize=None)
+def person_sprite():
+    """person.png resized once per process and reused for every icon and frame."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    img = Image.open(os.path.join(script_dir, "person.png")).convert("RGBA")
+    return img.resize(SPRITE_SIZE, Image.LANCZOS)
+
+
+class ImageCanvas:
+    # the Tk Canvas drawing calls draw_static_building uses, drawn onto a Pillow image instead
+    def __init__(self, image):
+        self.draw = ImageDraw.Draw(image)
+
+    def create_line(self, x0, y0, x1, y1, width=1, fill="black"):
+        self.draw.line((x0, y0, x1, y1), fill=fill, width=width)
+
+    def create_rectangle(self, x0, y0, x1, y1, outline="black", width=1, fill=None):
+        self.draw.rectangle((x0, y0, x1, y1), outline=outline, width=width, fill=fill)
+
+
+def draw_background(layout):
+    image = Image.new("RGB", (layout["width"], layout["height"]), "lightgrey")
+    draw_static_building(ImageCanvas(image), layout)
+    return image
+
+
+def draw_frame(background, timeline, layout, t):
+    """One frame at playback time t, on a copy of the static background."""
+    frame = background.copy()
+    canvas = ImageCanvas(frame)
+    lift_height = layout["lift_height"]
+
+    for track in timeline["cars"]:
+        x, y = position_at(track, t)
+        canvas.create_rectangle(x, y, x + LIFT_WIDTH, y + lift_height, fill="lightgreen")
+
+    # icons are centred on their position like Tk's create_image
+    sprite = person_sprite()
+    half_w, half_h = sprite.width // 2, sprite.height // 2
+    for icon in timeline["icons"]:
+        if icon["appear"] <= t and (icon["vanish"] is None or t < icon["vanish"]):
+            x, y = position_at(icon["track"], t)
+            frame.paste(sprite, (round(x) - half_w, round(y) - half_h), sprite)
+    return frame
+
+
+# Each worker process draws the background once and keeps it with the timeline
+_worker = {}
+
+
+def init_worker(timeline, layout):
+    _worker["timeline"] = timeline
+    _worker["layout"] = layout
+    _worker["background"] = draw_background(layout)
+
+
+def render_to_file(job):
+    index, t, path = job
+    draw_frame(_worker["background"], _worker["timeline"], _worker["layout"], t).save(path)
+    return path
+
+
+def frame_times(duration, fps, speed):
+    count = max(1, math.ceil(duration * fps / speed) + 1)
+    return [min(duration, i * speed / fps) for i in range(count)]
+
+
+def render_frames(timeline, layout, directory, fps=30, speed=1.0, max_workers=None):
+    """Write frame_00000.png... to directory using a process pool. Returns the paths in order."""
+    os.makedirs(directory, exist_ok=True)
+    jobs = [(i, t, os.path.join(directory, f"frame_{i:05d}.png"))
+            for i, t in enumerate(frame_times(timeline["duration"], fps, speed))]
+
+    if max_workers == 0:
+        init_worker(timeline, layout)
+        return [render_to_file(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(timeline, layout)) as pool:
+        return list(pool.map(render_to_file, jobs, chunksize=16))
+
+
+def render_replay(car_events, output, layout=None, start_floors=None, fps=30, speed=1.0, max_workers=None, start=None):
+    """Render one parsed event list per car to output: a directory of PNGs, a .gif or a .mp4.
+    The first frame is the events' time `start` (0 by default)."""
+    if layout is None:
+        layout = create_layout(num_cars=len(car_events))
+    timeline = build_timeline(car_events, layout, start_floors, start)
+
+    ext = os.path.splitext(output)[1].lower()
+    if ext not in (".gif", ".mp4"):
+        return render_frames(timeline, layout, output, fps, speed, max_workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = render_frames(timeline, layout, tmp, fps, speed, max_workers)
+
+        if ext == ".gif":
+            frames = [Image.open(path) for path in paths]
+            frames[0].save(output, save_all=True, append_images=frames[1:],
+                           duration=round(1000 / fps), loop=0)
+        else:
+            # Pillow can't write video, hand the frames to ffmpeg
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError("Writing .mp4 needs ffmpeg on the PATH, use .gif or a directory of PNGs instead")
+            subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps),
+                            "-i", os.path.join(tmp, "frame_%05d.png"),
+                            "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", output], check=True)
+    return output
+
+
+def main():
+    # python elevator_render.py <frames_dir|replay.gif|replay.mp4> [fps=30] [speed=1]
+    from schindler import parse_options
+    if len(sys.argv) < 2:
+        print("Usage: python elevator_render.py <frames_dir|replay.gif|replay.mp4> [fps=30] [speed=1]")
+        sys.exit(1)
+    options = parse_options(sys.argv[2:])
+
+    # same scenario as the Tk frontend
+    events = parse_events(lift_events(
+        current_floor=0,
+        onboard_passengers=1,
+        direction=1,
+        passengers_drop_off=1,
+        drop_off_floors=[3],
+        offboard_passengers=3,
+        pick_up_floors=[1, 1, 2],
+        pick_up_destinations=[3, 0, 1],
+    ))
+    result = render_replay([events], sys.argv[1], fps=int(options.get("fps", 30)), speed=float(options.get("speed", 1)))
+    print(f"Wrote {len(result)} frames to {sys.argv[1]}" if isinstance(result, list) else f"Wrote {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# elevator_simulation.py
+
+# With streaming=True the run keeps nothing per passenger once they are delivered: their journey
+# time goes into a histogram and they are dropped, and the wait, ride and journey histograms are
+# bucketed to `resolution` seconds. Memory then depends on how many people are in the building at
+# once, not on how many calls have been made; the percentiles in summarize are to the nearest bucket.
+
+import heapq
+from collections import Counter
+from schindler import (create_building, create_lift, index_requests, add_passenger, Passenger,
+                       alight_passengers, board_passengers, find_next_move, latency_stats)
+from elevator_metrics import record_move, metrics_snapshot, bucket, histogram_percentile
+
+# Event kinds on the queue
+ARRIVAL = 0         # a passenger presses the hall button
+CAR_AT_FLOOR = 1    # the car reaches a floor, stopping or passing through
+DOOR_OPEN = 2       # doors finished opening, people get off and on
+DOOR_CLOSE = 3      # doors finished closing, the car picks its next move
+
+
+def create_simulation(building=None, start_floor=0, direction=1, door_time=0.0, log=None, streaming=False, resolution=0.1):
+    # log is an elevator_log writer to record every stop in, None for no log
+    if building is None:
+        building = create_building()
+
+    lift = index_requests(create_lift(start_floor, 0, direction, 0, [], 0, [], [], building))
+    if streaming:
+        # nothing has been recorded yet, so the histograms can switch to buckets here
+        lift.metrics["resolution"] = resolution
+
+    sim = {"lift": lift,
+           "door_time": door_time,
+           "queue": [],                                        # heap of (time, seq, kind, data)
+           "seq": 0,
+           "clock": 0.0,
+           "target": None,                                     # floor the car is heading to, None when idle
+           "doors_open": False,
+           "log": log,
+           "journeys": Counter() if streaming else None,       # arrival to alighting, streaming runs only
+           "time": {"total_time": 0.0, "onboard_waiting_time": 0.0, "offboard_waiting_time": 0.0}
+           }
+    return sim
+
+
+def schedule(sim, t, kind, data=None):
+    sim["seq"] += 1
+    heapq.heappush(sim["queue"], (t, sim["seq"], kind, data))
+
+
+def handle_arrival(sim, t, origin, destination):
+    lift = sim["lift"]
+    top_floor = lift.building["top_floor"]
+    if not (0 <= origin <= top_floor and 0 <= destination <= top_floor):
+        raise ValueError(f"Call from {origin} to {destination} is outside floors 0 to {top_floor}")
+    if origin == destination:
+        return
+
+    add_passenger(lift, Passenger(None, origin, destination, t))
+
+    # an idle car wakes up for the new call
+    if sim["target"] is None and not sim["doors_open"]:
+        dispatch(sim, t)
+
+
+def dispatch(sim, t):
+    # choose the next stop from where the car is standing
+    lift = sim["lift"]
+    floor = lift.current_floor
+
+    # find_next_move only looks past the current floor, so board anyone waiting right here first
+    if lift.pick_up_counts[floor] and lift.onboard_passengers < lift.building["capacity"]:
+        sim["doors_open"] = True
+        schedule(sim, t + sim["door_time"], DOOR_OPEN, floor)
+        return
+
+    next_move = find_next_move(lift)
+    sim["target"] = next_move
+    if next_move is not None:
+        step = 1 if next_move > floor else -1
+        schedule(sim, t + 1, CAR_AT_FLOOR, floor + step)
+
+
+def handle_car_at_floor(sim, t, floor):
+    lift = sim["lift"]
+    record_move(lift.metrics, lift.current_floor, floor, 1, lift.onboard_passengers, t)
+    lift.current_floor = floor
+
+    # stop for anyone getting off here, or for a pick up if there is room
+    if lift.drop_off_counts[floor] or (lift.pick_up_counts[floor] and lift.onboard_passengers < lift.building["capacity"]):
+        if sim["log"] is not None:
+            from elevator_log import log_event, MOVE      # numpy is only needed when logging
+            log_event(sim["log"], MOVE, t, floor)
+        sim["target"] = None
+        sim["doors_open"] = True
+        schedule(sim, t + sim["door_time"], DOOR_OPEN, floor)
+        return
+
+    # otherwise keep going, a call made while the car was moving may now be closer than the old target
+    target = find_next_move(lift)
+    sim["target"] = target
+    if target is not None:
+        step = 1 if target > floor else -1
+        schedule(sim, t + 1, CAR_AT_FLOOR, floor + step)
+
+
+def handle_door_open(sim, t, floor):
+    lift = sim["lift"]
+    lift.clock = t
+
+    # everyone riding to this floor gets off, then people board in arrival order while there is space
+    departures = alight_passengers(lift, floor)
+    lift.onboard_passengers -= departures
+    journeys = sim["journeys"]
+    if journeys is not None:
+        resolution = lift.metrics["resolution"]
+        for passenger in lift.delivered:
+            journeys[bucket(passenger.alight_time - passenger.arrival_time, resolution)] += 1
+        lift.delivered.clear()
+    boarders = board_passengers(lift, floor, lift.building["capacity"] - lift.onboard_passengers)
+    lift.onboard_passengers += boarders
+    lift.offboard_passengers -= boarders
+
+    log = sim["log"]
+    if log is not None:
+        from elevator_log import log_event, DROPOFF, PICKUP, LOAD
+        if departures:
+            log_event(log, DROPOFF, t, floor, departures)
+        if boarders:
+            log_event(log, PICKUP, t, floor, boarders)
+        log_event(log, LOAD, t, floor, lift.onboard_passengers)
+
+    schedule(sim, t + sim["door_time"], DOOR_CLOSE, floor)
+
+
+def handle_door_close(sim, t, floor):
+    sim["doors_open"] = False
+    dispatch(sim, t)
+
+
+HANDLERS = {CAR_AT_FLOOR: handle_car_at_floor,
+            DOOR_OPEN: handle_door_open,
+            DOOR_CLOSE: handle_door_close}
+
+
+def run_simulation(sim, arrivals):
+    """Run a stream of (time, origin, destination) calls, sorted by time, until every passenger is delivered."""
+    queue = sim["queue"]
+    arrivals = iter(arrivals)
+
+    # only the next arrival sits on the heap, so the trace is read lazily
+    next_arrival = next(arrivals, None)
+    if next_arrival is not None:
+        schedule(sim, next_arrival[0], ARRIVAL, next_arrival)
+
+    while queue:
+        t, _, kind, data = heapq.heappop(queue)
+        sim["clock"] = t
+        if kind == ARRIVAL:
+            handle_arrival(sim, t, data[1], data[2])
+            next_arrival = next(arrivals, None)
+            if next_arrival is not None:
+                if next_arrival[0] < t:
+                    raise ValueError(f"Arrivals must be sorted by time, got {next_arrival[0]} after {t}")
+                schedule(sim, next_arrival[0], ARRIVAL, next_arrival)
+        else:
+            HANDLERS[kind](sim, t, data)
+
+    # same totals update_time keeps: time passengers spent in and waiting for the lift,
+    # already summed by the lift's metrics as people got on and off
+    metrics = sim["lift"].metrics
+    time = sim["time"]
+    time["total_time"] = sim["clock"]
+    time["onboard_waiting_time"] = metrics["ride_total"]
+    time["offboard_waiting_time"] = metrics["wait_total"]
+
+    if sim["log"] is not None:
+        from elevator_log import log_event, flush_log, FINISHED
+        log_event(sim["log"], FINISHED, sim["clock"], sim["lift"].current_floor, sim["lift"].onboard_passengers)
+        flush_log(sim["log"])
+    return sim
+
+
+def summarize(sim):
+    lift = sim["lift"]
+    journeys = sim["journeys"]
+    served = len(lift.delivered) if journeys is None else lift.metrics["delivered"]
+    summary = {"served": served,
+               "time": dict(sim["time"]),
+               "mean_wait": sim["time"]["offboard_waiting_time"] / served if served else 0.0,
+               "mean_ride": sim["time"]["onboard_waiting_time"] / served if served else 0.0}
+    if journeys is None:
+        summary.update(latency_stats(lift.delivered))
+    else:
+        # everyone boarded has been delivered by the end, so the wait histogram covers the same people
+        for q in (50, 95, 99):
+            summary[f"wait_p{q}"] = histogram_percentile(lift.metrics["waits"], served, q)
+            summary[f"journey_p{q}"] = histogram_percentile(journeys, served, q)
+    summary["metrics"] = metrics_snapshot(sim["lift"].metrics)
+    return summary
+
+
+def main():
+    import random
+    random.seed(1)
+    building = create_building(num_floors=10, capacity=8)
+
+    # a call every 20 seconds on average for an hour
+    def calls():
+        t = 0.0
+        while t < 3600:
+            t += random.expovariate(1 / 20)
+            origin, destination = random.sample(range(10), 2)
+            yield t, origin, destination
+
+    sim = run_simulation(create_simulation(building, door_time=2.0), calls())
+    print(summarize(sim))
+
+
+if __name__ == "__main__":
+    main()
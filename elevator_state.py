@@ -0,0 +1,278 @@
+# elevator_state.py
+
+# Snapshots, forks and checkpoints of a lift() run. A run (schindler.create_run) is the lift,
+# the time totals, the number of moves made and whether it has finished; resume_run carries on
+# from any run, so a run stopped after any move can be:
+#   snapshot()/restore()           turned into plain JSON-safe data and back
+#   fork()                         copied cheaply to try something else from the same point: the
+#                                  passenger records are shared until one side changes them
+#   save_checkpoint()/load_checkpoint()   written to disk and picked up again later
+#
+# The dispatch policy isn't part of the state: pass the same choose_move when resuming.
+
+import os
+import sys
+import json
+from array import array
+from collections import Counter, deque
+from schindler import (Passenger, create_lift, create_run, resume_run, make_move, find_next_move,
+                       index_requests, input_error, format_event, get_input, parse_options)
+
+SNAPSHOT_VERSION = 1
+
+
+def passenger_record(passenger):
+    return [passenger.id, passenger.origin, passenger.destination,
+            passenger.arrival_time, passenger.board_time, passenger.alight_time, passenger.hall_call]
+
+
+def passenger_from_record(record):
+    passenger = Passenger(*record[:5])
+    passenger.alight_time = record[5]
+    # older snapshots didn't keep hall_call; a rider from the start boarded at 0 without waiting
+    passenger.hall_call = record[6] if len(record) > 6 else not (passenger.arrival_time == passenger.board_time == 0)
+    return passenger
+
+
+def copy_metrics(metrics):
+    copy = dict(metrics)
+    for key, value in metrics.items():
+        if isinstance(value, (Counter, array)):
+            copy[key] = value.copy() if isinstance(value, Counter) else array(value.typecode, value)
+    return copy
+
+
+def snapshot_building(building):
+    # the motion and energy models keep their precomputed tables as arrays
+    snapshot = dict(building)
+    for key in ("motion", "energy"):
+        model = building.get(key)
+        if model is not None:
+            snapshot[key] = dict(model, table=list(model["table"]))
+    return snapshot
+
+
+def restore_building(snapshot):
+    building = dict(snapshot)
+    for key in ("motion", "energy"):
+        model = snapshot.get(key)
+        if model is not None:
+            building[key] = dict(model, table=array("d", model["table"]))
+    return building
+
+
+def snapshot_metrics(metrics):
+    # histograms as [value, count] pairs, JSON would turn their keys into strings
+    snapshot = {}
+    for key, value in metrics.items():
+        if isinstance(value, Counter):
+            value = [[time, count] for time, count in value.items()]
+        elif isinstance(value, array):
+            value = list(value)
+        snapshot[key] = value
+    return snapshot
+
+
+def restore_metrics(snapshot):
+    metrics = dict(snapshot)
+    # snapshots from before the histograms could be bucketed kept exact times
+    metrics.setdefault("resolution", None)
+    for key in ("waits", "rides"):
+        metrics[key] = Counter({time: count for time, count in snapshot[key]})
+    for key in ("arrivals_by_floor", "deliveries_by_floor"):
+        metrics[key] = array("i", snapshot[key])
+    return metrics
+
+
+def snapshot(run):
+    """The whole run as plain lists, dicts and numbers, safe to dump as JSON.
+
+    The per-floor counts, sorted indexes and bit masks aren't stored; restore rebuilds them from
+    the passengers riding and waiting on each floor.
+    """
+    lift = run["lift"]
+    return {"version": SNAPSHOT_VERSION,
+            "building": snapshot_building(lift.building),
+            "lift": {"current_floor": lift.current_floor,
+                     "onboard_passengers": lift.onboard_passengers,
+                     "direction": lift.direction,
+                     "offboard_passengers": lift.offboard_passengers,
+                     "clock": lift.clock,
+                     "next_passenger_id": lift.next_passenger_id,
+                     "initial_onboard": lift.initial_onboard,
+                     "initial_counts": list(lift.initial_counts),
+                     "riding": [[passenger_record(p) for p in riders] for riders in lift.riding],
+                     "waiting": [[passenger_record(p) for p in queue] for queue in lift.waiting],
+                     "delivered": [passenger_record(p) for p in lift.delivered]},
+            "metrics": snapshot_metrics(lift.metrics),
+            "time": dict(run["time"]),
+            "moves": run["moves"],
+            "finished": run["finished"]}
+
+
+def set_requests(lift):
+    # counts, sorted indexes and masks from the riding and waiting passengers
+    for kind, passengers in (("drop_off", lift.riding), ("pick_up", lift.waiting)):
+        counts = array("i", map(len, passengers))
+        setattr(lift, f"{kind}_counts", counts)
+        setattr(lift, f"{kind}_index", [floor for floor, n in enumerate(counts) if n])
+        setattr(lift, f"{kind}_mask", sum(1 << floor for floor, n in enumerate(counts) if n))
+
+
+def restore(snapshot):
+    """A run from snapshot(), ready for resume_run."""
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unknown snapshot version {snapshot.get('version')}")
+    state = snapshot["lift"]
+    lift = create_lift(state["current_floor"], state["onboard_passengers"], state["direction"], 0, None,
+                       state["offboard_passengers"], None, None, restore_building(snapshot["building"]))
+    lift.clock = state["clock"]
+    lift.next_passenger_id = state["next_passenger_id"]
+    lift.initial_onboard = state["initial_onboard"]
+    lift.initial_counts = array("i", state["initial_counts"])
+    lift.riding = [[passenger_from_record(r) for r in riders] for riders in state["riding"]]
+    lift.waiting = [deque(map(passenger_from_record, queue)) for queue in state["waiting"]]
+    lift.delivered = [passenger_from_record(r) for r in state["delivered"]]
+    set_requests(lift)
+    lift.metrics = restore_metrics(snapshot["metrics"])
+
+    run = create_run(lift)
+    run["time"] = dict(snapshot["time"])
+    run["moves"] = snapshot["moves"]
+    run["finished"] = snapshot["finished"]
+    return run
+
+
+def fork(run):
+    """An independent copy of a run, to try something different from the same point.
+
+    Copy on write for the passengers: both lifts share every Passenger record and are marked
+    shared, so board_passengers and alight_passengers copy a record before stamping it. Only the
+    lists holding the records are copied here (pointers, no new passengers), along with the
+    per-floor counts and indexes, the metrics and the time totals. Delivered passengers never
+    change again, so they are shared either way.
+    """
+    lift = run["lift"]
+    copy = create_lift(lift.current_floor, lift.onboard_passengers, lift.direction, 0, None,
+                       lift.offboard_passengers, None, None, lift.building)
+    copy.clock = lift.clock
+    copy.drop_off_counts = array("i", lift.drop_off_counts)
+    copy.drop_off_index = lift.drop_off_index[:]
+    copy.drop_off_mask = lift.drop_off_mask
+    copy.pick_up_counts = array("i", lift.pick_up_counts)
+    copy.pick_up_index = lift.pick_up_index[:]
+    copy.pick_up_mask = lift.pick_up_mask
+    copy.riding = [riders[:] for riders in lift.riding]
+    copy.waiting = [deque(queue) for queue in lift.waiting]
+    lift.shared = copy.shared = True
+    copy.delivered = lift.delivered[:]
+    copy.next_passenger_id = lift.next_passenger_id
+    copy.initial_counts = array("i", lift.initial_counts)
+    copy.initial_onboard = lift.initial_onboard
+    copy.metrics = copy_metrics(lift.metrics)
+
+    branch = create_run(copy)
+    branch["time"] = dict(run["time"])
+    branch["moves"] = run["moves"]
+    branch["finished"] = run["finished"]
+    return branch
+
+
+def run_to_move(run, move, choose_move=find_next_move):
+    """Play a run forward until it has made `move` moves, or finished. Returns the events on the way."""
+    events = []
+    lift = run["lift"]
+    while run["moves"] < move and not run["finished"]:
+        events.extend(make_move(run, choose_move(lift)))
+    return events
+
+
+def finish(run, choose_move=find_next_move):
+    """Play a run to the end and return its FinishedEvent (None if it had already finished)."""
+    final = deque(resume_run(run, choose_move, False), maxlen=1)
+    return final[0] if final else None
+
+
+def alternatives(run, floors=None, choose_move=find_next_move):
+    """What if the next move went to each of `floors` instead? Every floor with a request by default.
+
+    Each alternative is one forced move on its own fork, then choose_move to the end, so the
+    prefix of the run is never simulated again. Returns {floor: FinishedEvent}.
+    """
+    lift = run["lift"]
+    if floors is None:
+        floors = sorted(set(lift.drop_off_index) | set(lift.pick_up_index))
+    results = {}
+    for floor in floors:
+        branch = fork(run)
+        # face the forced stop, as a policy choosing it would have
+        if floor != lift.current_floor:
+            branch["lift"].direction = 1 if floor > lift.current_floor else 0
+        deque(make_move(branch, floor), maxlen=0)
+        results[floor] = finish(branch, choose_move)
+    return results
+
+
+def save_checkpoint(run, path):
+    # written next to the target and renamed over it, so a crash mid-write keeps the last good checkpoint
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(snapshot(run), f)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path):
+    with open(path) as f:
+        return restore(json.load(f))
+
+
+def run_with_checkpoints(run, path, every=1000, choose_move=find_next_move, check_invariants=True):
+    """resume_run, saving a checkpoint to `path` after every `every` moves and once more at the end."""
+    for event in resume_run(run, choose_move, check_invariants):
+        yield event
+        # a LOAD event ends a move, the lift is in a consistent state to save
+        if event.kind == "LOAD" and run["moves"] % every == 0:
+            save_checkpoint(run, path)
+    save_checkpoint(run, path)
+
+
+def main():
+    # python elevator_state.py <lift() arguments as for schindler.py> [at=N] [save=run.json]
+    #     run to move N, print what every other next move would have cost, optionally checkpoint there
+    # python elevator_state.py resume=run.json [policy=greedy]
+    #     carry on from a checkpoint to the end
+    from elevator_policies import get_policy
+
+    if len(sys.argv) > 1 and sys.argv[1].startswith("resume="):
+        options = parse_options(sys.argv[1:])
+        run = load_checkpoint(options["resume"])
+        for event in resume_run(run, get_policy(options.get("policy", "greedy"))):
+            print(format_event(event))
+        return
+
+    *args, building, policy = get_input()
+    options = parse_options(sys.argv[9:])
+    choose_move = get_policy(policy)
+    lift = create_lift(*args, building)
+    error = input_error(lift)
+    if error is not None:
+        print(error)
+        sys.exit(1)
+    run = create_run(index_requests(lift))
+
+    for event in run_to_move(run, int(options.get("at", 0)), choose_move):
+        print(format_event(event))
+    if "save" in options:
+        save_checkpoint(run, options["save"])
+        print(f"Saved the run after move {run['moves']} to {options['save']}")
+
+    chosen = choose_move(fork(run)["lift"])
+    print(f"\nAfter move {run['moves']}, at floor {lift.current_floor}, {policy} would go to {chosen}. Alternatives:")
+    print(f"{'next':>5} {'total':>9} {'onboard':>9} {'offboard':>9} {'initial':>9}")
+    for floor, final in alternatives(run, choose_move=choose_move).items():
+        mark = " *" if floor == chosen else ""
+        print(f"{floor:>5} {final.time:>9} {final.onboard_waiting_time:>9} {final.offboard_waiting_time:>9} {final.initial_passenger_time:>9}{mark}")
+
+
+if __name__ == "__main__":
+    main()
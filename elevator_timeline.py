@@ -0,0 +1,173 @@
+# elevator_timeline.py
+
+# Turns parsed events into keyframes so a renderer can ask "where is everything at time t?"
+# instead of chaining animations. Used by the Tk frontend and the headless renderer.
+
+from bisect import bisect_right
+
+LIFT_WIDTH = 80
+SHAFT_SPACING = 220     # horizontal distance between neighbouring cars' shafts
+
+# timeline seconds are the simulation's own, so 1x playback is real time
+SECONDS_PER_FLOOR = 1.0     # travel time without a motion model, used to start a move that followed a wait
+BOARD_TIME = 0.3            # passengers walking in or out, all at once
+
+
+def create_layout(num_floors=4, num_cars=1, floor_height=None):
+    """Screen positions for a building. The default is the original 4 floor, 300x450 picture."""
+    if floor_height is None:
+        floor_height = 100 if num_floors <= 4 else max(12, 800 // num_floors)
+    top = 50
+    layout = {"num_floors": num_floors,
+              "num_cars": num_cars,
+              "floor_height": floor_height,
+              "floor_y": {f: top + (num_floors - 1 - f) * floor_height for f in range(num_floors)},
+              "lift_height": round(floor_height * 0.6),
+              "width": 300 + (num_cars - 1) * SHAFT_SPACING,
+              "height": top + num_floors * floor_height}
+    return layout
+
+
+def shaft_x(car):
+    # left edge offset of a car's column, car 0 is where the original single shaft was
+    return car * SHAFT_SPACING
+
+
+def draw_static_building(canvas, layout=None):
+    """Floors and shafts. Only needs create_line/create_rectangle, so it draws on a Tk canvas or an image."""
+    if layout is None:
+        layout = create_layout()
+    lift_height = layout["lift_height"]
+    # thinner lines once floors get close together
+    width = 3 if layout["floor_height"] >= 40 else 1
+
+    for car in range(layout["num_cars"]):
+        dx = shaft_x(car)
+        for y in layout["floor_y"].values():
+            canvas.create_line(dx + 50, y + lift_height, dx + 250, y + lift_height, width=width)
+        canvas.create_rectangle(dx + 100, 20, dx + 200, layout["height"] - 30, outline="black", width=3)
+
+
+def lift_passenger_slots(floor_y, num, lift_height, x_offset=0):
+    """Return horizontal x positions for N passengers inside lift."""
+    base_x = x_offset + 110 + 10
+    spacing = (LIFT_WIDTH - 20) // max(1, num)
+    y = floor_y + lift_height // 2
+    return [(base_x + i * spacing, y) for i in range(num)]
+
+
+def new_track(t, point):
+    return {"times": [t], "points": [point]}
+
+
+def hold(track, t):
+    # stay where the last key left off until t, so the next key starts moving from there
+    if t > track["times"][-1]:
+        track["times"].append(t)
+        track["points"].append(track["points"][-1])
+
+
+def move_to(track, t0, t1, point):
+    # glide from wherever the track is at t0 to point at t1, never before a glide already under way ends
+    hold(track, t0)
+    track["times"].append(max(t1, track["times"][-1]))
+    track["points"].append(point)
+
+
+def position_at(track, t):
+    """Linear interpolation between keyframes, clamped at both ends."""
+    times, points = track["times"], track["points"]
+    i = bisect_right(times, t)
+    if i == 0:
+        return points[0]
+    if i == len(times):
+        return points[-1]
+    t0, t1 = times[i - 1], times[i]
+    (x0, y0), (x1, y1) = points[i - 1], points[i]
+    if t1 == t0:
+        return (x1, y1)
+    f = (t - t0) / (t1 - t0)
+    return (x0 + (x1 - x0) * f, y0 + (y1 - y0) * f)
+
+
+def build_timeline(car_events, layout, start_floors=None, start=None):
+    """Keyframes for every car and passenger icon.
+
+    car_events is a list with one parsed event list (from parse_events/parse_record/parse_log) per car.
+    Keyframes sit at the times on the events, less `start` (0 by default), so all the cars share one
+    clock and timeline seconds are simulated seconds. A car reaches each floor at its MOVE event's
+    time; after a stop it leaves as late as one floor per SECONDS_PER_FLOOR allows, so a car that
+    stood idle doesn't creep there. The events don't say when hall calls were made, so waiting
+    icons are on screen from the start. Icons have an appear/vanish time, vanish is None if they
+    are still on screen at the end.
+    """
+    floor_y = layout["floor_y"]
+    lift_height = layout["lift_height"]
+    if start_floors is None:
+        start_floors = [0] * len(car_events)
+    origin = start or 0.0
+
+    cars, icons = [], []
+    duration = 0.0
+
+    for car, events in enumerate(car_events):
+        dx = shaft_x(car)
+        floor = start_floors[car]
+        car_track = new_track(0.0, (dx + 110, floor_y[floor]))
+        cars.append(car_track)
+
+        # waiting icons are all drawn up front, queued horizontally toward the shaft
+        waiting = {f: [] for f in floor_y}
+        for ev in events:
+            if ev[0] == "PICKUP":
+                _, pickup_floor, count, _ = ev
+                for _ in range(count):
+                    idx = len(waiting[pickup_floor])
+                    icon = {"car": car, "appear": 0.0, "vanish": None,
+                            "track": new_track(0.0, (dx + 260 - idx * 35, floor_y[pickup_floor] + 15))}
+                    waiting[pickup_floor].append(icon)
+                    icons.append(icon)
+
+        riding = []
+        free = 0.0      # when the car can leave, once the doors have seen everyone in and out
+        for ev in events:
+            etype = ev[0]
+            t = max(0.0, ev[-1] - origin)
+
+            if etype == "MOVE":
+                target = ev[1]
+                if target != floor:
+                    leave = min(t, max(free, t - abs(target - floor) * SECONDS_PER_FLOOR))
+                    move_to(car_track, leave, t, (dx + 110, floor_y[target]))
+                    # riders move with the car, keeping their x
+                    for icon in riding:
+                        x = icon["track"]["points"][-1][0]
+                        move_to(icon["track"], leave, t, (x, floor_y[target] + lift_height // 2))
+                floor = target
+                free = t
+
+            elif etype == "PICKUP":
+                _, pickup_floor, count, _ = ev
+                for _ in range(count):
+                    if not waiting[pickup_floor]:
+                        continue
+                    icon = waiting[pickup_floor].pop(0)
+                    slot = lift_passenger_slots(floor_y[floor], len(riding) + 1, lift_height, dx)[-1]
+                    move_to(icon["track"], t, t + BOARD_TIME, slot)
+                    riding.append(icon)
+                free = max(free, t + BOARD_TIME)
+
+            elif etype == "DROPOFF":
+                _, dropoff_floor, count, _ = ev
+                # everyone leaving walks out at once
+                for _ in range(count):
+                    if not riding:
+                        break
+                    icon = riding.pop()
+                    move_to(icon["track"], t, t + BOARD_TIME, (dx + 250, floor_y[dropoff_floor] + 15))
+                    icon["vanish"] = t + BOARD_TIME
+                free = max(free, t + BOARD_TIME)
+
+            duration = max(duration, free, t)
+
+    return {"duration": duration, "cars": cars, "icons": icons}
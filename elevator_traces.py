@@ -0,0 +1,171 @@
+# elevator_traces.py
+
+# Hall-call traces on disk, one call per line:
+#   CSV    time,origin,destination[,car]   (a header row is optional)
+#   JSONL  {"time": 12.5, "origin": 0, "destination": 7, "car": 2}
+# Rows are read, checked and handed to the simulator one at a time, so the trace itself is never
+# held in memory. The simulation still keeps every delivered passenger unless it runs with
+# streaming=True (see elevator_simulation), which a long trace should.
+
+import os
+import sys
+import mmap
+import json
+from schindler import create_building, parse_options
+from elevator_simulation import create_simulation, run_simulation, summarize
+
+COLUMNS = ("time", "origin", "destination", "car")
+ALIASES = {"timestamp": "time", "car_id": "car"}
+
+
+def header_columns(fields):
+    # positions of the known columns in a header row
+    names = [ALIASES.get(name, name) for name in (f.strip().lower() for f in fields)]
+    missing = [name for name in COLUMNS[:3] if name not in names]
+    if missing:
+        raise ValueError(f"Trace header is missing {', '.join(missing)}")
+    return [names.index(name) if name in names else None for name in COLUMNS]
+
+
+def read_csv_trace(path):
+    """Yield (line, time, origin, destination, car) from a CSV trace.
+
+    The file is memory-mapped and split line by line, so nothing but the current row is held.
+    Values are left as they are parsed; validate_trace checks them.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            positions = [0, 1, 2, 3]
+            line_number = 0
+            first = True
+            for raw in iter(mm.readline, b""):
+                line_number += 1
+                raw = raw.strip()
+                if not raw or raw.startswith(b"#"):
+                    continue
+                fields = raw.split(b",")
+                # the header, if any, is the first row after blank lines and comments
+                if first:
+                    first = False
+                    if not fields[0].strip().lstrip(b"-").replace(b".", b"", 1).isdigit():
+                        positions = header_columns(field.decode() for field in fields)
+                        continue
+
+                try:
+                    t = float(fields[positions[0]])
+                    origin = int(fields[positions[1]])
+                    destination = int(fields[positions[2]])
+                except (ValueError, IndexError):
+                    yield line_number, None, None, None, raw.decode(errors="replace")
+                    continue
+                car = positions[3]
+                car = (fields[car].strip().decode() or None) if car is not None and car < len(fields) else None
+                yield line_number, t, origin, destination, car
+
+
+def read_jsonl_trace(path):
+    """Yield (line, time, origin, destination, car) from a JSON lines trace."""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                row = json.loads(line)
+                t = float(row.get("time", row.get("timestamp")))
+                origin = int(row["origin"])
+                destination = int(row["destination"])
+            except (ValueError, TypeError, KeyError, AttributeError):
+                yield line_number, None, None, None, line
+                continue
+            car = row.get("car", row.get("car_id"))
+            yield line_number, t, origin, destination, None if car is None else str(car)
+
+
+def read_trace(path):
+    # .jsonl/.json are JSON lines, anything else is read as CSV
+    if path.endswith((".jsonl", ".json")):
+        return read_jsonl_trace(path)
+    return read_csv_trace(path)
+
+
+def row_error(t, origin, destination, top_floor, last_time):
+    #returns a message for the first problem with one call, or None if it is valid
+    # same floor rules as input_error, checked per row
+    if t is None:
+        return "could not read time, origin and destination"
+    if t < 0:
+        return f"Negative value detected for time: {t}."
+    if t < last_time:
+        return f"calls must be sorted by time, got {t} after {last_time}"
+    if not 0 <= origin <= top_floor:
+        return f"Pick-up floor {origin} out of range. Floors are 0 to {top_floor}"
+    if not 0 <= destination <= top_floor:
+        return f"Pick-up destination {destination} out of range. Floors are 0 to {top_floor}"
+    return None
+
+
+def validate_trace(rows, building, skip_invalid=False, car=None, stats=None):
+    """Check rows from read_trace as they stream past and yield (time, origin, destination, car).
+
+    A bad row raises ValueError naming its line, or is dropped with skip_invalid and counted in
+    stats["skipped"]. Pass car to keep only the calls assigned to that car.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(rows=0, skipped=0)
+    top_floor = building["top_floor"]
+    last_time = 0.0
+    for line_number, t, origin, destination, row_car in rows:
+        stats["rows"] += 1
+        message = row_error(t, origin, destination, top_floor, last_time)
+        if message is not None:
+            if skip_invalid:
+                stats["skipped"] += 1
+                continue
+            detail = f" ({row_car})" if t is None else ""
+            raise ValueError(f"Line {line_number}: {message}{detail}")
+        last_time = t
+        if car is not None and row_car != car:
+            continue
+        yield t, origin, destination, row_car
+
+
+def run_trace(path, building=None, door_time=0.0, skip_invalid=False, car=None, streaming=False):
+    """Stream a trace file through the discrete-event simulator and return the finished sim.
+
+    sim["trace"] holds how many rows were read and skipped. streaming=True runs the simulation in
+    its streaming mode, so memory stays flat however long the trace.
+    """
+    if building is None:
+        building = create_building()
+    sim = create_simulation(building, door_time=door_time, streaming=streaming)
+    sim["trace"] = {}
+    calls = validate_trace(read_trace(path), building, skip_invalid, car, sim["trace"])
+    return run_simulation(sim, calls)
+
+
+def main():
+    # python elevator_traces.py <trace.csv|trace.jsonl> [floors=4] [capacity=5] [door_time=0] [car=ID] [skip_invalid=1] [streaming=1]
+    if len(sys.argv) < 2:
+        print("Usage: python elevator_traces.py <trace.csv|trace.jsonl> [floors=4] [capacity=5] [door_time=0] [car=ID] [skip_invalid=1] [streaming=1]")
+        sys.exit(1)
+    options = parse_options(sys.argv[2:])
+    building = create_building(int(options.get("floors", 4)), int(options.get("capacity", 5)))
+
+    try:
+        sim = run_trace(sys.argv[1], building, float(options.get("door_time", 0)),
+                        options.get("skip_invalid", "0") not in ("0", ""), options.get("car"),
+                        options.get("streaming", "0") not in ("0", ""))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    summary = summarize(sim)
+    summary["trace"] = sim["trace"]
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# elevator_traffic.py
+
+# Seeded synthetic hall calls for the standard lift traffic patterns. Arrivals are a Poisson
+# process (exponential gaps at `rate` calls per second) and each call is one of three kinds:
+#   incoming    lobby -> an upper floor
+#   outgoing    an upper floor -> lobby
+#   interfloor  one floor -> any other floor
+# A profile is just the mix of the three. Calls are drawn in NumPy blocks. Every random column
+# comes from its own child generator of the seed and takes exactly one draw per call, so the
+# same seed gives the same calls whatever the block size (times agree to float rounding, as
+# they are running sums).
+
+import sys
+import numpy as np
+from schindler import create_building, parse_options
+
+# (incoming, outgoing, interfloor) shares
+PROFILES = {"up_peak": (0.85, 0.05, 0.10),
+            "down_peak": (0.05, 0.85, 0.10),
+            "lunch": (0.45, 0.45, 0.10),
+            "interfloor": (0.0, 0.0, 1.0)}
+
+INCOMING, OUTGOING, INTERFLOOR = 0, 1, 2
+
+
+def create_traffic(profile, num_floors, rate=0.2, seed=0, lobby=0):
+    """Generator state for one profile. rate is calls per second across the building."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown traffic profile {profile}. Choose from {', '.join(PROFILES)}")
+    if num_floors < 2:
+        raise ValueError("Traffic needs at least 2 floors")
+    if not 0 <= lobby < num_floors:
+        raise ValueError(f"Lobby {lobby} out of range. Floors are 0 to {num_floors - 1}")
+
+    streams = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(5)]
+    traffic = {"profile": profile,
+               "mix": np.array(PROFILES[profile]),
+               "num_floors": num_floors,
+               "rate": rate,
+               "lobby": lobby,
+               "clock": 0.0,
+               "times": streams[0],
+               "kinds": streams[1],
+               "upper": streams[2],
+               "origins": streams[3],
+               "destinations": streams[4]}
+    return traffic
+
+
+def uniform_floors(rng, n, size):
+    # uniform over 0..n-1 from one double per call (rng.integers buffers draws between calls)
+    return (rng.random(size) * n).astype(np.int64)
+
+
+def other_floor(rng, n, exclude, size):
+    # uniform over 0..n-1 without `exclude`: draw from n-1 values and step over the excluded one
+    pick = uniform_floors(rng, n - 1, size)
+    return pick + (pick >= exclude)
+
+
+def next_block(traffic, size):
+    """The next `size` calls as three arrays: time (float seconds), origin, destination."""
+    n, lobby = traffic["num_floors"], traffic["lobby"]
+
+    gaps = traffic["times"].exponential(1 / traffic["rate"], size)
+    times = traffic["clock"] + np.cumsum(gaps)
+    traffic["clock"] = float(times[-1]) if size else traffic["clock"]
+
+    kinds = np.searchsorted(np.cumsum(traffic["mix"]), traffic["kinds"].random(size), side="right")
+    kinds = np.minimum(kinds, INTERFLOOR)
+    # one upper floor per call for incoming/outgoing, and a free origin/destination pair for interfloor
+    upper = other_floor(traffic["upper"], n, lobby, size)
+    anywhere = uniform_floors(traffic["origins"], n, size)
+    elsewhere = other_floor(traffic["destinations"], n, anywhere, size)
+
+    origin = np.where(kinds == INCOMING, lobby, np.where(kinds == OUTGOING, upper, anywhere))
+    destination = np.where(kinds == INCOMING, upper, np.where(kinds == OUTGOING, lobby, elsewhere))
+    return times, origin, destination
+
+
+def generate_arrays(profile, num_floors, count, rate=0.2, seed=0, lobby=0):
+    """`count` calls at once as NumPy arrays (times, origins, destinations)."""
+    return next_block(create_traffic(profile, num_floors, rate, seed, lobby), count)
+
+
+def generate_calls(profile, num_floors, rate=0.2, duration=None, count=None, seed=0, lobby=0, block=65536):
+    """Yield (time, origin, destination) calls, sorted by time, until `duration` seconds or `count`
+    calls (forever if neither is given). Feed it straight to elevator_simulation.run_simulation."""
+    traffic = create_traffic(profile, num_floors, rate, seed, lobby)
+    remaining = count
+    while remaining is None or remaining > 0:
+        size = block if remaining is None else min(block, remaining)
+        times, origins, destinations = next_block(traffic, size)
+        finished = duration is not None and times[-1] > duration
+        if finished:
+            size = int(np.searchsorted(times, duration, side="right"))
+        # tolist gives plain Python numbers, which the simulator's bit masks and indexes expect
+        yield from zip(times[:size].tolist(), origins[:size].tolist(), destinations[:size].tolist())
+        if finished:
+            return
+        if remaining is not None:
+            remaining -= size
+
+
+def traffic_scenarios(profile, num_floors, calls, count, capacity=5, rate=0.2, seed=0, lobby=0):
+    """`count` lift()/batch scenarios, each an empty car at the lobby with `calls` calls from the profile."""
+    building = create_building(num_floors, capacity)
+    traffic = create_traffic(profile, num_floors, rate, seed, lobby)
+    for _ in range(count):
+        _, origins, destinations = next_block(traffic, calls)
+        yield {"current_floor": lobby,
+               "onboard_passengers": 0,
+               "direction": 1,
+               "passengers_drop_off": 0,
+               "drop_off_floors": [],
+               "offboard_passengers": calls,
+               "pick_up_floors": origins.tolist(),
+               "pick_up_destinations": destinations.tolist(),
+               "building": building}
+
+
+def write_trace(calls, path):
+    # CSV in the format elevator_traces reads
+    with open(path, "w") as f:
+        f.write("time,origin,destination\n")
+        for t, origin, destination in calls:
+            f.write(f"{t:.3f},{origin},{destination}\n")
+
+
+def main():
+    # python elevator_traffic.py <up_peak|down_peak|lunch|interfloor> [trace.csv] [floors=20] [capacity=8] [rate=0.2] [duration=3600] [seed=0] [door_time=2]
+    if len(sys.argv) < 2:
+        print("Usage: python elevator_traffic.py <up_peak|down_peak|lunch|interfloor> [trace.csv] [floors=20] [capacity=8] [rate=0.2] [duration=3600] [seed=0] [door_time=2]")
+        sys.exit(1)
+    args = sys.argv[2:]
+    path = args.pop(0) if args and "=" not in args[0] else None
+    options = parse_options(args)
+    num_floors = int(options.get("floors", 20))
+
+    try:
+        calls = generate_calls(sys.argv[1], num_floors, float(options.get("rate", 0.2)),
+                               float(options.get("duration", 3600)), seed=int(options.get("seed", 0)))
+        if path:
+            write_trace(calls, path)
+            return
+        from elevator_simulation import create_simulation, run_simulation, summarize
+        building = create_building(num_floors, int(options.get("capacity", 8)))
+        sim = run_simulation(create_simulation(building, door_time=float(options.get("door_time", 2))), calls)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print(summarize(sim))
+
+
+if __name__ == "__main__":
+    main()
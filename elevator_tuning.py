@@ -0,0 +1,197 @@
+# elevator_tuning.py
+
+# Searches the greedy rules' thresholds (schindler.DEFAULT_PARAMS) over a corpus of scenarios.
+# Candidates are drawn at random from SPACE and thinned by successive halving: every candidate
+# is scored on the first few scenarios, the best 1/eta go on to eta times as many, and so on
+# until one is left or the corpus runs out, so most of the time goes on the promising ones.
+#
+# Each (parameter set, scenario) result is appended to a JSONL cache as soon as it comes back,
+# keyed by the policy name and a hash of the scenario, so an interrupted sweep picks up where
+# it stopped and a rerun with another objective scores from the cache. Scoring goes through
+# elevator_batch.iter_batch, which spreads scenarios over a local process pool.
+
+import sys
+import json
+import random
+import hashlib
+from schindler import DEFAULT_PARAMS, parse_options
+from elevator_batch import iter_batch
+from elevator_policies import params_spec
+
+# a (low, high) pair is a float range, anything else a list of values to choose from
+SPACE = {"fill_limit": (0.5, 1.0),
+         "detour": [0, 1, 2, 3],
+         "min_waiting": [1, 2, 3],
+         "reverse_margin": [None, 0, 1, 2, 3, 4, 6]}
+
+# lower is better. each reads a cached result: the time totals, latency and energy used
+OBJECTIVES = {"journey": lambda result: result["time"]["onboard_waiting_time"] + result["time"]["offboard_waiting_time"],
+              "wait": lambda result: result["time"]["offboard_waiting_time"],
+              "time": lambda result: result["time"]["total_time"],
+              "p95": lambda result: result["latency"]["journey_p95"],
+              "energy": lambda result: result["energy_kwh"]}
+
+
+def sample_params(rng, space=SPACE):
+    params = {}
+    for key, values in space.items():
+        if isinstance(values, tuple):
+            params[key] = round(rng.uniform(*values), 2)
+        else:
+            params[key] = rng.choice(values)
+    return params
+
+
+def random_candidates(count, seed=0, space=SPACE):
+    """`count` distinct parameter sets, the defaults first so every sweep has the baseline to beat."""
+    rng = random.Random(seed)
+    candidates = {params_spec(DEFAULT_PARAMS): dict(DEFAULT_PARAMS)}
+    # a small space can have fewer distinct sets than asked for
+    for _ in range(count * 20):
+        if len(candidates) >= count:
+            break
+        params = sample_params(rng, space)
+        candidates.setdefault(params_spec(params), params)
+    return candidates
+
+
+def scenario_key(scenario):
+    # buildings with a motion or energy model hold arrays, which hash as lists
+    text = json.dumps(scenario, sort_keys=True, default=list)
+    return hashlib.sha1(text.encode()).hexdigest()[:20]
+
+
+def load_cache(path):
+    """{(policy, scenario key): result} from a cache file, skipping a line cut short by an interrupted write."""
+    cache = {}
+    if path is None:
+        return cache
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                cache[entry["policy"], entry["scenario"]] = entry["result"]
+    except FileNotFoundError:
+        pass
+    return cache
+
+
+def open_cache(path):
+    # for appending, on a new line if an interrupted write left the last one cut short
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, 2)
+            complete = f.read(1) == b"\n"
+    except OSError:
+        complete = True         # missing or empty
+    cache_file = open(path, "a")
+    if not complete:
+        cache_file.write("\n")
+    return cache_file
+
+
+def score_candidates(specs, scenarios, keys, cache, objective, cache_file=None, max_workers=None):
+    """Mean objective of each policy name over the scenarios, running only the pairs not in the cache."""
+    missing = [(spec, i) for spec in specs for i in range(len(scenarios)) if (spec, keys[i]) not in cache]
+    jobs = (dict(scenarios[i], policy=spec) for spec, i in missing)
+    for (spec, i), result in zip(missing, iter_batch(jobs, max_workers, chunksize=16)):
+        if result["error"] is not None:
+            raise ValueError(f"Scenario {i} can't be run: {result['error']}")
+        kept = {"time": result["time"], "latency": result["latency"], "energy_kwh": result["metrics"]["energy_kwh"]}
+        cache[spec, keys[i]] = kept
+        if cache_file is not None:
+            cache_file.write(json.dumps({"policy": spec, "scenario": keys[i], "result": kept}) + "\n")
+            cache_file.flush()
+
+    measure = OBJECTIVES[objective]
+    return {spec: sum(measure(cache[spec, key]) for key in keys) / len(keys) for spec in specs}
+
+
+def successive_halving(candidates, scenarios, objective="journey", eta=3, min_scenarios=10,
+                       cache_path=None, max_workers=None):
+    """Run the sweep and return the ranked report: one entry per candidate with its parameters,
+    how many scenarios it got to and its mean score there, best first."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective}. Choose from {', '.join(OBJECTIVES)}")
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    if not scenarios:
+        raise ValueError("No scenarios to tune on")
+
+    keys = [scenario_key(s) for s in scenarios]
+    cache = load_cache(cache_path)
+    cache_file = open_cache(cache_path) if cache_path is not None else None
+    reached = {}
+    try:
+        alive = list(candidates)
+        budget = min(min_scenarios, len(scenarios))
+        rung = 0
+        while True:
+            scores = score_candidates(alive, scenarios[:budget], keys[:budget], cache, objective, cache_file, max_workers)
+            for spec in alive:
+                reached[spec] = (rung, budget, scores[spec])
+            if len(alive) == 1 or budget == len(scenarios):
+                break
+            alive = sorted(alive, key=scores.get)[:max(1, len(alive) // eta)]
+            budget = min(len(scenarios), budget * eta)
+            rung += 1
+    finally:
+        if cache_file is not None:
+            cache_file.close()
+
+    # further rungs first, then the better score
+    ranked = sorted(reached, key=lambda spec: (-reached[spec][0], reached[spec][2]))
+    return [{"rank": rank, "policy": spec, "params": candidates[spec], "rung": reached[spec][0],
+             "scenarios": reached[spec][1], "score": reached[spec][2]}
+            for rank, spec in enumerate(ranked, 1)]
+
+
+def format_report(report, objective, limit=10):
+    baseline = params_spec(DEFAULT_PARAMS)
+    keys = list(SPACE)
+    lines = [f"{'rank':>4} {'rung':>4} {'scenarios':>9} {objective:>12}  " + " ".join(f"{key:>14}" for key in keys)]
+    for entry in report[:limit] + [e for e in report[limit:] if e["policy"] == baseline]:
+        values = " ".join(f"{str(entry['params'][key]):>14}" for key in keys)
+        mark = "  (defaults)" if entry["policy"] == baseline else ""
+        lines.append(f"{entry['rank']:>4} {entry['rung']:>4} {entry['scenarios']:>9} {entry['score']:>12.2f}  {values}{mark}")
+    return "\n".join(lines)
+
+
+def main():
+    # python elevator_tuning.py [scenarios.jsonl] [candidates=27] [eta=3] [min_scenarios=10] [objective=journey]
+    #     [cache=tuning_cache.jsonl] [report=tuning.json] [workers=] [seed=0]
+    #     [profile=lunch floors=20 capacity=8 calls=12 count=270]    (the corpus when no file is given)
+    args = sys.argv[1:]
+    path = args.pop(0) if args and "=" not in args[0] else None
+    options = parse_options(args)
+
+    if path is not None:
+        with open(path) as f:
+            scenarios = [json.loads(line) for line in f if line.strip()]
+    else:
+        from elevator_traffic import traffic_scenarios
+        num_floors, capacity = int(options.get("floors", 20)), int(options.get("capacity", 8))
+        scenarios = list(traffic_scenarios(options.get("profile", "lunch"), num_floors, int(options.get("calls", 12)),
+                                           int(options.get("count", 270)), capacity, seed=int(options.get("seed", 0))))
+
+    objective = options.get("objective", "journey")
+    workers = int(options["workers"]) if "workers" in options else None
+    try:
+        candidates = random_candidates(int(options.get("candidates", 27)), int(options.get("seed", 0)))
+        report = successive_halving(candidates, scenarios, objective, int(options.get("eta", 3)),
+                                    int(options.get("min_scenarios", 10)), options.get("cache", "tuning_cache.jsonl"), workers)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print(format_report(report, objective))
+    if "report" in options:
+        with open(options["report"], "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
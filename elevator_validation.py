@@ -0,0 +1,207 @@
+# elevator_validation.py
+
+# The input_error rules applied to whole batches of scenarios at once with NumPy.
+# input_error stops at the first problem; here every problem in every scenario is reported
+# as a Violation, so a bad batch can be fixed in one pass.
+
+from itertools import chain
+from typing import NamedTuple
+import numpy as np
+from schindler import create_building, whole_number, MALFORMED_INPUT
+
+# the floor lists checked against the building, with the names input_error uses for them
+FLOOR_LISTS = (("drop_off_floors", "Drop-off floor"),
+               ("pick_up_floors", "Pick-up floor"),
+               ("pick_up_destinations", "Pick-up destination"))
+
+
+class Violation(NamedTuple):
+    scenario: int           # position of the scenario in the batch
+    field: str              # the lift() argument at fault
+    index: int              # position in the list for floor lists, None for plain values
+    value: object
+    message: str
+
+
+def whole_values(values, field, odd, owners, indexes=None):
+    """values with anything that isn't a whole number replaced by 0, each one noted in the odd dict
+    under its scenario as (field, index, value). np.fromiter would otherwise truncate 2.5 to 2 and read True as 1."""
+    # nearly every batch is all ints, which one pass over the types shows. whole_number is input_error's own test
+    if set(map(type, values)) <= {int}:
+        return values
+    cleaned = []
+    for i, value in enumerate(values):
+        if whole_number(value):
+            cleaned.append(value)
+        else:
+            k = int(owners[i])
+            odd[k] = odd.get(k, ()) + ((field, None if indexes is None else int(indexes[i]), value),)
+            cleaned.append(0)
+    return cleaned
+
+
+def scalar_column(scenarios, key, odd):
+    n = len(scenarios)
+    values = whole_values([s[key] for s in scenarios], key, odd, range(n))
+    return np.fromiter(values, dtype=np.int64, count=n)
+
+
+def list_column(scenarios, key, odd):
+    # every scenario's list end to end, plus which scenario and list position each value came from
+    lists = [s[key] for s in scenarios]
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    owner = np.repeat(np.arange(len(scenarios)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    index = np.arange(len(owner)) - starts[owner]
+    kinds = set(map(type, lists))
+    if kinds == {np.ndarray} and all(floors.dtype.kind in "iu" for floors in lists):
+        # already integer arrays (e.g. from a generator), joined without going through Python ints
+        values = np.concatenate(lists).astype(np.int64, copy=False)
+    else:
+        if np.ndarray in kinds:
+            lists = [floors.tolist() if isinstance(floors, np.ndarray) else floors for floors in lists]
+        flat = whole_values(list(chain.from_iterable(lists)), key, odd, owner, index)
+        values = np.fromiter(flat, dtype=np.int64, count=len(flat))
+    return values, owner, index, lengths
+
+
+def scenario_columns(scenarios):
+    """Every field input_error checks, as arrays: one entry per scenario for the plain numbers, the
+    building's top_floor and capacity, and list_column's (values, owner, index, lengths) for the floor lists.
+    Values that aren't whole numbers are 0 in the arrays and listed per scenario in "odd", and
+    "clean" is False for those scenarios."""
+    n = len(scenarios)
+    default = create_building()
+    buildings = [s.get("building") or default for s in scenarios]
+    columns = {"top_floor": np.fromiter((b["top_floor"] for b in buildings), dtype=np.int64, count=n),
+               "capacity": np.fromiter((b["capacity"] for b in buildings), dtype=np.int64, count=n)}
+    odd = {}
+    for key in ("current_floor", "onboard_passengers", "direction", "offboard_passengers"):
+        columns[key] = scalar_column(scenarios, key, odd)
+    for key, _ in FLOOR_LISTS:
+        columns[key] = list_column(scenarios, key, odd)
+    # filled in one at a time, np.array would turn a batch of equal length tuples into a 2D array
+    columns["odd"] = np.full(n, None, dtype=object)
+    columns["clean"] = np.ones(n, dtype=bool)
+    for k, found in odd.items():
+        columns["odd"][k] = found
+        columns["clean"][k] = False
+    return columns
+
+
+def readable_columns(scenarios):
+    """scenario_columns for the scenarios that can be read, their positions in the batch, and
+    {position: Violation} for the ones that can't (a missing key, a floor list that isn't a list)."""
+    try:
+        return scenario_columns(scenarios), range(len(scenarios)), {}
+    except MALFORMED_INPUT:
+        pass
+    # one at a time to find the culprits, only paid for when there are some
+    unreadable = {}
+    for k, scenario in enumerate(scenarios):
+        try:
+            scenario_columns([scenario])
+        except MALFORMED_INPUT as e:
+            unreadable[k] = Violation(k, None, None, None, f"Malformed scenario: {type(e).__name__}: {e}")
+    readable = [k for k in range(len(scenarios)) if k not in unreadable]
+    return scenario_columns([scenarios[k] for k in readable]), readable, unreadable
+
+
+def validate_batch(scenarios):
+    """Check a list of scenario dicts (lift() keyword arguments, with an optional "building").
+
+    Returns a list with one list of Violations per scenario, empty when the scenario is valid.
+    Floor lists may be Python lists or NumPy arrays; arrays skip the conversion, which is most of the cost.
+    """
+    columns, readable, unreadable = readable_columns(scenarios)
+    if not unreadable:
+        return validate_columns(columns)
+    violations = [[unreadable[k]] if k in unreadable else None for k in range(len(scenarios))]
+    for k, found in zip(readable, validate_columns(columns)):
+        violations[k] = [v._replace(scenario=k) for v in found]
+    return violations
+
+
+def validate_columns(columns):
+    """validate_batch on columns already made by scenario_columns.
+
+    Each scenario's violations come in the order input_error checks them, so the first one is the
+    message input_error would give.
+    """
+    top_floor, capacity = columns["top_floor"], columns["capacity"]
+    n = len(top_floor)
+    violations = [[] for _ in range(n)]
+    order = {}          # scenario -> (rank, index) of each of its violations, to sort by
+    if n == 0:
+        return violations
+
+    # input_error's order: the floors (each list by position), whole numbers, capacity, negative
+    # load, drop-off count, negative values, direction, pick-up consistency
+    rank = {"current_floor": 0, "drop_off_floors": 1, "pick_up_floors": 2, "pick_up_destinations": 3,
+            "whole:onboard_passengers": 4, "whole:direction": 5, "whole:offboard_passengers": 6,
+            "capacity": 7, "ghost": 8, "drop_off_count": 9,
+            "negative:direction": 10, "negative:offboard_passengers": 11, "direction": 12, "consistency": 13}
+
+    def add(check, k, field, index, value, message):
+        violations[k].append(Violation(k, field, index, value, message))
+        order.setdefault(k, []).append((rank[check], -1 if index is None else index))
+
+    def report(check, mask, field, message, values, index=None, owner=None):
+        # one Violation per flagged entry, message is called with (value, scenario)
+        for i in np.flatnonzero(mask):
+            k = int(owner[i]) if owner is not None else int(i)
+            value = values[i].item()
+            add(check, k, field, None if index is None else int(index[i]), value, message(value, k))
+
+    # numbers that aren't whole numbers, with the messages input_error gives them
+    labels = dict(FLOOR_LISTS, current_floor="Current floor")
+    clean = columns["clean"]
+    for k in np.flatnonzero(~clean):
+        k = int(k)
+        for field, index, value in columns["odd"][k]:
+            if field in labels:
+                add(field, k, field, index, value, f"{labels[field]} {value!r} out of range. Floors are 0 to {top_floor[k]}")
+            else:
+                add(f"whole:{field}", k, field, index, value, f"{field} should be a whole number, got {value!r}.")
+
+    current_floor = columns["current_floor"]
+    report("current_floor", (current_floor < 0) | (current_floor > top_floor), "current_floor",
+           lambda v, k: f"Current floor {v} out of range. Floors are 0 to {top_floor[k]}", current_floor)
+
+    lengths = {}
+    for key, label in FLOOR_LISTS:
+        values, owner, index, lengths[key] = columns[key]
+        report(key, (values < 0) | (values > top_floor[owner]), key,
+               lambda v, k, label=label: f"{label} {v} out of range. Floors are 0 to {top_floor[k]}",
+               values, index, owner)
+
+    onboard = columns["onboard_passengers"]
+    report("capacity", onboard > capacity, "onboard_passengers",
+           lambda v, k: f"Onboard passengers {v} exceeds capacity of {capacity[k]}. Dangerous.", onboard)
+    report("ghost", onboard < 0, "onboard_passengers",
+           lambda v, k: f"Ghost detected? Cannot have negative passengers.. you entered [{v}]", onboard)
+    report("drop_off_count", clean & (onboard >= 0) & (onboard != lengths["drop_off_floors"]), "drop_off_floors",
+           lambda v, k: f"Number of drop off requests and onboard passengers should match. Passengers: {v} Drop off floor requests {lengths['drop_off_floors'][k]}",
+           onboard)
+
+    # the remaining plain numbers only have to be non-negative
+    for key in ("direction", "offboard_passengers"):
+        column = columns[key]
+        report(f"negative:{key}", column < 0, key, lambda v, k, key=key: f"Negative value detected for {key}: {v}.", column)
+
+    direction = columns["direction"]
+    report("direction", direction > 1, "direction",
+           lambda v, k: f"Direction should be 0 (down) or 1 (up), got {v}.", direction)
+
+    offboard = columns["offboard_passengers"]
+    report("consistency", clean & ((lengths["pick_up_floors"] != lengths["pick_up_destinations"]) | (lengths["pick_up_floors"] != offboard)),
+           "pick_up_floors",
+           lambda v, k: "Error: The number of pick-up floors, offboard passengers, and pick-up destinations are not consistent.",
+           offboard)
+
+    # only scenarios with more than one problem need sorting, valid ones cost nothing here
+    for k, keys in order.items():
+        if len(keys) > 1:
+            found = violations[k]
+            violations[k] = [found[i] for i in sorted(range(len(keys)), key=keys.__getitem__)]
+    return violations
@@ -1,66 +1,292 @@
 
 import sys
 import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from numbers import Integral
+from typing import NamedTuple
+from elevator_metrics import create_metrics, record_arrival, record_rider, record_board, record_alight, record_move
+from elevator_energy import create_energy, move_energy, energy_report
+
+
+#events yielded by lift_events, "time" is the total lift time when the event happened
+class MoveEvent(NamedTuple):
+    floor: int
+    time_taken: int
+    time: int
+    onboard_waiting: int        #how much each waiting time grew during the move
+    offboard_waiting: int
+    initial_waiting: int
+    kind = "MOVE"
+
+class DropOffEvent(NamedTuple):
+    floor: int
+    count: int
+    time: int
+    kind = "DROPOFF"
+
+class PickUpEvent(NamedTuple):
+    floor: int
+    count: int
+    time: int
+    kind = "PICKUP"
+
+class LoadEvent(NamedTuple):
+    floor: int
+    onboard: int
+    time: int
+    kind = "LOAD"
+
+class FinishedEvent(NamedTuple):
+    floor: int
+    onboard: int
+    time: int
+    onboard_waiting_time: int
+    offboard_waiting_time: int
+    initial_passenger_time: int
+    latency: dict               #p50/p95/p99 wait and journey times from latency_stats
+    energy: dict = None         #kWh in total and per passenger, only with a building energy model
+    kind = "FINISHED"
+
+
+class Passenger:
+    #one person, from the hall call until they get out. times are None until it happens
+    #hall_call is False for riders who were already in the car (or pressed a car button), they never waited
+    __slots__ = ("id", "origin", "destination", "arrival_time", "board_time", "alight_time", "hall_call")
+
+    def __init__(self, id, origin, destination, arrival_time=0, board_time=None):
+        self.id = id
+        self.origin = origin
+        self.destination = destination
+        self.arrival_time = arrival_time
+        self.board_time = board_time
+        self.alight_time = None
+        self.hall_call = False
+
+def copy_passenger(passenger):
+    copy = Passenger(passenger.id, passenger.origin, passenger.destination, passenger.arrival_time, passenger.board_time)
+    copy.alight_time = passenger.alight_time
+    copy.hall_call = passenger.hall_call
+    return copy
+
+
+
+def create_building(num_floors=4, capacity=5, motion=None, energy=None):
+    #floors are numbered 0 to num_floors - 1, capacity is the most passengers the car can hold
+    #motion (see elevator_motion.create_motion) gives real travel and door times, None keeps one second per floor
+    #energy (see elevator_energy.create_energy) measures the energy each move uses, None measures nothing
+    building = {"num_floors": num_floors,
+                "top_floor": num_floors - 1,
+                "capacity": capacity,
+                "motion": motion,
+                "energy": energy
+                }
+    return building
+
+class LiftState:
+    #all of one car's state in fixed slots, the per-floor counts are preallocated arrays updated in place
+    __slots__ = ("current_floor", "onboard_passengers", "direction", "offboard_passengers", "building", "clock",
+                 "drop_off_floors", "pick_up_floors", "pick_up_destinations",      #raw input, replaced by index_requests
+                 "drop_off_counts", "drop_off_index", "pick_up_counts", "pick_up_index",
+                 "drop_off_mask", "pick_up_mask",                                   #bit f set while floor f has requests
+                 "riding", "waiting", "delivered", "next_passenger_id",
+                 "initial_counts", "initial_onboard", "metrics",
+                 "shared")                                                          #passenger records shared with a fork
+
+    #the plain int inputs, checked for negative values by input_error
+    INPUT_NUMBERS = ("current_floor", "onboard_passengers", "direction", "offboard_passengers")
+
+    def __init__(self, current_floor, onboard_passengers, direction, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building):
+        self.current_floor = current_floor
+        self.onboard_passengers = onboard_passengers
+        self.direction = direction
+        self.drop_off_floors = drop_off_floors
+        self.offboard_passengers = offboard_passengers
+        self.pick_up_floors = pick_up_floors
+        self.pick_up_destinations = pick_up_destinations
+        self.building = building
+        self.clock = 0                                          #time stamped on passengers as they get on and off
+        self.shared = False                                     #copy a passenger before stamping it, see elevator_state.fork
+
+    #old code indexed the lift like a dict, e.g. lift["current_floor"], so that still works
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+def create_lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building=None):
+    if building is None:
+        building = create_building()
+    lift = LiftState(current_floor, onboard_passengers, direction, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building)
+    return lift
 
+def index_requests(lift):
+    #swap the raw request lists for passenger records, per-floor counts and a sorted index of the floors that have requests
+    num_floors = lift.building["num_floors"]
+    passenger_id = 0
+
+    lift.metrics = create_metrics(num_floors, lift.building["capacity"])
+    lift.drop_off_counts = array("i", [0]) * num_floors
+    lift.drop_off_index = []
+    lift.drop_off_mask = 0
+    lift.riding = [[] for _ in range(num_floors)]           #onboard passengers by destination
+    #the passengers in the car at the start are counted separately for initial_passenger_time
+    lift.initial_counts = array("i", [0]) * num_floors
+    lift.initial_onboard = len(lift.drop_off_floors)
+    for floor in lift.drop_off_floors:
+        passenger = Passenger(passenger_id, lift.current_floor, floor, 0, 0)
+        add_rider(lift, passenger)
+        record_rider(lift.metrics, passenger)
+        lift.initial_counts[floor] += 1
+        passenger_id += 1
+
+    lift.pick_up_counts = array("i", [0]) * num_floors
+    lift.pick_up_index = []
+    lift.pick_up_mask = 0
+    lift.waiting = [deque() for _ in range(num_floors)]     #passengers queueing at each floor, first come first served
+    lift.delivered = []
+    lift.offboard_passengers = 0                            #recounted as the passengers are queued
+    lift.next_passenger_id = passenger_id
+
+    #each pick up floor is paired with the destination at the same position
+    for origin, destination in zip(lift.pick_up_floors, lift.pick_up_destinations):
+        add_passenger(lift, Passenger(None, origin, destination))
+    lift.drop_off_floors = lift.pick_up_floors = lift.pick_up_destinations = None
 
-
-def create_lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations):
-    lift = {"current_floor":current_floor, 
-            "onboard_passengers": onboard_passengers,
-            "direction": direction, 
-            "drop_off_floors":drop_off_floors, 
-            "offboard_passengers": offboard_passengers, 
-            "pick_up_floors": pick_up_floors, 
-            "pick_up_destinations": pick_up_destinations,
-            "output_record" : []                                #For new frontend!
-              }
     return lift
 
+def add_passenger(lift, passenger):
+    #queue a passenger at their origin floor and register the pick up request
+    if passenger.id is None:
+        passenger.id = lift.next_passenger_id
+        lift.next_passenger_id += 1
+    passenger.hall_call = True
+    lift.waiting[passenger.origin].append(passenger)
+    add_request(lift.pick_up_counts, lift.pick_up_index, passenger.origin)
+    lift.pick_up_mask |= 1 << passenger.origin
+    lift.offboard_passengers += 1
+    record_arrival(lift.metrics, passenger)
+
+def add_rider(lift, passenger):
+    #put a passenger in the car and register their drop off request
+    lift.riding[passenger.destination].append(passenger)
+    add_request(lift.drop_off_counts, lift.drop_off_index, passenger.destination)
+    lift.drop_off_mask |= 1 << passenger.destination
+
+def add_request(counts, index, floor, n=1):
+    #first request on a floor puts it in the sorted index
+    if counts[floor] == 0:
+        insort(index, floor)
+    counts[floor] += n
+
+def clear_requests(counts, index, floor):
+    #empty a floor and drop it from the index, returning how many requests it had
+    n = counts[floor]
+    if n:
+        counts[floor] = 0
+        del index[bisect_left(index, floor)]
+    return n
+
+def remove_request(counts, index, floor, n=1):
+    #take n requests off a floor, dropping it from the index once it is empty
+    counts[floor] -= n
+    if counts[floor] == 0:
+        del index[bisect_left(index, floor)]
+
+def nearest_request(index, current_floor, direction):
+    #binary search the sorted index for the closest floor strictly past current_floor in the direction of travel
+    if direction == 1:
+        i = bisect_right(index, current_floor)
+        return index[i] if i < len(index) else None
+    if direction == 0:
+        i = bisect_left(index, current_floor)
+        return index[i - 1] if i > 0 else None
+    return None
+
 def valid_input(lift):
-    # check if floor numbers are between 0 and 3
-    valid_floors = [0, 1, 2, 3]
-    if lift["current_floor"] not in valid_floors:
-        print(f"Current floor {lift['current_floor']} out of range. Floors are 0, 1, 2, 3")
+    #print the reason if the input is invalid
+    error = input_error(lift)
+    if error is not None:
+        print(error)
         return False
+    return True
 
-    for floor in lift["drop_off_floors"]:
-        if floor not in valid_floors:
-            print(f"Drop-off floor {floor} out of range. Floors are 0, 1, 2, 3")
-            return False
-
-    for floor in lift["pick_up_floors"]:
-        if floor not in valid_floors:
-            print(f"Pick-up floor {floor} out of range. Floors are 0 1, 2, 3")
-            return False
-
-    # make sure theres no more than 5 in the lift
-    if lift["onboard_passengers"] > 5:
-        print(f"Onboard passengers {lift['onboard_passengers']} exceeds capacity. Dangerous.")
-        return False
+def whole_number(value):
+    #integers only (NumPy's too): 2.5 or True would otherwise slip through the range checks and index the per-floor arrays
+    return isinstance(value, Integral) and not isinstance(value, bool)
+
+def is_floor(value, top_floor):
+    return whole_number(value) and 0 <= value <= top_floor
+
+#what reading malformed input raises before input_error can say what is wrong: a missing key,
+#a list that isn't one, a value that can't be compared
+MALFORMED_INPUT = (KeyError, ValueError, TypeError, IndexError)
+
+def input_error(lift):
+    #returns a message for the first problem found with the input, or None if it is valid
+    # check if floor numbers are inside the building
+    top_floor = lift.building["top_floor"]
+    capacity = lift.building["capacity"]
+    if not is_floor(lift.current_floor, top_floor):
+        return f"Current floor {lift.current_floor!r} out of range. Floors are 0 to {top_floor}"
+
+    for floor in lift.drop_off_floors:
+        if not is_floor(floor, top_floor):
+            return f"Drop-off floor {floor!r} out of range. Floors are 0 to {top_floor}"
+
+    for floor in lift.pick_up_floors:
+        if not is_floor(floor, top_floor):
+            return f"Pick-up floor {floor!r} out of range. Floors are 0 to {top_floor}"
+
+    for floor in lift.pick_up_destinations:
+        if not is_floor(floor, top_floor):
+            return f"Pick-up destination {floor!r} out of range. Floors are 0 to {top_floor}"
+
+    # the counts have to be whole numbers before they can be compared
+    for key in LiftState.INPUT_NUMBERS:
+        value = getattr(lift, key)
+        if not whole_number(value):
+            return f"{key} should be a whole number, got {value!r}."
+
+    # make sure theres no more than capacity in the lift
+    if lift.onboard_passengers > capacity:
+        return f"Onboard passengers {lift.onboard_passengers} exceeds capacity of {capacity}. Dangerous."
     
-    if lift['onboard_passengers'] < 0:
-        print(f"Ghost detected? Cannot have negative passengers.. you entered [{lift['onboard_passengers']}]")
+    if lift.onboard_passengers < 0:
+        return f"Ghost detected? Cannot have negative passengers.. you entered [{lift.onboard_passengers}]"
 
     # onboard passengers and drop off floors should match
-    if lift["onboard_passengers"] != len(lift["drop_off_floors"]):
-        print(f"Number of drop off requests and onboard passengers should match. Passengers: {lift['onboard_passengers']} Drop off floor requests {len(lift['drop_off_floors'])}")
-        return False
+    if lift.onboard_passengers != len(lift.drop_off_floors):
+        return f"Number of drop off requests and onboard passengers should match. Passengers: {lift.onboard_passengers} Drop off floor requests {len(lift.drop_off_floors)}"
 
     # make sure there are no negative numbers 
-    for key, value in lift.items():
-        if isinstance(value, int) and value < 0:  # Only check integers for negative values
-            print(f"Negative value detected for {key}: {value}.")
-            return False
+    for key in LiftState.INPUT_NUMBERS:
+        value = getattr(lift, key)
+        if value < 0:
+            return f"Negative value detected for {key}: {value}."
+
+    if lift.direction not in (0, 1):
+        return f"Direction should be 0 (down) or 1 (up), got {lift.direction}."
 
     # check that the number of pick-up destinations matches the number of pick-up floors and offboard passengers
-    if len(lift["pick_up_floors"]) != len(lift["pick_up_destinations"]) or len(lift["pick_up_floors"]) != lift['offboard_passengers']:
-        print("Error: The number of pick-up floors, offboard passengers, and pick-up destinations are not consistent.")
-        return False
+    if len(lift.pick_up_floors) != len(lift.pick_up_destinations) or len(lift.pick_up_floors) != lift.offboard_passengers:
+        return "Error: The number of pick-up floors, offboard passengers, and pick-up destinations are not consistent."
 
 #no need to check passengers_drop_offs as it is a completely redundant parameter
-    return True
+    return None
+
+#the thresholds the greedy rules decide with, elevator_tuning searches over them. these defaults are the original rules
+DEFAULT_PARAMS = {"fill_limit": 1.0,        #only stop for pick ups on the way while onboard < capacity * fill_limit
+                  "detour": 0,              #how many floors past the next drop off a pick up still counts as on the way
+                  "min_waiting": 1,         #how many people have to be waiting for a pick up on the way to be worth it
+                  #turn round early when a request behind is this many floors closer than the nearest one ahead,
+                  #None only turns round when there is nothing left ahead
+                  "reverse_margin": None,
+                  }
 
-def find_next_move(lift):
+def find_next_move(lift, params=DEFAULT_PARAMS):
 
     #for efficiency, store next drop off and pick up in variables
     next_drop_off = find_next_drop_off(lift)
@@ -68,7 +294,7 @@ def find_next_move(lift):
 
     #if there are no drop offs or pick ups, change direction
     if next_drop_off == None and next_pick_up == None:
-            lift["direction"] = 1 - lift["direction"]
+            lift.direction = 1 - lift.direction
 
             #store variables again
             next_drop_off = find_next_drop_off(lift)
@@ -77,11 +303,18 @@ def find_next_move(lift):
             #if there's still none, then nothing more to do.
             if next_drop_off == None and next_pick_up == None:
                 return None
+
+    #or turn round early if something behind is much closer than anything ahead
+    elif params["reverse_margin"] is not None and reverse_early(lift, next_drop_off, next_pick_up, params["reverse_margin"]):
+            lift.direction = 1 - lift.direction
+            next_drop_off = find_next_drop_off(lift)
+            next_pick_up = find_next_pick_up(lift)
             
     if next_drop_off != None:
 
         #check if it can pick people up on the way. 
-        if next_pick_up != None and pick_up_on_way(lift, next_drop_off, next_pick_up) and lift_has_space(lift):
+        if (next_pick_up != None and pick_up_on_way(lift, next_drop_off, next_pick_up, params["detour"]) and lift_has_space(lift, params["fill_limit"])
+                and lift.pick_up_counts[next_pick_up] >= params["min_waiting"]):
             return next_pick_up
         #if it can't then go straight to the drop off
         else:
@@ -93,179 +326,300 @@ def find_next_move(lift):
     else:
         return None
 
+def reverse_early(lift, next_drop_off, next_pick_up, margin):
+    #is the nearest request behind the lift more than margin floors closer than the nearest one ahead?
+    floor = lift.current_floor
+    ahead = min(abs(f - floor) for f in (next_drop_off, next_pick_up) if f is not None)
+    behind = [nearest_request(index, floor, 1 - lift.direction) for index in (lift.drop_off_index, lift.pick_up_index)]
+    behind = [abs(f - floor) for f in behind if f is not None]
+    return bool(behind) and min(behind) + margin < ahead
 
-def lift_has_space(lift):
-    return lift["onboard_passengers"] < 5 #check if it has space
+
+def lift_has_space(lift, fill_limit=1.0):
+    return lift.onboard_passengers < lift.building["capacity"] * fill_limit #check if it has space
 
 def find_next_drop_off(lift):
 
-    #iterate up from next floor to 3, return first dropoff floor found
-    if lift["direction"] == 1 and lift["current_floor"] != 3:
-        for floor in range(lift["current_floor"] +1, 4):
-            if floor in lift["drop_off_floors"]:
-                return floor
-        return None
-    #iterate down from current floor to 0, return first dropoff floor found
-    if lift["direction"] == 0 and lift["current_floor"] != 0:
-        for floor in range(lift["current_floor"] -1, -1, -1):
-            if floor in lift["drop_off_floors"]:
-                return floor
-        return None
+    #closest drop off floor beyond the current floor in the lift's direction
+    return nearest_request(lift.drop_off_index, lift.current_floor, lift.direction)
     
 def find_next_pick_up(lift):
 
-    #iterate up from next floor to 3, return first pickup floor found
-    if lift["direction"] == 1 and lift["current_floor"] != 3:
-        for floor in range(lift["current_floor"] +1, 4):
-            if floor in lift["pick_up_floors"]:
-                return floor
-        return None
-    
-    #iterate down from current floor to 0, return first pickup floor found
-    if lift["direction"] == 0 and lift["current_floor"] != 0:
-        for floor in range(lift["current_floor"] -1, -1, -1):
-            if floor in lift["pick_up_floors"]:
-                return floor
-        return None
+    #closest pick up floor beyond the current floor in the lift's direction
+    return nearest_request(lift.pick_up_index, lift.current_floor, lift.direction)
 
-def pick_up_on_way(lift, next_drop_off, next_pick_up):
+def pick_up_on_way(lift, next_drop_off, next_pick_up, detour=0):
 
-    #if its going up, pick up <= drop off
-    if lift["direction"] == 1:  
-        return lift["current_floor"] < next_pick_up <= next_drop_off
+    #if its going up, pick up <= drop off (or up to detour floors past it)
+    if lift.direction == 1:  
+        return lift.current_floor < next_pick_up <= next_drop_off + detour
     
     #if its going down, pick up >= drop off
-    elif lift["direction"] == 0:  
-        return next_drop_off <= next_pick_up < lift["current_floor"]
+    elif lift.direction == 0:  
+        return next_drop_off - detour <= next_pick_up < lift.current_floor
     return False
 
 
 
 def process_drop_offs(lift, next_move):
-    if next_move in lift["drop_off_floors"]:
-
-        #remove departures from lift, add to onboard
-        departures = lift["drop_off_floors"].count(next_move)
-        lift["onboard_passengers"] -= departures
-
-        #remove their drop off requests from lift
-        lift["drop_off_floors"] = [floor for floor in lift["drop_off_floors"] if floor != next_move]
+    if lift.drop_off_counts[next_move]:
 
-        #print status
-        line = f"Dropping off {departures} passenger(s) on floor {next_move}."
-        print(line)
-        lift["output_record"].append(line)
+        #everyone riding to this floor gets off
+        departures = alight_passengers(lift, next_move)
+        lift.onboard_passengers -= departures
     return lift
     
 def process_pick_ups(lift, next_move):
 
-    if next_move in lift["pick_up_floors"]:
-
-        #add offboarders to onboarders
-        offboarders = lift["pick_up_floors"].count(next_move)
-        lift["onboard_passengers"] += offboarders
-        lift['offboard_passengers'] -= offboarders
-
-        #remove pick up requests from lift 
-        lift["pick_up_floors"] = [floor for floor in lift["pick_up_floors"] if floor != next_move]
-
-        #transfer/pop their offboard destination requests to onboard drop off requests
-        for i in range(offboarders):
-            lift["drop_off_floors"].append(lift["pick_up_destinations"].pop(0))
+    if lift.pick_up_counts[next_move]:
 
-        #pass status to be printed and recorded
-        line = f"Picking up {offboarders} passenger(s) on floor {next_move}"
-        print(line)
-        lift["output_record"].append(line)
+        #board everyone waiting on this floor, their destinations become drop off requests
+        offboarders = board_passengers(lift, next_move)
+        lift.onboard_passengers += offboarders
+        lift.offboard_passengers -= offboarders
 
     return lift
 
+def alight_passengers(lift, floor):
+    #stamp the riders for this floor as delivered and clear the floor's drop off requests
+    riders = lift.riding[floor]
+    if lift.shared:
+        #the records are a fork's too, stamp copies of them
+        riders[:] = map(copy_passenger, riders)
+    clock = lift.clock
+    metrics = lift.metrics
+    for passenger in riders:
+        passenger.alight_time = clock
+        record_alight(metrics, passenger)
+    lift.delivered.extend(riders)
+    riders.clear()
+    #any initial passengers going here are off too
+    lift.initial_onboard -= lift.initial_counts[floor]
+    lift.initial_counts[floor] = 0
+    lift.drop_off_mask &= ~(1 << floor)
+    return clear_requests(lift.drop_off_counts, lift.drop_off_index, floor)
+
+def board_passengers(lift, floor, limit=None):
+    #move passengers from the floor's queue into the car in arrival order, at most limit of them
+    queue = lift.waiting[floor]
+    boarders = len(queue) if limit is None else min(limit, len(queue))
+    clock = lift.clock
+    metrics = lift.metrics
+    shared = lift.shared
+    for _ in range(boarders):
+        passenger = queue.popleft()
+        if shared:
+            passenger = copy_passenger(passenger)
+        passenger.board_time = clock
+        add_rider(lift, passenger)
+        record_board(metrics, passenger)
+    if boarders:
+        remove_request(lift.pick_up_counts, lift.pick_up_index, floor, boarders)
+        if not lift.pick_up_counts[floor]:
+            lift.pick_up_mask &= ~(1 << floor)
+    return boarders
+
 def lift_update(lift, next_move):
     #process drop offs and pick ups
     lift = process_drop_offs(lift, next_move)
     lift = process_pick_ups(lift, next_move)
     #update current floor
-    lift["current_floor"] = next_move
-
-    #print lift contents
-    line = f"Passengers in the lift: {lift['onboard_passengers']}"
-    print(line)
-    lift["output_record"].append(line)
+    lift.current_floor = next_move
 
     return lift
 
-def track_initial_passengers(lift, initial_passengers):
-
-    #remove any departed initial passengers
-    initial_passengers = [i for i in initial_passengers if i in lift['drop_off_floors']]  
-    return initial_passengers
-
-
-    
-
-def update_time(lift, time, next_move, initial_passengers):
-
-    time_taken = abs(lift["current_floor"] - next_move)
+def percentile(sorted_values, q):
+    #nearest rank percentile of an already sorted list
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+def latency_stats(passengers):
+    #p50/p95/p99 of how long delivered passengers waited for the lift and how long their whole journey took
+    #only hall calls waited, riders already in the car would pull the waits down with zeros
+    waits = sorted(p.board_time - p.arrival_time for p in passengers if p.hall_call)
+    journeys = sorted(p.alight_time - p.arrival_time for p in passengers)
+    stats = {}
+    for q in (50, 95, 99):
+        stats[f"wait_p{q}"] = percentile(waits, q)
+        stats[f"journey_p{q}"] = percentile(journeys, q)
+    return stats
+
+def update_time(lift, time, next_move):
+
+    motion = lift.building.get("motion")
+    if motion is None:
+        time_taken = abs(lift.current_floor - next_move)
+    else:
+        #one lookup in the precomputed travel table, plus the doors and everyone getting off and on
+        people = lift.drop_off_counts[next_move] + lift.pick_up_counts[next_move]
+        time_taken = (motion["table"][lift.current_floor * motion["num_floors"] + next_move]
+                      + motion["door_open"] + motion["door_close"] + motion["boarding"] * people)
 
     #keep track of how the next move impacts different waiting times
     time["total_time"] += time_taken
-    time["onboard_waiting_time"] += (time_taken * lift["onboard_passengers"])
-    time["offboard_waiting_time"] += (time_taken * lift["offboard_passengers"])
-    time['initial_passenger_time'] += (time_taken * len(initial_passengers))
+    time["onboard_waiting_time"] += (time_taken * lift.onboard_passengers)
+    time["offboard_waiting_time"] += (time_taken * lift.offboard_passengers)
+    time['initial_passenger_time'] += (time_taken * lift.initial_onboard)
    
     return time_taken, time
 
-def validate_passenger_counts(lift):
+def passenger_count_error(lift):
+    #returns a message if the running counts have gone wrong, or None
     # Ensure that the number of passengers onboard never goes negative
-    if lift["onboard_passengers"] < 0:
-        print("Error: Negative passengers in the lift.")
-        return False
-    
+    if lift.onboard_passengers < 0:
+        return "Error: Negative passengers in the lift."
+
     # Ensure that there are no more passengers to drop off than onboard
-    if lift["onboard_passengers"] < len(lift["drop_off_floors"]):
-        print("Error: More drop-off requests than onboard passengers.")
+    if lift.onboard_passengers < sum(lift.drop_off_counts):
+        return "Error: More drop-off requests than onboard passengers."
+
+    return None
+
+def validate_passenger_counts(lift):
+    error = passenger_count_error(lift)
+    if error is not None:
+        print(error)
         return False
-    
     return True
 
-def lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, return_record=False):
+def lift_events(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building=None, choose_move=find_next_move, check_invariants=True):
+
+    #policies can be given by name, e.g. "look", and are looked up once here rather than on every step
+    if isinstance(choose_move, str):
+        from elevator_policies import get_policy    #imported here as elevator_policies imports this module
+        choose_move = get_policy(choose_move)
+
+    #initialize the lift state to organize info, validating before any events are produced
+    lift = create_lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building)
+    error = input_error(lift)
+    if error is not None:
+        raise ValueError(error)
+    lift = index_requests(lift)
+    return run_lift(lift, choose_move, check_invariants)
+
+def create_run(lift):
+    #everything a run needs to carry on from where it is: the lift, the time totals, how many moves it has made
+    #and whether it has finished. elevator_state can snapshot, restore and fork one of these
+    run = {"lift": lift,
+           "time": {"total_time":0, "onboard_waiting_time":0, "offboard_waiting_time":0, 'initial_passenger_time': 0},
+           "moves": 0,
+           "finished": False
+           }
+    return run
+
+def run_lift(lift, choose_move=find_next_move, check_invariants=True):
+    #generator for the main loop, yields an event for every move, drop off, pick up and the final state
+    #choose_move(lift) picks each stop, e.g. a lookahead planner in place of the greedy find_next_move
+    #check_invariants re-checks the passenger counts before every step, turn it off for production runs
+    return resume_run(create_run(lift), choose_move, check_invariants)
+
+def resume_run(run, choose_move=find_next_move, check_invariants=True):
+    #the main loop from wherever the run has got to, until the lift has nothing left to do
+    lift = run["lift"]
+    while not run["finished"]:
+        if check_invariants:
+            error = passenger_count_error(lift)
+            if error is not None:
+                raise RuntimeError(error)
+        yield from make_move(run, choose_move(lift))
+
+def make_move(run, next_move):
+    #one step of a run: go to next_move and serve it, or finish if it is None. yields the step's events
+    lift = run["lift"]
+    time = run["time"]
+    if next_move == None:
+        run["finished"] = True
+        energy = energy_report(lift.metrics) if lift.building.get("energy") is not None else None
+        yield FinishedEvent(lift.current_floor, lift.onboard_passengers, time["total_time"], time["onboard_waiting_time"], time["offboard_waiting_time"], time["initial_passenger_time"], latency_stats(lift.delivered), energy)
+        return
+
+    #waiting times before the move, so the event can carry how much each one grew
+    onboard_waiting, offboard_waiting, initial_waiting = time["onboard_waiting_time"], time["offboard_waiting_time"], time["initial_passenger_time"]
+    time_taken, time = update_time(lift, time, next_move)
+    lift.clock = time["total_time"]
+    #one lookup in the energy model's (distance, load) table, with the load before anyone gets on or off
+    energy = lift.building.get("energy")
+    joules = 0.0 if energy is None else move_energy(energy, lift.current_floor, next_move, lift.onboard_passengers, time_taken)
+    record_move(lift.metrics, lift.current_floor, next_move, time_taken, lift.onboard_passengers, lift.clock, joules)
+    run["moves"] += 1
+    yield MoveEvent(next_move, time_taken, time["total_time"], time["onboard_waiting_time"] - onboard_waiting, time["offboard_waiting_time"] - offboard_waiting, time["initial_passenger_time"] - initial_waiting)
+
+    #counts are read before lift_update clears them
+    departures = lift.drop_off_counts[next_move]
+    offboarders = lift.pick_up_counts[next_move]
+    lift = lift_update(lift, next_move)
+
+    if departures:
+        yield DropOffEvent(next_move, departures, time["total_time"])
+    if offboarders:
+        yield PickUpEvent(next_move, offboarders, time["total_time"])
+    yield LoadEvent(next_move, lift.onboard_passengers, time["total_time"])
+
+def seconds(value):
+    #whole seconds print as before, times from a motion model to two decimal places
+    return value if isinstance(value, int) else f"{value:.2f}"
+
+def format_event(event):
+    #the human readable line for each event, as printed by lift()
+    if event.kind == "MOVE":
+        return f"Moving to floor {event.floor} (Time taken {seconds(event.time_taken)} second, Total time: {seconds(event.time)})."
+    if event.kind == "DROPOFF":
+        return f"Dropping off {event.count} passenger(s) on floor {event.floor}."
+    if event.kind == "PICKUP":
+        return f"Picking up {event.count} passenger(s) on floor {event.floor}"
+    if event.kind == "LOAD":
+        return f"Passengers in the lift: {event.onboard}"
+    if event.kind == "FINISHED":
+        latency = event.latency
+        line = f"\n\nFinal state: Lift at floor {event.floor}. Passengers in lift: {event.onboard}. \n Total wait time for passengers inside the lift: {seconds(event.onboard_waiting_time)}. \n Total wait time for passengers waiting to be picked up: {seconds(event.offboard_waiting_time)}.\n Total wait time for passengers originally in the lift: {seconds(event.initial_passenger_time)}.\n Wait time p50/p95/p99: {seconds(latency['wait_p50'])}/{seconds(latency['wait_p95'])}/{seconds(latency['wait_p99'])}. Journey time p50/p95/p99: {seconds(latency['journey_p50'])}/{seconds(latency['journey_p95'])}/{seconds(latency['journey_p99'])}.\n"
+        if event.energy is not None:
+            line += f" Energy used: {event.energy['energy_kwh']:.4f} kWh, {event.energy['energy_kwh_per_passenger']:.4f} kWh per passenger.\n"
+        return line
+    raise ValueError(f"Unknown event kind {event.kind}")
+
+def lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, return_record=False, building=None, print_output=True, choose_move=find_next_move, check_invariants=True):
+
+    try:
+        events = lift_events(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building, choose_move, check_invariants)
+    except ValueError as error:
+        print(error)
+        sys.exit()
 
-    #initialize dictionary variables to organize info
-    lift = create_lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations)
-    if not valid_input(lift):
+    #printing and the text record are just sinks on the event stream, skip the formatting if neither is wanted
+    output_record = []
+    if print_output:
+        #to look nicer:
+        print("\n")
+    for event in events:
+        if print_output or return_record:
+            line = format_event(event)
+            if print_output:
+                print(line)
+            if return_record:
+                output_record.append(line)
+
+    if return_record == False:
         sys.exit()
-    initial_passengers = drop_off_floors[:]
-    time = {"total_time":0, "onboard_waiting_time":0, "offboard_waiting_time":0, 'initial_passenger_time': 0}
-    flag = True
-    #to look nicer:
-    print("\n")
-    #find next move in given direction
-    while flag == True:
-        validate_passenger_counts(lift)
-        next_move = find_next_move(lift)
-        if next_move == None:
-            line = f"\n\nFinal state: Lift at floor {lift['current_floor']}. Passengers in lift: {lift['onboard_passengers']}. \n Total wait time for passengers inside the lift: {time['onboard_waiting_time']}. \n Total wait time for passengers waiting to be picked up: {time['offboard_waiting_time']}.\n Total wait time for passengers originally in the lift: {time['initial_passenger_time']}.\n"
-            print(line)
-            lift["output_record"].append(line)
-            flag = False
-            if return_record == False:
-                sys.exit()
-            else:
-                return lift["output_record"]
-        time_taken, time = update_time(lift, time, next_move, initial_passengers)
-        line = f"Moving to floor {next_move} (Time taken {time_taken} second, Total time: {time['total_time']})."
-        print(line)
-        lift["output_record"].append(line)
-        lift = lift_update(lift, next_move)
-        initial_passengers = track_initial_passengers(lift, initial_passengers)
-    return 0
+    return output_record
+
 
 
+def parse_options(args):
+    #optional trailing key=value arguments, e.g. floors=60 capacity=8
+    options = {}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep:
+            raise ValueError(f"Option {arg} should look like key=value")
+        options[key] = value
+    return options
 
 def get_input():
-    # check it has 9 args
-    if len(sys.argv) != 9:
-        print('Write your input like this, with lists in string format "", e.g. "4, 5, 6" for a list of [4, 5, 6]: python lift_simulation.py <current_floor> <onboard_passengers> <direction> <passengers_drop_off> <drop_off_floors> <offboard_passengers> <pick_up_floors> <pick_up_destinations>')
+    # check it has 9 args, plus any key=value options
+    if len(sys.argv) < 9:
+        print('Write your input like this, with lists in string format "", e.g. "4, 5, 6" for a list of [4, 5, 6]: python lift_simulation.py <current_floor> <onboard_passengers> <direction> <passengers_drop_off> <drop_off_floors> <offboard_passengers> <pick_up_floors> <pick_up_destinations> [floors=4] [capacity=5] [policy=greedy] [floor_height=3.5 max_speed=2.5 acceleration=1 jerk= door_open=2 door_close=2 boarding=1] [energy=1 car_mass=1200 regen=0.5 standby=200]')
         sys.exit(1)
 
     try:
@@ -279,7 +633,27 @@ def get_input():
         pick_up_floors = list(map(int, re.findall(r'\d+', sys.argv[7])))  
         pick_up_destinations = list(map(int, re.findall(r'\d+', sys.argv[8])))  
 
-        return current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations
+        #building size and car capacity default to the original 4 floor, 5 person lift
+        options = parse_options(sys.argv[9:])
+        num_floors = int(options.get("floors", 4))
+        #any of the motion settings switches from one second per floor to the kinematic model
+        motion = None
+        motion_keys = ("floor_height", "acceleration", "max_speed", "jerk", "door_open", "door_close", "boarding")
+        if any(key in options for key in motion_keys):
+            from elevator_motion import create_motion
+            motion = create_motion(num_floors, **{key: float(options[key]) for key in motion_keys if key in options})
+        capacity = int(options.get("capacity", 5))
+        #energy=1 (or any of the energy settings) measures the energy used, sharing the storey height and speeds with the motion model
+        energy = None
+        energy_keys = ("car_mass", "passenger_mass", "balance", "efficiency", "regen", "friction", "start_stop", "standby")
+        if options.get("energy") == "1" or any(key in options for key in energy_keys):
+            shared = {key: float(options[key]) for key in ("floor_height", "acceleration", "max_speed") if key in options}
+            energy = create_energy(num_floors, capacity, **shared, **{key: float(options[key]) for key in energy_keys if key in options})
+        building = create_building(num_floors, capacity, motion, energy)
+        #dispatch policy by name: greedy, look, scan, collective, etd or planner
+        policy = options.get("policy", "greedy")
+
+        return current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building, policy
 
     except ValueError:
         # if something went wrong with the values, print an error
@@ -287,11 +661,13 @@ def get_input():
         sys.exit(1)
 
 
-if __name__ == "__main__":
-    # should stop it executing if it's imported into a test file etc
-    current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations = get_input()
+def main():
+    current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building, policy = get_input()
 
     #gives it a place to start
-    lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations)
+    lift(current_floor, onboard_passengers, direction, passengers_drop_off, drop_off_floors, offboard_passengers, pick_up_floors, pick_up_destinations, building=building, choose_move=policy)
 
 
+if __name__ == "__main__":
+    # should stop it executing if it's imported into a test file etc
+    main()
@@ -0,0 +1,34 @@
+import pytest
+from elevator_batch import run_batch
+
+VALID = {"current_floor": 0, "onboard_passengers": 1, "direction": 1, "passengers_drop_off": 1, "drop_off_floors": [2],
+         "offboard_passengers": 1, "pick_up_floors": [1], "pick_up_destinations": [3]}
+
+MALFORMED = [(dict(VALID, pick_up_floors=["1"]), "Pick-up floor '1' out of range"),
+             ({key: value for key, value in VALID.items() if key != "direction"}, "Malformed scenario: KeyError: 'direction'"),
+             (dict(VALID, pick_up_floors=None), "Malformed scenario: TypeError")]
+
+
+@pytest.mark.parametrize("options", [{"max_workers": 0}, {"max_workers": 0, "validate": True}, {"lockstep": True}])
+def test_malformed_rows_fail_alone(options):
+    batch = [VALID] + [scenario for scenario, _ in MALFORMED] + [VALID]
+    results = run_batch(batch, **options)
+    assert len(results) == len(batch)
+    for result in (results[0], results[-1]):
+        assert result["error"] is None and result["time"]["total_time"] > 0
+    for result, (_, message) in zip(results[1:-1], MALFORMED):
+        assert result["time"] is None and result["error"].startswith(message)
+
+
+def test_run_scenario_leaves_the_scenario_alone():
+    scenario = dict(VALID, pick_up_floors=[1, 2], pick_up_destinations=[3, 0], offboard_passengers=2)
+    before = {key: list(value) if isinstance(value, list) else value for key, value in scenario.items()}
+    run_batch([scenario], max_workers=0)
+    assert scenario == before
+
+
+def test_engine_errors_are_not_reported_as_malformed_input():
+    def broken_policy(lift):
+        raise RuntimeError("policy bug")
+    with pytest.raises(RuntimeError, match="policy bug"):
+        run_batch([dict(VALID, policy=broken_policy)], max_workers=0)
@@ -0,0 +1,36 @@
+import csv
+import json
+import random
+from schindler import create_lift, input_error
+from elevator_benchmark import make_scenario, run_benchmarks, write_results, time_phases, time_end_to_end
+
+
+def test_scenarios_are_valid_and_replayable():
+    rng = random.Random(3)
+    for _ in range(100):
+        scenario = make_scenario(rng, rng.randint(2, 30), rng.randint(0, 20), rng.randint(1, 8))
+        args = {key: value for key, value in scenario.items() if key != "building"}
+        assert input_error(create_lift(**args, building=scenario["building"])) is None
+        # every timing run starts from the same lists
+        before = json.dumps(args)
+        time_phases(scenario)
+        time_end_to_end(scenario)
+        assert json.dumps(args) == before
+
+
+def test_sweep_rows_and_call_counts(tmp_path):
+    rows = run_benchmarks([4, 12], [5, 20], [3], repeat=2)
+    assert len(rows) == 2 * 2 * 3
+    by_case = {}
+    for row in rows:
+        by_case.setdefault((row["floors"], row["requests"]), {})[row["phase"]] = row
+    for phases in by_case.values():
+        # the hand-run loop and lift() make the same decisions, and one update per move
+        assert phases["find_next_move"]["calls"] == phases["lift"]["calls"] == phases["lift_update"]["calls"] + 1
+        assert phases["lift"]["peak_memory"] > 0 and phases["lift_update"]["peak_memory"] is None
+
+    write_results(rows, str(tmp_path / "results.json"))
+    assert json.loads((tmp_path / "results.json").read_text()) == rows
+    write_results(rows, str(tmp_path / "results.csv"))
+    with open(tmp_path / "results.csv", newline="") as f:
+        assert [row["phase"] for row in csv.DictReader(f)] == [row["phase"] for row in rows]
@@ -0,0 +1,63 @@
+import json
+import asyncio
+import pytest
+from schindler import create_building
+from elevator_controller import (create_controller, subscribe, run_controller, simulated_car, start_server,
+                                 hall_call, car_call)
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def drive_simulated_car():
+    controller = create_controller(create_building(6, 4))
+    events = subscribe(controller)
+    task = asyncio.create_task(run_controller(controller, simulated_car(speedup=1000)))
+    server = await start_server(controller, port=0)
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+    try:
+        # two calls through the Python API, two over the socket
+        hall_call(controller, 0, 3)
+        car_call(controller, 5)
+        replies = [await request(reader, writer, {"type": "hall_call", "origin": 4, "destination": 1}),
+                   await request(reader, writer, {"type": "car_call", "destination": 2})]
+        errors = [await request(reader, writer, {"type": "hall_call", "origin": 9, "destination": 1}),
+                  await request(reader, writer, {"type": "car_call", "destination": 2.5}),
+                  await request(reader, writer, {"type": "hall_call", "origin": 3, "destination": 3})]
+        with pytest.raises(ValueError):
+            hall_call(controller, -1, 2)
+
+        async def until_delivered():
+            seen = []
+            while True:
+                event = await events.get()
+                seen.append(event)
+                if event["type"] == "idle" and controller["lift"].metrics["delivered"] == 4:
+                    return seen
+
+        seen = await asyncio.wait_for(until_delivered(), 10)
+        status = await request(reader, writer, {"type": "status"})
+    finally:
+        writer.close()
+        server.close()
+        task.cancel()
+    return replies, errors, seen, status
+
+
+def test_simulated_car_serves_calls_from_the_api_and_the_socket():
+    replies, errors, seen, status = asyncio.run(drive_simulated_car())
+    assert [reply["type"] for reply in replies] == ["ack", "ack"]
+    assert [error["type"] for error in errors] == ["error"] * 3
+    assert errors[0]["message"] == "Pick-up floor 9 out of range. Floors are 0 to 5"
+    assert errors[1]["message"] == "Drop-off floor 2.5 out of range. Floors are 0 to 5"
+
+    kinds = {event["type"] for event in seen}
+    assert {"hall_call", "car_call", "command", "arrived", "idle"} <= kinds
+    arrived = [event for event in seen if event["type"] == "arrived"]
+    assert sum(event["dropped_off"] for event in arrived) == 4
+    assert {1, 3, 5, 2} <= {event["floor"] for event in arrived}
+    assert status["onboard"] == 0 and status["waiting"] == 0
+    assert status["metrics"]["delivered"] == 4
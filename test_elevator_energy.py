@@ -0,0 +1,46 @@
+import pytest
+from elevator_batch import run_scenario
+from elevator_energy import create_energy, trip_energy, move_energy, energy_report, JOULES_PER_KWH
+from schindler import create_building
+
+
+def test_counterweight_decides_which_trips_cost_most():
+    energy = create_energy(12, 8)
+    # the counterweight balances the car and half a full load
+    assert trip_energy(energy, 10, 8) > trip_energy(energy, -10, 8)
+    assert trip_energy(energy, -10, 0) > trip_energy(energy, 10, 0)
+    assert trip_energy(energy, 10, 4) == pytest.approx(trip_energy(energy, -10, 4))
+    assert trip_energy(energy, 0, 8) == 0.0
+
+
+def test_regeneration_feeds_energy_back():
+    # an empty car going a long way up drives the motor, a regenerative drive makes that a net gain
+    assert trip_energy(create_energy(12, 8), 10, 0) < 0
+    assert trip_energy(create_energy(12, 8, regen=0), 10, 0) > 0
+    # on a trip the motor drives, regeneration only gives back some of the braking
+    assert trip_energy(create_energy(12, 8), 10, 8) < trip_energy(create_energy(12, 8, regen=0), 10, 8)
+    with pytest.raises(ValueError):
+        create_energy(12, 8, regen=1.5)
+    with pytest.raises(ValueError):
+        create_energy(12, 8, efficiency=0)
+
+
+def test_moves_look_up_the_table_and_add_standby():
+    energy = create_energy(12, 8)
+    assert move_energy(energy, 2, 7, 3) == trip_energy(energy, 5, 3)
+    assert move_energy(energy, 7, 2, 3, time_taken=10) == pytest.approx(trip_energy(energy, -5, 3) + 10 * energy["standby"])
+    assert move_energy(energy, 4, 4, 3, time_taken=2) == 2 * energy["standby"]
+    # an overloaded car is off the table and worked out directly
+    assert move_energy(energy, 0, 5, 11) == trip_energy(energy, 5, 11)
+
+
+def test_runs_report_kwh_per_passenger():
+    scenario = {"current_floor": 0, "onboard_passengers": 2, "direction": 1, "drop_off_floors": [5, 9],
+                "offboard_passengers": 1, "pick_up_floors": [11], "pick_up_destinations": [0],
+                "building": create_building(12, 8, energy=create_energy(12, 8))}
+    metrics = run_scenario(scenario)["metrics"]
+    assert metrics["energy_kwh"] > 0
+    assert metrics["energy_kwh_per_passenger"] == pytest.approx(metrics["energy_kwh"] / 3)
+    assert energy_report({"energy": JOULES_PER_KWH, "delivered": 0}) == {"energy_kwh": 1.0, "energy_kwh_per_passenger": 0.0}
+    # without an energy model nothing is measured
+    assert run_scenario(dict(scenario, building=create_building(12, 8)))["metrics"]["energy_kwh"] == 0
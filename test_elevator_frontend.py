@@ -0,0 +1,33 @@
+from elevator_log import create_log_writer, log_event, close_log, MOVE, DROPOFF
+from elevator_timeline import build_timeline, position_at
+from elevator_frontend import log_replay
+
+
+def test_log_slice_replays_on_the_log_clock(tmp_path):
+    path = str(tmp_path / "run.log")
+    writer = create_log_writer(path)
+    # car 0 stops every 10 s going up, car 1 sits at floor 2 and then makes one trip arriving at 3650
+    records = [(3500.0, 2, 1)] + [(3590.0 + i * 10, i, 0) for i in range(1, 9)] + [(3650.0, 8, 1)]
+    for time, floor, car in sorted(records):
+        log_event(writer, MOVE, time, floor, 0, car)
+        log_event(writer, DROPOFF, time, floor, 0, car)
+    close_log(writer)
+
+    car_events, layout, start_floors = log_replay(path, start=3620.0)
+    assert start_floors == [2, 2]       # where each car was at 3620
+    timeline = build_timeline(car_events, layout, start_floors, start=3620.0)
+    floor_y = layout["floor_y"]
+    car0, car1 = timeline["cars"]
+    # 3640 in the log is 20 s into playback: car 0 has just reached floor 5
+    assert position_at(car0, 20.0)[1] == floor_y[5]
+    # car 1 stands at floor 2 until it has to leave for floor 8, arriving at 3650
+    assert position_at(car1, 20.0)[1] == floor_y[2]
+    assert position_at(car1, 30.0)[1] == floor_y[8]
+
+
+def test_empty_slice(tmp_path):
+    path = str(tmp_path / "run.log")
+    writer = create_log_writer(path)
+    log_event(writer, MOVE, 1.0, 1, 0, 0)
+    close_log(writer)
+    assert log_replay(path, start=5.0, end=6.0) is None
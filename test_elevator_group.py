@@ -0,0 +1,26 @@
+import random
+from schindler import create_building
+from elevator_group import create_group, assign_call, run_group
+
+
+def undelivered(group):
+    return sum(car.metrics["arrivals"] - car.metrics["delivered"] for car in group["cars"])
+
+
+def test_call_to_its_own_floor_is_dropped():
+    group = create_group(2, create_building(6, 4), [0, 5])
+    assert assign_call(group, 3, 3) is None
+    assert group["waiting"] == 0 and not group["busy"].any()
+
+
+def test_every_call_is_delivered():
+    rng = random.Random(0)
+    for _ in range(500):
+        num_floors, num_cars, calls = rng.randint(3, 15), rng.randint(1, 4), rng.randint(1, 12)
+        group = create_group(num_cars, create_building(num_floors, rng.randint(1, 8)),
+                             [rng.randrange(num_floors) for _ in range(num_cars)])
+        origins = [rng.randrange(num_floors) for _ in range(calls)]
+        destinations = [rng.randrange(num_floors) for _ in range(calls)]
+        run_group(group, origins, destinations)
+        assert undelivered(group) == 0
+        assert sum(car.metrics["arrivals"] for car in group["cars"]) == sum(o != d for o, d in zip(origins, destinations))
@@ -0,0 +1,53 @@
+import pytest
+from schindler import lift, lift_events, create_building
+from elevator_motion import create_motion
+from elevator_parser import parse_events
+from elevator_log import (create_log_writer, log_event, close_log, write_events, text_to_log, open_log, parse_log,
+                          seek_time, time_slice, floor_at, MOVE, DROPOFF, MAGIC)
+
+ARGS = dict(current_floor=0, onboard_passengers=1, direction=1, passengers_drop_off=1, drop_off_floors=[3],
+            offboard_passengers=3, pick_up_floors=[1, 1, 2], pick_up_destinations=[3, 0, 1])
+
+
+def test_written_events_parse_back(tmp_path):
+    # a motion model, so the times aren't whole seconds
+    args = dict(ARGS, building=create_building(4, 5, motion=create_motion(4)))
+    path = str(tmp_path / "run.log")
+    count = write_events(lift_events(**args), path)
+    log = open_log(path)
+    assert len(log) == count
+    assert parse_log(log) == parse_events(lift_events(**args))
+
+
+def test_text_output_converts_to_the_same_log(tmp_path):
+    path = str(tmp_path / "run.log")
+    text_to_log(lift(**ARGS, return_record=True, print_output=False), path)
+    assert parse_log(open_log(path)) == parse_events(lift_events(**ARGS))
+
+
+def test_seek_time_finds_the_first_event_at_or_after(tmp_path):
+    path = str(tmp_path / "run.log")
+    writer = create_log_writer(path, buffer_size=2)     # flushed part way through
+    for time, floor in ((0.0, 1), (1.0, 2), (1.0, 2), (2.0, 4), (5.0, 3)):
+        log_event(writer, MOVE, time, floor)
+    log_event(writer, DROPOFF, 5.0, 3, 1)
+    close_log(writer)
+
+    log = open_log(path)
+    assert [seek_time(log, t) for t in (-1, 0, 1, 1.5, 5, 10)] == [0, 0, 1, 3, 4, 6]
+    assert time_slice(log, 1, 5)["floor"].tolist() == [2, 2, 4]
+    assert len(time_slice(log, start=5)) == 2
+    assert [floor_at(log, t, chunk=1) for t in (0, 1.5, 5, 6)] == [0, 2, 4, 3]
+    assert parse_log(log, start=2, end=6) == [("MOVE", 4, 2.0), ("MOVE", 3, 5.0), ("DROPOFF", 3, 1, 5.0)]
+
+
+def test_only_whole_logs_open(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_bytes(b"NOTALOG!" + bytes(20))
+    with pytest.raises(ValueError):
+        open_log(str(path))
+    path.write_bytes(MAGIC + bytes(30))
+    with pytest.raises(ValueError):
+        open_log(str(path))
+    path.write_bytes(MAGIC)
+    assert len(open_log(str(path))) == 0
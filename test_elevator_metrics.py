@@ -0,0 +1,48 @@
+import json
+import random
+from collections import Counter
+from schindler import create_building, create_lift, index_requests, run_lift, percentile
+from elevator_metrics import create_metrics, record_move, histogram_percentile, bucket, metrics_snapshot
+from elevator_traffic import traffic_scenarios
+
+
+def finished_lift(scenario):
+    lift = create_lift(scenario["current_floor"], scenario["onboard_passengers"], scenario["direction"], 0,
+                       scenario["drop_off_floors"], scenario["offboard_passengers"], scenario["pick_up_floors"],
+                       scenario["pick_up_destinations"], scenario["building"])
+    lift = index_requests(lift)
+    for _ in run_lift(lift):
+        pass
+    return lift
+
+
+def test_running_totals_match_the_passengers():
+    for scenario in traffic_scenarios("lunch", 8, 10, 50, 4, seed=4):
+        lift = finished_lift(scenario)
+        metrics, delivered = lift.metrics, lift.delivered
+        assert metrics["delivered"] == metrics["boarded"] == metrics["arrivals"] == len(delivered) == 10
+        assert metrics["wait_total"] == sum(p.board_time - p.arrival_time for p in delivered)
+        assert metrics["ride_total"] == sum(p.alight_time - p.board_time for p in delivered)
+        assert list(metrics["deliveries_by_floor"]) == [Counter(p.destination for p in delivered)[f] for f in range(8)]
+        snapshot = json.loads(json.dumps(metrics_snapshot(metrics)))
+        assert snapshot["waiting"] == snapshot["riding"] == 0
+        assert snapshot["wait_p95"] == percentile(sorted(p.board_time - p.arrival_time for p in delivered), 95)
+
+
+def test_histogram_percentiles_match_sorted_lists():
+    rng = random.Random(0)
+    for _ in range(200):
+        values = [rng.randrange(20) for _ in range(rng.randint(1, 40))]
+        for q in (1, 50, 95, 99, 100):
+            assert histogram_percentile(Counter(values), len(values), q) == percentile(sorted(values), q)
+    assert histogram_percentile(Counter(), 0, 50) == 0
+    assert bucket(0.1 * 3, 0.1) == bucket(0.3, 0.1) == 0.3
+    assert bucket(0.1 * 3, None) == 0.1 * 3
+
+
+def test_moves_count_floors_and_reversals():
+    metrics = create_metrics(10, 4)
+    for start, end, onboard in ((0, 3, 1), (3, 5, 2), (5, 1, 2), (1, 1, 0), (1, 4, 0)):
+        record_move(metrics, start, end, abs(end - start), onboard, 0)
+    assert (metrics["moves"], metrics["floors_travelled"], metrics["reversals"]) == (4, 12, 2)
+    assert metrics["load_time"] == 3 * 1 + 2 * 2 + 4 * 2
@@ -0,0 +1,42 @@
+import pytest
+from elevator_batch import run_scenario
+from elevator_motion import create_motion, travel_time, move_time, stop_time
+from schindler import create_building
+
+
+def test_trapezoidal_travel_times():
+    motion = create_motion(5, floor_height=3.5, acceleration=1.0, max_speed=2.5)
+    # one storey never reaches 2.5 m/s (that takes 6.25 m), two do
+    assert move_time(motion, 0, 1) == round(2 * 3.5 ** 0.5, 3) == 3.742
+    assert move_time(motion, 0, 2) == 7 / 2.5 + 2.5 == 5.3
+    assert move_time(motion, 4, 2) == move_time(motion, 2, 4) == move_time(motion, 1, 3)
+    assert all(move_time(motion, f, f) == 0 for f in range(5))
+
+
+def test_uneven_storeys():
+    motion = create_motion(3, floor_height=[3.5, 7.0])
+    assert motion["levels"] == [0.0, 3.5, 10.5]
+    assert move_time(motion, 1, 2) == 5.3
+    assert move_time(motion, 0, 2) == 10.5 / 2.5 + 2.5
+    with pytest.raises(ValueError):
+        create_motion(3, floor_height=[3.5])
+
+
+def test_s_curve_is_slower_and_continuous():
+    for distance in (0.5, 3.5, 7.0, 35.0):
+        assert travel_time(distance, 1.0, 2.5, jerk=1.0) > travel_time(distance, 1.0, 2.5)
+    # no jumps where the profile changes shape: full acceleration reached at 2 m, max speed at 8.75 m
+    for boundary in (2.0, 8.75):
+        below = travel_time(boundary - 1e-9, 1.0, 2.5, jerk=1.0)
+        above = travel_time(boundary + 1e-9, 1.0, 2.5, jerk=1.0)
+        assert above == pytest.approx(below, abs=1e-6)
+    assert travel_time(2.0, 1.0, 2.5, jerk=1.0) == pytest.approx(4.0)
+
+
+def test_stops_cost_the_doors_and_everyone_getting_on_and_off():
+    motion = create_motion(5)
+    assert stop_time(motion, 3) == 2.0 + 2.0 + 3 * 1.0
+    scenario = {"current_floor": 0, "onboard_passengers": 1, "direction": 1, "drop_off_floors": [2],
+                "offboard_passengers": 0, "pick_up_floors": [], "pick_up_destinations": [],
+                "building": create_building(5, 4, motion=motion)}
+    assert run_scenario(scenario)["time"]["total_time"] == pytest.approx(5.3 + stop_time(motion, 1))
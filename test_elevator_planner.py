@@ -0,0 +1,28 @@
+from elevator_batch import run_scenario
+from elevator_planner import planner_move
+from elevator_traffic import traffic_scenarios
+
+
+def passenger_time(result):
+    # what the planner minimises: every move's travel time for each passenger riding or waiting
+    return result["time"]["onboard_waiting_time"] + result["time"]["offboard_waiting_time"]
+
+
+def test_planner_is_never_worse_than_greedy():
+    better = 0
+    for scenario in traffic_scenarios("lunch", 6, 5, 200, 4, seed=1):
+        greedy = run_scenario(scenario)
+        # a budget a depth 2 search never gets near, so the result doesn't depend on how busy the machine is
+        planned = run_scenario(dict(scenario, policy=planner_move(depth=2, time_budget=1.0)))
+        assert planned["error"] is None
+        assert passenger_time(planned) <= passenger_time(greedy)
+        assert planned["metrics"]["delivered"] == greedy["metrics"]["delivered"]
+        better += passenger_time(planned) < passenger_time(greedy)
+    assert better
+
+
+def test_planner_out_of_time_falls_back_to_greedy():
+    scenario = next(traffic_scenarios("lunch", 6, 5, 1, 4, seed=2))
+    choose_move = planner_move(time_budget=0)
+    assert run_scenario(dict(scenario, policy=choose_move))["time"] == run_scenario(scenario)["time"]
+    assert choose_move.planner["fallbacks"] > 0
@@ -0,0 +1,72 @@
+from elevator_batch import run_scenario
+from elevator_policies import greedy, look, scan, collective, etd, energy_weighted
+from schindler import create_building, create_lift, index_requests
+
+
+def car(floor, direction, drop_offs=(), calls=(), building=None):
+    # a car ready for a policy to decide its next stop, calls are (origin, destination) pairs
+    lift = create_lift(floor, len(drop_offs), direction, 0, list(drop_offs), len(calls),
+                       [origin for origin, _ in calls], [destination for _, destination in calls],
+                       building or create_building(10, 8))
+    return index_requests(lift)
+
+
+def test_look_stops_for_every_request_ahead_then_reverses():
+    # full, so greedy rides past the call at 7, LOOK stops for it anyway
+    full = create_building(10, 2)
+    assert greedy(car(5, 1, [9, 9], [(7, 8)], full)) == 9
+    assert look(car(5, 1, [9, 9], [(7, 8)], full)) == 7
+
+    lift = car(5, 1, [3])
+    assert look(lift) == 3
+    assert lift.direction == 0
+
+
+def test_scan_runs_to_the_end_of_the_shaft_before_reversing():
+    lift = car(5, 1, [], [(2, 0)])
+    assert scan(lift) == 9
+    assert lift.direction == 1
+
+    lift = car(9, 1, [], [(2, 0)])
+    assert scan(lift) == 2
+    assert lift.direction == 0
+
+    assert scan(car(5, 1)) is None
+
+
+def test_collective_answers_calls_going_its_way_first():
+    # the call at 3 is going down, so the car going up serves 5 first
+    assert collective(car(0, 1, [], [(3, 1), (5, 8)])) == 5
+    # with only calls the other way ahead, it turns round at the furthest one
+    assert collective(car(0, 1, [], [(3, 1), (5, 2)])) == 5
+
+
+def test_etd_picks_the_cheapest_stop_whichever_way_the_car_is_going():
+    # three riders for 6 against one call at 0: 4 passenger seconds plus 6 afterwards beats 20 plus 18
+    lift = car(5, 0, [6, 6, 6], [(0, 2)])
+    assert greedy(car(5, 0, [6, 6, 6], [(0, 2)])) == 0
+    assert etd(lift) == 6
+    assert lift.direction == 1
+    assert etd(car(5, 1)) is None
+
+
+def test_energy_weighting_sends_an_empty_car_up():
+    # two calls one floor down, one one floor up: etd goes down, but an empty car going up is driven by
+    # the counterweight while going down it has to be pulled, which the energy cost outweighs
+    calls = [(4, 3), (4, 3), (6, 7)]
+    assert etd(car(5, 1, [], calls)) == 4
+    assert energy_weighted(0)(car(5, 1, [], calls)) == 4
+    lift = car(5, 0, [], calls)
+    assert energy_weighted()(lift) == 6
+    assert lift.direction == 1
+
+
+def test_cached_scan_does_not_share_moves_between_building_sizes():
+    # SCAN's moves depend on the top floor, a 4 floor building mustn't reuse a 10 floor one's
+    scenario = {"current_floor": 0, "onboard_passengers": 0, "direction": 1, "drop_off_floors": [],
+                "offboard_passengers": 1, "pick_up_floors": [2], "pick_up_destinations": [1]}
+    run_scenario(dict(scenario, building=create_building(10), policy="cached:scan"))
+    cached = run_scenario(dict(scenario, building=create_building(4), policy="cached:scan"))
+    plain = run_scenario(dict(scenario, building=create_building(4), policy="scan"))
+    assert cached["error"] is None
+    assert cached["time"] == plain["time"]
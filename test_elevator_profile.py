@@ -0,0 +1,41 @@
+import sys
+import pytest
+import schindler
+import elevator_batch
+from elevator_profile import instrument, format_report
+
+SCENARIO = {"current_floor": 0, "onboard_passengers": 1, "direction": 1, "drop_off_floors": [3],
+            "offboard_passengers": 3, "pick_up_floors": [1, 1, 2], "pick_up_destinations": [3, 0, 1]}
+
+
+def repo_functions():
+    # every name bound to a function in the modules instrument() patches
+    modules = [module for name, module in sys.modules.items() if name == "schindler" or name.startswith("elevator_")]
+    return {(module.__name__, attr): value for module in modules for attr, value in vars(module).items() if callable(value)}
+
+
+def test_instrument_times_the_phases_and_puts_everything_back():
+    before = repo_functions()
+    with instrument() as profile:
+        assert schindler.update_time is not before["schindler", "update_time"]
+        assert elevator_batch.run_lift is not before["elevator_batch", "run_lift"]
+        schindler.lift(**SCENARIO, passengers_drop_off=1, return_record=True)
+        elevator_batch.run_scenario(SCENARIO)
+
+    assert profile["print"]["calls"] > 0
+    # one decision per move, and a last one per run that finds nothing left to do
+    assert profile["choose_move"]["calls"] == profile["update_time"]["calls"] + 2
+    assert profile["input_error"]["calls"] == 2
+    assert "choose_move" in format_report(profile)
+    after = repo_functions()
+    assert all(after[key] is value for key, value in before.items())
+    assert "print" not in vars(schindler)
+
+
+def test_originals_come_back_after_an_error():
+    before = repo_functions()
+    with pytest.raises(RuntimeError):
+        with instrument():
+            raise RuntimeError("stop")
+    assert all(repo_functions()[key] is value for key, value in before.items())
+    assert "print" not in vars(schindler)
@@ -0,0 +1,40 @@
+from PIL import Image
+from schindler import lift_events
+from elevator_parser import parse_events
+from elevator_render import render_replay, frame_times
+from elevator_timeline import create_layout, build_timeline, position_at
+
+ARGS = dict(current_floor=0, onboard_passengers=1, direction=1, passengers_drop_off=1, drop_off_floors=[3],
+            offboard_passengers=3, pick_up_floors=[1, 1, 2], pick_up_destinations=[3, 0, 1])
+GREEN = (144, 238, 144)
+
+
+def test_frames_follow_the_car(tmp_path):
+    events = [parse_events(lift_events(**ARGS))]
+    layout = create_layout()
+    track = build_timeline(events, layout)["cars"][0]
+    times = frame_times(build_timeline(events, layout)["duration"], 2, 4.0)
+    assert times[0] == 0 and times == sorted(times)
+
+    paths = render_replay(events, str(tmp_path / "frames"), layout, fps=2, speed=4.0, max_workers=0)
+    assert len(paths) == len(times)
+    for path, t in zip(paths, times):
+        frame = Image.open(path).convert("RGB")
+        assert frame.size == (layout["width"], layout["height"])
+        x, y = position_at(track, t)
+        # just inside the car's outline, clear of the passenger icons
+        assert frame.getpixel((round(x) + 2, round(y) + 2)) == GREEN
+
+
+def test_gif_plays_every_frame(tmp_path):
+    events = [parse_events(lift_events(**ARGS))]
+    output = str(tmp_path / "replay.gif")
+    assert render_replay(events, output, fps=2, speed=4.0, max_workers=0) == output
+    count = len(frame_times(build_timeline(events, create_layout())["duration"], 2, 4.0))
+    # Pillow merges identical frames in a row into one longer one, so count the play time
+    with Image.open(output) as gif:
+        played = 0
+        for i in range(gif.n_frames):
+            gif.seek(i)
+            played += gif.info["duration"]
+    assert played == count * 500
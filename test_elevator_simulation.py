@@ -0,0 +1,59 @@
+import random
+import pytest
+from schindler import create_building
+from elevator_simulation import create_simulation, run_simulation, summarize
+
+
+def calls(count, seed=1):
+    rng = random.Random(seed)
+    t = 0.0
+    for _ in range(count):
+        t += rng.expovariate(1 / 4)
+        origin, destination = rng.sample(range(10), 2)
+        yield t, origin, destination
+
+
+def run(streaming):
+    sim = create_simulation(create_building(10, 8), door_time=2.0, streaming=streaming)
+    return run_simulation(sim, calls(3000))
+
+
+def test_streaming_keeps_no_passengers_and_the_same_figures():
+    exact, streamed = run(False), run(True)
+    assert streamed["lift"].delivered == []
+    assert streamed["time"] == exact["time"]
+    exact_summary, streamed_summary = summarize(exact), summarize(streamed)
+    for key in ("served", "mean_wait", "mean_ride"):
+        assert streamed_summary[key] == exact_summary[key]
+    # percentiles to the nearest 0.1 s bucket
+    for key in ("wait_p50", "wait_p95", "journey_p50", "journey_p99"):
+        assert abs(streamed_summary[key] - exact_summary[key]) <= 0.05 + 1e-9
+    assert streamed_summary["metrics"]["ride_p95"] == round(exact_summary["metrics"]["ride_p95"], 1)
+
+
+def test_streaming_histograms_are_bounded():
+    metrics = run(True)["lift"].metrics
+    assert all(round(time * 10, 6) == round(time * 10) for time in metrics["waits"])
+    assert len(metrics["waits"]) < len(run(False)["lift"].metrics["waits"]) / 2
+
+
+def test_calls_over_time_by_hand():
+    # t=5 a call 3 -> 7 wakes the car at 0: it reaches 3 at 8 and the doors take 2 s each way.
+    # t=9 a call 5 -> 9 comes in while the doors are open, and is on the way to 7
+    sim = run_simulation(create_simulation(create_building(10, 8), door_time=2.0),
+                         [(5.0, 3, 7), (9.0, 5, 9), (9.5, 4, 4)])
+    waits = sorted(p.board_time - p.arrival_time for p in sim["lift"].delivered)
+    rides = sorted(p.alight_time - p.board_time for p in sim["lift"].delivered)
+    assert waits == [5.0, 7.0]                  # boarded at 10 and 16
+    assert rides == [12.0, 12.0]                # 10 to 22 at floor 7, 16 to 28 at floor 9
+    assert sim["time"] == {"total_time": 30.0, "onboard_waiting_time": 24.0, "offboard_waiting_time": 12.0}
+    summary = summarize(sim)
+    assert summary["served"] == 2               # the call to its own floor is dropped
+    assert summary["mean_wait"] == 6.0
+
+
+def test_bad_call_streams():
+    with pytest.raises(ValueError):
+        run_simulation(create_simulation(create_building(10, 8)), [(5.0, 3, 7), (4.0, 1, 2)])
+    with pytest.raises(ValueError):
+        run_simulation(create_simulation(create_building(10, 8)), [(5.0, 3, 10)])
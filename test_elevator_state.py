@@ -0,0 +1,60 @@
+import json
+import random
+from schindler import create_building, create_lift, create_run, index_requests, input_error, find_next_move
+from elevator_state import snapshot, restore, fork, run_to_move, finish, alternatives
+
+
+def make_run(*args, num_floors=10):
+    lift = create_lift(*args, create_building(num_floors))
+    assert input_error(lift) is None
+    return create_run(index_requests(lift))
+
+
+def random_runs(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        n = rng.randint(3, 12)
+        calls = rng.randint(1, 8)
+        onboard = rng.randint(0, 3)
+        run = make_run(rng.randrange(n), onboard, rng.choice([0, 1]), onboard, [rng.randrange(n) for _ in range(onboard)],
+                       calls, [rng.randrange(n) for _ in range(calls)], [rng.randrange(n) for _ in range(calls)], num_floors=n)
+        run_to_move(run, rng.randint(0, 4))
+        yield run
+
+
+def test_forcing_the_policy_choice_matches_carrying_on():
+    run = make_run(4, 0, 1, 0, [], 6, [2, 0, 3, 5, 2, 0], [4, 1, 4, 5, 2, 5])
+    chosen = find_next_move(fork(run)["lift"])
+    assert alternatives(run, [chosen])[chosen] == finish(fork(run))
+
+    for run in random_runs(500):
+        if run["finished"]:
+            continue
+        chosen = find_next_move(fork(run)["lift"])
+        if chosen is not None:
+            assert alternatives(run, [chosen])[chosen] == finish(fork(run))
+
+
+def test_snapshot_round_trip_and_forks_leave_the_run_alone():
+    for run in random_runs(200, seed=1):
+        saved = json.loads(json.dumps(snapshot(run)))
+        restored = restore(saved)
+        assert snapshot(restored) == saved
+        alternatives(run)
+        assert json.loads(json.dumps(snapshot(run))) == saved
+        assert finish(restored) == finish(run)
+
+
+def test_fork_shares_passengers_until_they_change():
+    for run in random_runs(100, seed=2):
+        if run["finished"]:
+            continue
+        saved = snapshot(run)
+        branch = fork(run)
+        lift, copy = run["lift"], branch["lift"]
+        assert all(a is b for riders, others in zip(lift.riding, copy.riding) for a, b in zip(riders, others))
+        assert all(a is b for queue, others in zip(lift.waiting, copy.waiting) for a, b in zip(queue, others))
+        # each side stamps its own copies, so both finish as if the other never existed
+        finish(branch)
+        assert snapshot(run) == saved
+        assert finish(run) == finish(restore(saved))
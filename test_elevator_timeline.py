@@ -0,0 +1,43 @@
+from schindler import lift, lift_events
+from elevator_parser import parse_events, parse_record
+from elevator_timeline import build_timeline, create_layout, position_at
+
+ARGS = dict(current_floor=0, onboard_passengers=1, direction=1, passengers_drop_off=1, drop_off_floors=[3],
+            offboard_passengers=3, pick_up_floors=[1, 1, 2], pick_up_destinations=[3, 0, 1])
+
+
+def test_text_and_event_stream_give_the_same_timed_tuples():
+    events = parse_events(lift_events(**ARGS))
+    assert parse_record(lift(**ARGS, return_record=True, print_output=False)) == events
+    assert events[0] == ("MOVE", 1, 1)
+
+
+def test_cars_share_the_event_clock():
+    layout = create_layout(10, 2)
+    floor_y = layout["floor_y"]
+    # car 0 goes up 2 floors by t=2, car 1 waits at floor 5 until it arrives at floor 9 at t=100
+    car_events = [[("MOVE", 2, 2.0), ("DROPOFF", 2, 0, 2.0)],
+                  [("MOVE", 9, 100.0), ("FINISHED", None, 100.0)]]
+    timeline = build_timeline(car_events, layout, [0, 5])
+    car0, car1 = timeline["cars"]
+    assert position_at(car0, 2.0)[1] == floor_y[2]
+    assert position_at(car1, 50.0)[1] == floor_y[5]          # idle, not creeping toward floor 9
+    assert position_at(car1, 98.0)[1] == floor_y[7]          # one floor per second on the way
+    assert position_at(car1, 100.0)[1] == floor_y[9]
+    assert timeline["duration"] >= 100.0
+
+
+def test_start_offsets_the_clock():
+    layout = create_layout(10, 1)
+    timeline = build_timeline([[("MOVE", 3, 3603.0)]], layout, [0], start=3600.0)
+    assert position_at(timeline["cars"][0], 3.0)[1] == layout["floor_y"][3]
+    assert position_at(timeline["cars"][0], 0.0)[1] == layout["floor_y"][0]
+
+
+def test_icons_board_when_the_car_arrives_and_vanish_at_drop_off():
+    timeline = build_timeline([parse_events(lift_events(**ARGS))], create_layout())
+    icons = timeline["icons"]
+    assert len(icons) == 3
+    # the two on floor 1 start walking in as the car gets there at t=1
+    assert [icon["track"]["times"][:3] for icon in icons[:2]] == [[0.0, 1.0, 1.3]] * 2
+    assert {icon["vanish"] for icon in icons} <= {3.3, 5.3, 6.3}
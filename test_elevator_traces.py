@@ -0,0 +1,16 @@
+import pytest
+from elevator_traces import read_csv_trace
+
+
+@pytest.mark.parametrize("head", ["", "# calls from the lobby panel\n\n", "\n"])
+def test_header_after_comments_is_read(tmp_path, head):
+    path = tmp_path / "trace.csv"
+    path.write_text(head + "car,destination,origin,time\nA,3,0,1.5\n,1,2,4\n")
+    rows = [row[1:] for row in read_csv_trace(str(path))]
+    assert rows == [(1.5, 0, 3, "A"), (4.0, 2, 1, None)]
+
+
+def test_headerless_trace_after_a_comment(tmp_path):
+    path = tmp_path / "trace.csv"
+    path.write_text("# time,origin,destination\n0.5,1,2\n")
+    assert [row[1:] for row in read_csv_trace(str(path))] == [(0.5, 1, 2, None)]
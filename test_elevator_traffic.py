@@ -0,0 +1,38 @@
+import pytest
+from elevator_traffic import generate_calls, generate_arrays, traffic_scenarios, create_traffic
+
+
+def test_same_seed_same_calls_whatever_the_block_size():
+    calls = list(generate_calls("lunch", 10, count=1000, seed=7))
+    assert list(generate_calls("lunch", 10, count=1000, seed=7)) == calls
+    small_blocks = list(generate_calls("lunch", 10, count=1000, seed=7, block=64))
+    assert [call[1:] for call in small_blocks] == [call[1:] for call in calls]
+    assert [call[0] for call in small_blocks] == pytest.approx([call[0] for call in calls])
+    assert list(generate_calls("lunch", 10, count=1000, seed=8)) != calls
+
+
+def test_scenarios_are_reproducible():
+    first = list(traffic_scenarios("up_peak", 8, 5, 20, seed=3))
+    again = list(traffic_scenarios("up_peak", 8, 5, 20, seed=3))
+    assert [s["pick_up_floors"] for s in again] == [s["pick_up_floors"] for s in first]
+    assert [s["pick_up_destinations"] for s in again] == [s["pick_up_destinations"] for s in first]
+    assert all(len(s["pick_up_floors"]) == s["offboard_passengers"] == 5 for s in first)
+
+
+def test_profiles_shape_the_calls():
+    times, origins, destinations = generate_arrays("up_peak", 10, 5000, seed=1, lobby=2)
+    assert (origins != destinations).all()
+    assert ((origins >= 0) & (origins < 10) & (destinations >= 0) & (destinations < 10)).all()
+    assert (times[1:] >= times[:-1]).all()
+    assert 0.8 < (origins == 2).mean() < 0.95
+    _, origins, destinations = generate_arrays("interfloor", 10, 5000, seed=1)
+    assert (origins != destinations).all()
+    assert (origins == 0).mean() < 0.2
+
+
+def test_duration_and_bad_settings():
+    assert all(t <= 60 for t, _, _ in generate_calls("lunch", 10, rate=1.0, duration=60))
+    with pytest.raises(ValueError):
+        create_traffic("rush", 10)
+    with pytest.raises(ValueError):
+        create_traffic("lunch", 10, lobby=10)
@@ -0,0 +1,52 @@
+import elevator_tuning
+from elevator_batch import iter_batch
+from elevator_traffic import traffic_scenarios
+from elevator_tuning import random_candidates, successive_halving, load_cache
+
+
+def record_runs(monkeypatch):
+    # every scenario the sweep actually runs, rather than reads from the cache
+    ran = []
+
+    def run(jobs, max_workers=None, chunksize=256):
+        jobs = list(jobs)
+        ran.extend(jobs)
+        return iter_batch(jobs, max_workers, chunksize)
+
+    monkeypatch.setattr(elevator_tuning, "iter_batch", run)
+    return ran
+
+
+def sweep(cache_path, objective="journey"):
+    scenarios = list(traffic_scenarios("lunch", 6, 4, 12, 4, seed=5))
+    return successive_halving(random_candidates(6, seed=1), scenarios, objective, eta=3, min_scenarios=3,
+                              cache_path=cache_path, max_workers=0)
+
+
+def test_rerun_scores_from_the_cache(tmp_path, monkeypatch):
+    ran = record_runs(monkeypatch)
+    cache_path = str(tmp_path / "cache.jsonl")
+    report = sweep(cache_path)
+    assert len(ran) == len(load_cache(cache_path)) > 0
+
+    ran.clear()
+    assert sweep(cache_path) == report
+    assert sweep(cache_path, objective="time")[0]["rung"] == report[0]["rung"]
+    assert ran == []
+
+
+def test_interrupted_sweep_resumes(tmp_path, monkeypatch):
+    ran = record_runs(monkeypatch)
+    cache_path = tmp_path / "cache.jsonl"
+    report = sweep(str(cache_path))
+    total = len(ran)
+
+    # stopped part way through, in the middle of writing a line
+    lines = cache_path.read_text().splitlines(keepends=True)
+    cache_path.write_text("".join(lines[:total // 2]) + lines[total // 2][:15])
+    ran.clear()
+    assert sweep(str(cache_path)) == report
+    assert len(ran) == total - total // 2
+    ran.clear()
+    assert sweep(str(cache_path)) == report
+    assert ran == []
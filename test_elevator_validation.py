@@ -0,0 +1,35 @@
+import random
+from schindler import create_lift, input_error
+from elevator_validation import validate_batch
+from elevator_batch import run_batch
+
+JUNK = [-1, 9, 2.5, True, 2, 0, 1, 3, 5, -2]
+
+
+def broken_scenarios(count, seed=0):
+    # valid scenarios on 4 floors with up to three fields knocked out of shape
+    rng = random.Random(seed)
+    for _ in range(count):
+        onboard, calls = rng.randint(0, 3), rng.randint(0, 3)
+        scenario = {"current_floor": rng.randrange(4), "onboard_passengers": onboard, "direction": rng.choice([0, 1]),
+                    "drop_off_floors": [rng.randrange(4) for _ in range(onboard)], "offboard_passengers": calls,
+                    "pick_up_floors": [rng.randrange(4) for _ in range(calls)],
+                    "pick_up_destinations": [rng.randrange(4) for _ in range(calls)]}
+        for _ in range(rng.randint(0, 3)):
+            key = rng.choice(list(scenario))
+            value = scenario[key]
+            if not isinstance(value, list):
+                scenario[key] = rng.choice(JUNK)
+            elif value and rng.random() < 0.7:
+                value[rng.randrange(len(value))] = rng.choice(JUNK)
+            else:
+                value.append(rng.choice(JUNK))
+        yield scenario
+
+
+def test_every_path_reports_input_errors_first_problem():
+    scenarios = list(broken_scenarios(1000))
+    expected = [input_error(create_lift(passengers_drop_off=0, **scenario)) for scenario in scenarios]
+    assert [found[0].message if found else None for found in validate_batch(scenarios)] == expected
+    for options in ({"max_workers": 0}, {"max_workers": 0, "validate": True}, {"lockstep": True}):
+        assert [result["error"] for result in run_batch(scenarios, **options)] == expected
@@ -0,0 +1,108 @@
+import random
+import pytest
+from schindler import create_lift, input_error, lift, lift_events, format_event, index_requests, run_lift
+from elevator_validation import validate_batch
+
+VALID = {"current_floor": 0, "onboard_passengers": 1, "direction": 1, "passengers_drop_off": 1, "drop_off_floors": [2],
+         "offboard_passengers": 1, "pick_up_floors": [1], "pick_up_destinations": [3]}
+
+BAD = [({"drop_off_floors": [2.5]}, "Drop-off floor 2.5 out of range. Floors are 0 to 3"),
+       ({"current_floor": 1.5}, "Current floor 1.5 out of range. Floors are 0 to 3"),
+       ({"pick_up_floors": [True]}, "Pick-up floor True out of range. Floors are 0 to 3"),
+       ({"pick_up_destinations": [3.0]}, "Pick-up destination 3.0 out of range. Floors are 0 to 3"),
+       ({"pick_up_floors": ["1"]}, "Pick-up floor '1' out of range. Floors are 0 to 3"),
+       ({"onboard_passengers": True}, "onboard_passengers should be a whole number, got True."),
+       ({"offboard_passengers": 1.0}, "offboard_passengers should be a whole number, got 1.0."),
+       ({"direction": 0.5}, "direction should be a whole number, got 0.5."),
+       ({"direction": 2}, "Direction should be 0 (down) or 1 (up), got 2.")]
+
+
+def lift_error(scenario):
+    return input_error(create_lift(**scenario))
+
+
+def test_valid_input_passes():
+    assert lift_error(VALID) is None
+    assert validate_batch([VALID]) == [[]]
+
+
+@pytest.mark.parametrize("change, message", BAD)
+def test_non_integer_floors_and_counts_are_rejected(change, message):
+    scenario = dict(VALID, **change)
+    assert lift_error(scenario) == message
+    assert [v.message for v in validate_batch([scenario])[0]] == [message]
+
+
+def test_batch_reports_each_bad_scenario_on_its_own():
+    scenarios = [VALID] + [dict(VALID, **change) for change, _ in BAD]
+    violations = validate_batch(scenarios)
+    assert violations[0] == []
+    assert [found[0].message for found in violations[1:]] == [message for _, message in BAD]
+
+
+def test_numpy_integers_count_as_whole_numbers():
+    import numpy as np
+    scenario = dict(VALID, current_floor=np.int64(0), drop_off_floors=[np.int64(2)], pick_up_floors=np.array([1]))
+    assert lift_error(scenario) is None
+    assert validate_batch([scenario]) == [[]]
+
+
+def test_wait_percentiles_leave_out_riders_already_in_the_car():
+    from elevator_batch import run_scenario
+    scenario = {"current_floor": 0, "onboard_passengers": 3, "direction": 1, "drop_off_floors": [1, 2, 3],
+                "offboard_passengers": 1, "pick_up_floors": [2], "pick_up_destinations": [0]}
+    result = run_scenario(scenario)
+    # the one hall call waited 2 s while the car went up to floor 2
+    assert result["latency"]["wait_p50"] == result["metrics"]["wait_p50"] == 2
+    assert result["latency"]["wait_p99"] == 2
+
+
+def test_events_carry_the_run_and_print_as_the_lift_output():
+    args = dict(VALID, offboard_passengers=3, pick_up_floors=[1, 1, 2], pick_up_destinations=[3, 0, 1])
+    events = list(lift_events(**args))
+    assert [format_event(event) for event in events] == lift(**args, return_record=True, print_output=False)
+
+    moves = [event for event in events if event.kind == "MOVE"]
+    final = events[-1]
+    assert final.kind == "FINISHED" and final.onboard == 0
+    assert final.time == moves[-1].time == sum(move.time_taken for move in moves)
+    assert final.onboard_waiting_time == sum(move.onboard_waiting for move in moves)
+    assert final.offboard_waiting_time == sum(move.offboard_waiting for move in moves)
+    assert sum(event.count for event in events if event.kind == "DROPOFF") == 4
+
+    # bad input is reported when the stream is made, before any event
+    with pytest.raises(ValueError):
+        lift_events(**dict(args, current_floor=9))
+
+
+def check_indexes(state):
+    # the counts, sorted indexes and bit masks all describe the same passengers
+    for counts, index, mask, people in ((state.drop_off_counts, state.drop_off_index, state.drop_off_mask, state.riding),
+                                        (state.pick_up_counts, state.pick_up_index, state.pick_up_mask, state.waiting)):
+        assert list(counts) == [len(group) for group in people]
+        assert index == [f for f, n in enumerate(counts) if n]
+        assert mask == sum(1 << f for f in index)
+    assert state.onboard_passengers == sum(state.drop_off_counts)
+    assert state.offboard_passengers == sum(state.pick_up_counts)
+
+
+def test_lift_state_indexes_stay_in_step_with_the_passengers():
+    rng = random.Random(2)
+    for _ in range(200):
+        # nobody rides to the floor they are on, find_next_move looks past the floor the car is at
+        floor = rng.randrange(4)
+        drop_offs = [rng.choice([f for f in range(4) if f != floor]) for _ in range(rng.randint(0, 5))]
+        calls = [rng.sample(range(4), 2) for _ in range(rng.randint(0, 8))]
+        state = index_requests(create_lift(floor, len(drop_offs), rng.randint(0, 1), len(drop_offs), drop_offs, len(calls),
+                                           [origin for origin, _ in calls], [destination for _, destination in calls]))
+        check_indexes(state)
+        for _ in run_lift(state):
+            check_indexes(state)
+        assert state.onboard_passengers == state.offboard_passengers == 0
+
+    # fixed slots, still readable the old dict way
+    assert state["current_floor"] == state.current_floor
+    state["direction"] = 0
+    assert state.direction == 0
+    with pytest.raises(AttributeError):
+        state.floor = 1